@@ -0,0 +1,29 @@
+from django.utils.translation import ugettext as _
+from rest_framework import exceptions
+from rest_framework_jwt.authentication import JSONWebTokenAuthentication
+from rest_framework_jwt.settings import api_settings
+from backend.models import UserModel
+
+
+class NarukoJSONWebTokenAuthentication(JSONWebTokenAuthentication):
+    """
+    JWTによる認証
+
+    ユーザーを取得するときにロールとテナントを結合して取得する
+    """
+
+    def authenticate_credentials(self, payload):
+        username = api_settings.JWT_PAYLOAD_GET_USERNAME_HANDLER(payload)
+
+        if not username:
+            raise exceptions.AuthenticationFailed(_('Invalid payload.'))
+
+        try:
+            user = UserModel.objects.select_related("role", "tenant").get(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid signature.'))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User account is disabled.'))
+
+        return user
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+import threading
+
+
+class AwsClientCache:
+    """
+    STSの一時認証情報とサービスクライアントのキャッシュ
+
+    キーごとに有効期限を持ち、期限が近づいたエントリはバックグラウンドで更新する
+    同じキーの読み込みは同時に1つだけ実行し、他のスレッドはその結果を待つ
+    期限切れのエントリとキーごとのロックは定期的に取り除く
+    """
+
+    def __init__(self, renew_before: timedelta, expire_before: timedelta):
+        """
+        :param renew_before: 有効期限のどれだけ前からバックグラウンドで更新するか
+        :param expire_before: 有効期限のどれだけ前から期限切れとみなすか
+        """
+        self.renew_before = renew_before
+        self.expire_before = expire_before
+        self._entries = dict()
+        self._key_locks = dict()
+        self._renewing = set()
+        self._lock = threading.Lock()
+        self._next_eviction = self._now()
+        self._stats = dict(hits=0, misses=0, refreshes=0, refresh_errors=0, evictions=0)
+        self.logger = getLogger(__name__)
+
+    def get(self, key, loader, fresh: bool = False):
+        """
+        キャッシュから値を取得する
+
+        キャッシュがないか期限切れであれば読み込んで返す
+        期限が近い場合はキャッシュの値を返し、バックグラウンドで更新する
+
+        :param key: キャッシュのキー
+        :param loader: (値, 有効期限)を返す関数
+        :param fresh: Trueの場合は期限が近いエントリも期限切れとみなし、読み込み直した値を返す
+        :return: キャッシュされた値
+        """
+        valid_before = self.renew_before if fresh else self.expire_before
+        now = self._now()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._entries.get(key)
+            if entry and now < entry[1] - valid_before:
+                self._stats["hits"] += 1
+                if now >= entry[1] - self.renew_before and key not in self._renewing:
+                    self._renewing.add(key)
+                    threading.Thread(target=self._renew, args=(key, loader), daemon=True).start()
+                return entry[0]
+            self._stats["misses"] += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 同じキーの読み込みは1つだけ実行する
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry and self._now() < entry[1] - valid_before:
+                return entry[0]
+
+            value, expiration = loader()
+            with self._lock:
+                self._entries[key] = (value, expiration)
+            return value
+
+    def _renew(self, key, loader):
+        try:
+            with self._lock:
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                value, expiration = loader()
+                with self._lock:
+                    self._entries[key] = (value, expiration)
+                    self._stats["refreshes"] += 1
+        except Exception as e:
+            # 更新に失敗しても期限切れまでは現在の値を使用する
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+            self.logger.warning("failed to renew aws client cache. key: {} error: {}".format(key[:2], e))
+        finally:
+            with self._lock:
+                self._renewing.discard(key)
+
+    def _evict_expired(self, now):
+        # 期限切れのエントリと使われていないキーのロックを取り除く _lockを取得した状態で呼び出す
+        if now < self._next_eviction:
+            return
+        self._next_eviction = now + self.expire_before
+
+        expired = [key for key, (_, expiration) in self._entries.items() if now >= expiration - self.expire_before]
+        for key in expired:
+            del self._entries[key]
+        self._stats["evictions"] += len(expired)
+        for key in [key for key, key_lock in self._key_locks.items()
+                    if key not in self._entries and not key_lock.locked()]:
+            del self._key_locks[key]
+
+    def stats(self):
+        """
+        キャッシュの利用状況を返す
+
+        :return: ヒット数、ミス数、更新数、更新失敗数、削除数、エントリ数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+            self._next_eviction = self._now()
+
+    @staticmethod
+    def _now():
+        return datetime.now(timezone.utc)
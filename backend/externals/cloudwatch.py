@@ -1,3 +1,5 @@
+from django.conf import settings
+from botocore.exceptions import ClientError
 from backend.externals.external_aws_client import ExternalAwsClient
 from enum import Enum, IntEnum
 from backend.models import Resource
@@ -6,20 +8,43 @@ from backend.models.resource.ec2 import Ec2
 from backend.models.resource.rds import Rds
 from backend.models.resource.elb import Elb
 from backend.models.monitor import MonitorGraph
+from backend.models.alarm_status import AlarmIndexModel
+from backend.externals.metric_series_cache import MetricSeriesCache
+from datetime import datetime, timezone
+from collections import OrderedDict
+import calendar
+import copy
+import random
+import time
 
 
 class CloudWatch(ExternalAwsClient):
     NARUKO_ALARM_NAME_PREFIX = 'NARUKO-'
+    NARUKO_ALARM_NAME_SPECIFY_SERVICE = 'NARUKO-{}-'
     NARUKO_ALARM_NAME_SPECIFY_INSTANCE = 'NARUKO-{}-{}-'
     NARUKO_ALARM_NAME = 'NARUKO-{}-{}-{}-{}'
+    # delete_alarmsで一度に指定できるアラーム名の数
+    DELETE_ALARMS_MAX_NAMES = 100
+    THROTTLING_ERROR_CODES = ["Throttling", "ThrottlingException", "RequestLimitExceeded"]
+    # get_metric_dataで一度に指定できるクエリの数
+    METRIC_DATA_QUERIES_MAX = 500
+    SERIES_CACHE = MetricSeriesCache(
+        ttl=settings.METRIC_SERIES_CACHE_TTL,
+        latest_ttl=settings.METRIC_SERIES_CACHE_LATEST_TTL,
+        settle_seconds=settings.METRIC_SERIES_CACHE_SETTLE_SECONDS,
+        max_series=settings.METRIC_SERIES_CACHE_MAX_SERIES
+    )
 
     def _service_name(self):
         return 'cloudwatch'
 
     def get_resources_status(self):
         """
-        NARUKOから設定された各アラームを取得し
+        NARUKOから設定された各アラームの状態から
         インスタンスの状態を返す
+
+        アラームの状態はアラーム状態索引から取得する
+        索引が古くなっている場合のみCloudWatchのアラームを取得して洗い替える
          :return:dict:
             {
                 "EC2": {"instance_id": "status", ...},
@@ -27,84 +52,101 @@ class CloudWatch(ExternalAwsClient):
                 "ELB": {"instance_id": "status", ...}
             }
         """
-        alarms_list = [alarms for alarms in self._get_instances_status()]
-
-        response = {"EC2": {}, "RDS": {}, "ELB": {}}
-        for alarms in alarms_list:
-            for service in CloudWatch.Services:
-                response[service.name].update(alarms[service.name])
+        index = AlarmIndexModel.get_index(self.aws, self.region)
+        if index.needs_reconcile():
+            alarms = []
+            for metric_alarms in self._describe_alarms(CloudWatch.NARUKO_ALARM_NAME_PREFIX):
+                alarms.extend(self._build_alarm(metric_alarms))
+            index.reconcile(alarms)
 
-        return response
+        return index.resources_status()
 
-    def _get_instances_status(self) -> dict:
+    def _describe_alarms(self, alarm_name_prefix: str):
         # 最初はTokenなし
         response = self.client.describe_alarms(
-                AlarmNamePrefix=CloudWatch.NARUKO_ALARM_NAME_PREFIX,
+                AlarmNamePrefix=alarm_name_prefix,
         )
         token = response.get("NextToken")
-        yield self._build_alarm(response["MetricAlarms"])
+        yield response["MetricAlarms"]
 
         # Tokenがあれば次ページを返す
         while token:
             response = self.client.describe_alarms(
-                AlarmNamePrefix=CloudWatch.NARUKO_ALARM_NAME_PREFIX,
+                AlarmNamePrefix=alarm_name_prefix,
                 NextToken=token
             )
             token = response.get("NextToken")
-            yield self._build_alarm(response["MetricAlarms"])
+            yield response["MetricAlarms"]
 
     @staticmethod
-    def _build_alarm(alarms) -> dict:
-        res_alarms = {"EC2": {}, "RDS": {}, "ELB": {}}
+    def _build_alarm(alarms) -> list:
+        res_alarms = []
         for alarm in alarms:
             # サービスを特定する
             service_instance = CloudWatch._specify_service(alarm["Namespace"])
-            res_alarm = res_alarms[service_instance.get_service_name()]
             # サービスのIDを取得
             dimensions = CloudWatch.convert_tag(alarm["Dimensions"], key_name="Name")
-            instance_id = dimensions[service_instance.get_id_name()]
-            # アラームからインスタンスの状態を把握する
-            alarm_kind = alarm["AlarmName"].rsplit('-', 1)[1]  # DANGER or CAUTION
-            state = alarm["StateValue"]
-            # 前のループでセットされたステータスを確認する
-            instance_alarm = res_alarm.get(instance_id)
-
-            # 初回の場合
-            if not instance_alarm:
-                # アラームが発生している場合そのままセットする
-                if state == CloudWatch.AlarmState.ALARM.value:
-                    res_alarm[instance_id] = alarm_kind
-                # アラームがなければOK
-                else:
-                    res_alarm[instance_id] = CloudWatch.InstanceStatus["OK"].name
-
-            # 2回目以降にアラームが発生している場合
-            elif state == CloudWatch.AlarmState.ALARM.value:
-                # statusの優先度により更新するかどうか決める
-                if CloudWatch.InstanceStatus[alarm_kind] > CloudWatch.InstanceStatus[res_alarm[instance_id]]:
-                    res_alarm[instance_id] = alarm_kind
-                # 発生していない場合初回の状態を維持する
+            res_alarms.append(dict(
+                alarm_name=alarm["AlarmName"],
+                service=service_instance.get_service_name(),
+                resource_id=dimensions[service_instance.get_id_name()],
+                level=alarm["AlarmName"].rsplit('-', 1)[1],  # DANGER or CAUTION
+                state=alarm["StateValue"],
+                state_updated_at=alarm.get("StateUpdatedTimestamp"),
+                actions_enabled=alarm.get("ActionsEnabled", True)
+            ))
 
         return res_alarms
 
     def describe_resource_monitors(self, resource: Resource):
-        res = self.client.describe_alarms(
-            AlarmNamePrefix=CloudWatch.NARUKO_ALARM_NAME_SPECIFY_INSTANCE.format(
-                resource.get_service_name(),
-                resource.resource_id
-            )
+        alarm_name_prefix = CloudWatch.NARUKO_ALARM_NAME_SPECIFY_INSTANCE.format(
+            resource.get_service_name(),
+            resource.resource_id
         )
         # metricごとにアラームをグルーピングする
         grouped_alarms = dict()
-        for alarm in res["MetricAlarms"]:
-            # metric = alarm["Metrics"][0]["MetricStat"]["Metric"]
-            alarms_by_metric = grouped_alarms.get(alarm["MetricName"], [])
-            if alarms_by_metric:
-                alarms_by_metric.append(alarm)
-            else:
-                alarms_by_metric.append(alarm)
-                grouped_alarms[alarm["MetricName"]] = alarms_by_metric
+        for metric_alarms in self._describe_alarms(alarm_name_prefix):
+            for alarm in metric_alarms:
+                grouped_alarms.setdefault(alarm["MetricName"], []).append(alarm)
+
+        return self._build_monitors(resource, grouped_alarms)
+
+    def describe_resources_monitors(self, resources: list) -> dict:
+        """
+        複数のリソースの監視設定をまとめて取得する
+        アラームは一度のスキャンで取得し、(サービス, リソースID, メトリクス)ごとにグルーピングする
+
+        :param resources: 同じリージョンのリソースのリスト
+        :return: {(サービス名, リソースID): [Monitor, ...], ...}
+        """
+        if not resources:
+            return dict()
+
+        services = {resource.get_service_name() for resource in resources}
+        # 対象のサービスが1つであればサービスのアラームに絞って取得する
+        if len(services) == 1:
+            alarm_name_prefix = CloudWatch.NARUKO_ALARM_NAME_SPECIFY_SERVICE.format(*services)
+        else:
+            alarm_name_prefix = CloudWatch.NARUKO_ALARM_NAME_PREFIX
+        targets = {(resource.get_service_name(), resource.resource_id) for resource in resources}
+
+        grouped_alarms = dict()
+        for metric_alarms in self._describe_alarms(alarm_name_prefix):
+            for alarm in metric_alarms:
+                service_instance = CloudWatch._specify_service(alarm["Namespace"])
+                dimensions = CloudWatch.convert_tag(alarm["Dimensions"], key_name="Name")
+                key = (service_instance.get_service_name(), dimensions.get(service_instance.get_id_name()))
+                if key not in targets:
+                    continue
+                grouped_alarms.setdefault(key, {}).setdefault(alarm["MetricName"], []).append(alarm)
+
+        return {(resource.get_service_name(), resource.resource_id): self._build_monitors(
+            resource,
+            grouped_alarms.get((resource.get_service_name(), resource.resource_id), {})
+        ) for resource in resources}
 
+    @staticmethod
+    def _build_monitors(resource: Resource, grouped_alarms: dict) -> list:
         # alarmをmonitorに
         monitors = []
         for metric in resource.get_metrics():
@@ -156,15 +198,28 @@ class CloudWatch(ExternalAwsClient):
         :param topic_arn:
         :return:
         """
-        monitor = resource.monitors[0]
+        self.put_monitor_alarms(resource, resource.monitors[0], topic_arn)
+
+    def put_monitor_alarms(self, resource: Resource, monitor: Monitor, topic_arn: str):
+        """
+        監視設定ひとつ分のアラームを設定する
+        スロットリングされた場合は間隔を空けて再実行する
+
+        :param resource:
+        :param monitor:
+        :param topic_arn:
+        :return:
+        """
+        index = AlarmIndexModel.objects.filter(aws_environment=self.aws, region=self.region).first()
         for monitor_value in monitor.monitor_values:
+            alarm_name = CloudWatch.NARUKO_ALARM_NAME.format(
+                resource.get_service_name(),
+                resource.resource_id,
+                monitor.metric.name,
+                monitor_value.level.name
+            )
             params = dict(
-                AlarmName=CloudWatch.NARUKO_ALARM_NAME.format(
-                    resource.get_service_name(),
-                    resource.resource_id,
-                    monitor.metric.name,
-                    monitor_value.level.name
-                ),
+                AlarmName=alarm_name,
                 ActionsEnabled=monitor.enabled,
                 AlarmActions=[topic_arn],
                 MetricName=monitor.metric.name,
@@ -184,7 +239,95 @@ class CloudWatch(ExternalAwsClient):
             if monitor_value.level.is_lowest_level():
                 params.update(dict(OKActions=[topic_arn]))
 
-            self.client.put_metric_alarm(**params)
+            self._call_with_retry(self.client.put_metric_alarm, **params)
+
+            # 作成直後のアラームはデータ不足の状態となる 状態の変化はSNSから通知される
+            # 更新したアラームは状態が変わらず通知もされないため、索引の状態をそのまま使う
+            if index:
+                index.add_alarm(
+                    alarm_name=alarm_name,
+                    service=resource.get_service_name(),
+                    resource_id=resource.resource_id,
+                    level=monitor_value.level.name,
+                    state=CloudWatch.AlarmState.INSUFFICIENT_DATA.value,
+                    actions_enabled=monitor.enabled
+                )
+
+    def delete_monitor_alarms(self, monitors: list) -> list:
+        """
+        監視設定のアラームをまとめて削除する
+        delete_alarmsで一度に削除できる件数ごとに分割して削除する
+
+        存在しないアラームが含まれると全件が失敗するため、存在するアラームだけを削除する
+
+        :param monitors: (リソース, メトリクス名)のリスト
+        :return: 削除に失敗した場合は例外、成功した場合はNoneを監視設定ごとに並べたリスト
+        """
+        alarm_names = [
+            [CloudWatch.NARUKO_ALARM_NAME.format(
+                resource.get_service_name(),
+                resource.resource_id,
+                metric_name,
+                level.name
+            ) for level in MonitorValue.MonitorLevel]
+            for resource, metric_name in monitors
+        ]
+
+        # 監視設定のアラームが分割されないように監視設定単位でまとめる
+        chunks = [[]]
+        chunk_size = 0
+        for i, names in enumerate(alarm_names):
+            if chunk_size + len(names) > CloudWatch.DELETE_ALARMS_MAX_NAMES:
+                chunks.append([])
+                chunk_size = 0
+            chunks[-1].append(i)
+            chunk_size += len(names)
+
+        results = [None] * len(monitors)
+        for chunk in chunks:
+            names = [name for i in chunk for name in alarm_names[i]]
+            if not names:
+                continue
+            try:
+                existing = self._existing_alarm_names(names)
+                if existing:
+                    self._call_with_retry(self.client.delete_alarms,
+                                          AlarmNames=[name for name in names if name in existing])
+            except Exception as e:
+                for i in chunk:
+                    results[i] = e
+                continue
+            AlarmIndexModel.delete_alarms(self.aws, self.region, names)
+
+        return results
+
+    def _existing_alarm_names(self, alarm_names: list) -> set:
+        # 指定したアラームのうち存在するものの名前
+        names = set()
+        params = dict(AlarmNames=alarm_names, MaxRecords=CloudWatch.DELETE_ALARMS_MAX_NAMES)
+        while True:
+            response = self._call_with_retry(self.client.describe_alarms, **params)
+            names.update(alarm["AlarmName"] for alarm in response["MetricAlarms"])
+
+            if not response.get("NextToken"):
+                return names
+            params["NextToken"] = response["NextToken"]
+
+    def _call_with_retry(self, method, **params):
+        """
+        スロットリングされた場合に指数バックオフで再実行する
+        """
+        retries = 0
+        while True:
+            try:
+                return method(**params)
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in CloudWatch.THROTTLING_ERROR_CODES or \
+                        retries >= settings.CLOUDWATCH_THROTTLING_MAX_RETRIES:
+                    raise
+                # 同時にスロットリングされたスレッドが一斉に再実行しないようにばらつかせる
+                time.sleep(settings.CLOUDWATCH_THROTTLING_BACKOFF_SECONDS * (2 ** retries) * random.uniform(0.5, 1.5))
+                retries += 1
 
     def list_metrics(self, name_space, metric_name, dimensions: list):
 
@@ -204,11 +347,12 @@ class CloudWatch(ExternalAwsClient):
             response.extend(i)
         return response
 
-    def get_metric_multi_datas(self, name_space, period, stat, start_time, end_time, metric_data_queries: list, token: str = None):
+    def get_metric_multi_datas(self, name_space, period, stat, start_time, end_time, metric_data_queries: list,
+                               token: str = None, id_offset: int = 0):
         params = dict(
             MetricDataQueries=[
                 dict(
-                    Id="request" + str(i),
+                    Id="request" + str(id_offset + i),
                     MetricStat=dict(
                         Metric=dict(
                             Namespace=name_space,
@@ -232,30 +376,101 @@ class CloudWatch(ExternalAwsClient):
         return response
 
     def get_multi_charts(self, name_space, period, stat, start_time, end_time, metric_data_queries):
-        response = self.get_metric_multi_datas(name_space, period, stat, start_time, end_time, metric_data_queries)
-        results = {}
-        for i, metric_data_result in enumerate(response['MetricDataResults']):
-            results[metric_data_result['Id']] = dict(
-                timestamps=metric_data_result['Timestamps'],
-                values=metric_data_result['Values'],
-                config=metric_data_queries[i])
-        while 'NextToken' in response:
-            response = self.get_metric_multi_datas(name_space, period, stat, start_time, end_time, metric_data_queries,
-                                             response['NextToken'])
-            for metric_data_result in response['MetricDataResults']:
-                results[metric_data_result['Id']]["timestamps"].extend(metric_data_result['Timestamps'])
-                results[metric_data_result['Id']]["values"].extend(metric_data_result['Values'])
-
-        return results.values()
+        """
+        複数のメトリクスのグラフデータをまとめて取得する
+        get_metric_dataで一度に指定できるクエリの数ごとに分割して取得し、クエリのIdで結果を振り分ける
+
+        :return: クエリと同じ順番のグラフデータのリスト
+        """
+        results = OrderedDict(
+            ("request" + str(i), dict(timestamps=[], values=[], config=query))
+            for i, query in enumerate(metric_data_queries)
+        )
+        for offset in range(0, len(metric_data_queries), CloudWatch.METRIC_DATA_QUERIES_MAX):
+            queries = metric_data_queries[offset:offset + CloudWatch.METRIC_DATA_QUERIES_MAX]
+            token = None
+            while True:
+                response = self.get_metric_multi_datas(name_space, period, stat, start_time, end_time, queries,
+                                                       token, offset)
+                for metric_data_result in response['MetricDataResults']:
+                    results[metric_data_result['Id']]["timestamps"].extend(metric_data_result['Timestamps'])
+                    results[metric_data_result['Id']]["values"].extend(metric_data_result['Values'])
+                token = response.get('NextToken')
+                if not token:
+                    break
+
+        return list(results.values())
+
+    def get_charts(self, monitor_graphs: list) -> list:
+        """
+        複数のリソース・メトリクスのグラフデータをまとめて取得する
+
+        :param monitor_graphs: 名前空間とディメンションを設定したMonitorGraphのリスト
+        :return:
+        """
+        # 同じ条件のグラフは1つのget_metric_dataにまとめる
+        grouped_graphs = OrderedDict()
+        for graph in monitor_graphs:
+            condition = (graph.service_name, graph.period, graph.stat, graph.start_time, graph.end_time)
+            grouped_graphs.setdefault(condition, []).append(graph)
+
+        for (name_space, period, stat, start_time, end_time), graphs in grouped_graphs.items():
+            charts = self.get_multi_charts(
+                name_space,
+                period,
+                stat,
+                start_time,
+                end_time,
+                [dict(metric_name=graph.metric_name, dimensions=graph.dimensions) for graph in graphs]
+            )
+            for graph, chart in zip(graphs, charts):
+                graph.timestamps.extend(chart["timestamps"])
+                graph.values.extend(chart["values"])
+
+        return monitor_graphs
 
     def get_chart(self, monitor_graph: MonitorGraph):
+        """
+        グラフデータを取得する
+        取得済みの区間はキャッシュから返し、不足している区間だけCloudWatchから取得する
 
-        for graph_data in [graph_data_list for graph_data_list in self._get_chart(monitor_graph)]:
-            monitor_graph.timestamps.extend(graph_data["Timestamps"])
-            monitor_graph.values.extend(graph_data["Values"])
+        :param monitor_graph:
+        :return:
+        """
+        key = (
+            self.aws.aws_account_id,
+            self.region,
+            monitor_graph.service_name,
+            monitor_graph.metric_name,
+            tuple(sorted((dimension["Name"], dimension["Value"]) for dimension in monitor_graph.dimensions)),
+            int(monitor_graph.period),
+            monitor_graph.stat
+        )
+        timestamps, values = CloudWatch.SERIES_CACHE.get(
+            key,
+            calendar.timegm(monitor_graph.start_time.utctimetuple()),
+            calendar.timegm(monitor_graph.end_time.utctimetuple()),
+            int(monitor_graph.period),
+            lambda start, end: self._load_chart(monitor_graph, start, end)
+        )
+        monitor_graph.timestamps.extend(datetime.fromtimestamp(timestamp, timezone.utc) for timestamp in timestamps)
+        monitor_graph.values.extend(values)
 
         return monitor_graph
 
+    def _load_chart(self, monitor_graph: MonitorGraph, start: int, end: int):
+        graph = copy.copy(monitor_graph)
+        graph.start_time = datetime.fromtimestamp(start, timezone.utc)
+        graph.end_time = datetime.fromtimestamp(end, timezone.utc)
+
+        timestamps = []
+        values = []
+        for graph_data in self._get_chart(graph):
+            timestamps.extend(calendar.timegm(timestamp.utctimetuple()) for timestamp in graph_data["Timestamps"])
+            values.extend(graph_data["Values"])
+
+        return timestamps, values
+
     def _get_chart(self, monitor_graph: MonitorGraph):
         # 最初はTokenなし
         response = self.get_metric_data(
@@ -1,31 +1,50 @@
 from django.conf import settings
-import boto3
+from backend.externals.shared_client import get_shared_client
 
 
 class Connect:
 
     def __init__(self, source):
-        self.client = boto3.client('connect', region_name=settings.CONNECT_REGION)
+        self.client = get_shared_client('connect', settings.CONNECT_REGION)
         self.source = source
 
     def start_outbound_voice_contact(self, notification_message, phone_number):
         # メッセージは固定
+        self._start_outbound_voice_contact(
+            phone_number,
+            settings.NOTIFY_TEXT_MESSAGE.format(
+                timestamp=notification_message.time,
+                aws_name=notification_message.aws.name,
+                aws_account_id=notification_message.aws.aws_account_id,
+                region="{}リージョン".format(notification_message.resource.get_region_japanese()),
+                service=notification_message.resource.get_service_name(),
+                resource_id=notification_message.resource.resource_id,
+                metrics=notification_message.resource.get_metrics_japanese(notification_message.metric),
+                level=notification_message.level
+            )
+        )
+
+    def start_outbound_voice_contact_digest(self, notification_messages: list, phone_number):
+        # 複数の状態変化は件数とレベルごとの件数だけを読み上げる
+        levels = dict()
+        for notification_message in notification_messages:
+            levels[notification_message.level] = levels.get(notification_message.level, 0) + 1
+        self._start_outbound_voice_contact(
+            phone_number,
+            "{}件のアラームの状態が変化しました。{}".format(
+                len(notification_messages),
+                "、".join("{} {}件".format(level, count) for level, count in levels.items())
+            )
+        )
+
+    def _start_outbound_voice_contact(self, phone_number, message: str):
         self.client.start_outbound_voice_contact(
             DestinationPhoneNumber=phone_number,
             ContactFlowId=settings.CONNECT_NOTIFY_FLOW_ID,
             InstanceId=settings.CONNECT_NOTIFY_INSTANCE_ID,
             SourcePhoneNumber=self.source,
             Attributes=dict(
-                message=settings.NOTIFY_TEXT_MESSAGE.format(
-                    timestamp=notification_message.time,
-                    aws_name=notification_message.aws.name,
-                    aws_account_id=notification_message.aws.aws_account_id,
-                    region="{}リージョン".format(notification_message.resource.get_region_japanese()),
-                    service=notification_message.resource.get_service_name(),
-                    resource_id=notification_message.resource.resource_id,
-                    metrics=notification_message.resource.get_metrics_japanese(notification_message.metric),
-                    level=notification_message.level
-                ),
+                message=message,
                 loop_count="3",
                 status="call"
             )
@@ -1,4 +1,5 @@
 import boto3
+from botocore.exceptions import ClientError
 from django.conf import settings
 from backend.models import CloudWatchEvent
 import json
@@ -9,39 +10,6 @@ class Events:
     def __init__(self):
         self.client = boto3.client('events', region_name=settings.NARUKO_REGION)
 
-    def list_rules(self):
-        response = []
-        for rules in self._list_rules():
-            response.extend(rules)
-
-        return response
-
-    def _list_rules(self):
-        # 最初はTokenなし
-        response = self.client.list_rules(NamePrefix='NARUKO-')
-        token = response.get("NextToken")
-        yield self._build_cloudwatchevent(response["Rules"])
-
-        # Tokenがあれば次ページを返す
-        while token:
-            response = self.client.list_rules(
-                NamePrefix='NARUKO-',
-                NextToken=token
-            )
-            token = response.get("NextToken")
-            yield self._build_cloudwatchevent(response["Rules"])
-
-    @staticmethod
-    def _build_cloudwatchevent(rules: dict):
-        cloudwatchevents = []
-        for rule in rules:
-            cloudwatchevents.append(CloudWatchEvent(
-                name=rule["Name"],
-                schedule_expression=rule.get("ScheduleExpression"),
-                is_active=rule["State"] == "ENABLED"
-            ))
-        return cloudwatchevents
-
     def save_event(self, event):
         # ルール作成
         self.client.put_rule(
@@ -86,3 +54,19 @@ class Events:
             schedule_expression=response["ScheduleExpression"],
             is_active=response["State"] == "ENABLED"
         )
+
+    def describe_events(self, event_names: list) -> dict:
+        """
+        指定したルールだけを取得する
+
+        :param event_names: ルール名のリスト
+        :return: {ルール名: CloudWatchEvent} 存在しないルールは含まない
+        """
+        events = dict()
+        for event_name in event_names:
+            try:
+                events[event_name] = self.describe_event(event_name)
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ResourceNotFoundException":
+                    raise
+        return events
@@ -1,28 +1,26 @@
 import boto3
+import threading
+from datetime import datetime, timedelta, timezone
 from backend.models.aws_environment import AwsEnvironmentModel
-from backend.decorators import timed_cache
+from backend.externals.aws_client_cache import AwsClientCache
 
 
 class ExternalAwsClient:
 
+    # 認証情報とクライアントのキャッシュ
+    # 有効期限の15分前からバックグラウンドで更新し、5分前を過ぎたものは使用しない
+    CACHE = AwsClientCache(renew_before=timedelta(minutes=15), expire_before=timedelta(minutes=5))
+
+    _sts_client = None
+    # boto3のセッションはスレッドセーフではないためクライアント作成時は排他する
+    _session_lock = threading.Lock()
+
     def __init__(self, aws_environment: AwsEnvironmentModel, region: str):
-        # STSからアクセス情報取得
-        result = self._build_role(
+        # STSの認証情報からサービスクライアント取得
+        self.client = self._build_client(
             aws_environment.aws_account_id,
             aws_environment.aws_role,
-            aws_environment.aws_external_id
-        )
-        credentials = result['Credentials']
-        # セッション取得
-        session = self._build_session(
-            credentials['AccessKeyId'],
-            credentials['SecretAccessKey'],
-            credentials['SessionToken']
-        )
-
-        # サービスクライアント取得
-        self.client = self._build_client(
-            session,
+            aws_environment.aws_external_id,
             self._service_name(),
             region
         )
@@ -30,10 +28,46 @@ class ExternalAwsClient:
         self.aws = aws_environment
 
     @staticmethod
-    @timed_cache(hours=1)
+    def _build_client(aws_account_id, aws_role, aws_external_id, service_name, region):
+        credential_key = (aws_account_id, aws_role, aws_external_id)
+
+        def load_client():
+            # 期限が近い認証情報から作成するとすぐに更新が必要になるため、期限まで余裕のある認証情報を使う
+            session, expiration = ExternalAwsClient.CACHE.get(
+                credential_key,
+                lambda: ExternalAwsClient._build_session(aws_account_id, aws_role, aws_external_id),
+                fresh=True
+            )
+            with ExternalAwsClient._session_lock:
+                client = session.client(
+                    service_name=service_name,
+                    region_name=region
+                )
+            # クライアントは元にした認証情報と同じ期限まで使用する
+            return client, expiration
+
+        return ExternalAwsClient.CACHE.get(credential_key + (service_name, region), load_client)
+
+    @staticmethod
+    def _build_session(aws_account_id, aws_role, aws_external_id):
+        # STSからアクセス情報取得
+        credentials = ExternalAwsClient._build_role(aws_account_id, aws_role, aws_external_id)['Credentials']
+        with ExternalAwsClient._session_lock:
+            session = boto3.Session(
+                aws_access_key_id=credentials['AccessKeyId'],
+                aws_secret_access_key=credentials['SecretAccessKey'],
+                aws_session_token=credentials['SessionToken']
+            )
+        expiration = credentials.get('Expiration') or datetime.now(timezone.utc) + timedelta(hours=1)
+        if expiration.tzinfo is None:
+            # STSからの時刻はUTC
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        return (session, expiration), expiration
+
+    @staticmethod
     def _build_role(aws_account_id, aws_role, aws_external_id, retry_count=1):
         try:
-            return boto3.client('sts').assume_role(
+            return ExternalAwsClient._get_sts_client().assume_role(
                 RoleArn='arn:aws:iam::%(accountId)s:role/%(roleName)s' %
                         {'accountId': aws_account_id, 'roleName': aws_role},
                 RoleSessionName="session",
@@ -45,21 +79,21 @@ class ExternalAwsClient:
             return ExternalAwsClient._build_role(aws_account_id, aws_role, aws_external_id, retry_count)
 
     @staticmethod
-    @timed_cache(hours=1)
-    def _build_session(aws_access_key_id, aws_secret_access_key, aws_session_token):
-        return boto3.Session(
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key,
-            aws_session_token=aws_session_token
-        )
+    def _get_sts_client():
+        # クライアント自体はスレッドセーフなので1つを使いまわす
+        with ExternalAwsClient._session_lock:
+            if ExternalAwsClient._sts_client is None:
+                ExternalAwsClient._sts_client = boto3.client('sts')
+            return ExternalAwsClient._sts_client
 
     @staticmethod
-    @timed_cache(hours=1)
-    def _build_client(session, service_name, region):
-        return session.client(
-            service_name=service_name,
-            region_name=region
-        )
+    def cache_stats():
+        """
+        認証情報とクライアントのキャッシュの利用状況
+
+        :return: ヒット数、ミス数、更新数、更新失敗数、削除数、エントリ数
+        """
+        return ExternalAwsClient.CACHE.stats()
 
     @staticmethod
     def _service_name():
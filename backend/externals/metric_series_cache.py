@@ -0,0 +1,175 @@
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+import threading
+import time
+
+
+class MetricSeriesCache:
+    """
+    メトリクスの時系列データのキャッシュ
+
+    系列ごとに取得済みの区間とデータポイントを配列で保持し、
+    要求された区間のうち取得していない先頭・末尾の区間だけを読み込む
+    確定済みの区間は長く保持し、まだ値が変わりうる直近の区間は短い間隔で読み込み直す
+    """
+
+    def __init__(self, ttl: int, latest_ttl: int, settle_seconds: int, max_series: int):
+        """
+        :param ttl: 参照されなくなった系列を保持する秒数
+        :param latest_ttl: 直近の区間のデータを使用する秒数
+        :param settle_seconds: 現在時刻から何秒前までのデータを確定済みとみなすか
+        :param max_series: 保持する系列の最大数 超えた場合は最も参照されていない系列から破棄する
+        """
+        self.ttl = ttl
+        self.latest_ttl = latest_ttl
+        self.settle_seconds = settle_seconds
+        self.max_series = max_series
+        self._series = OrderedDict()
+        self._key_locks = dict()
+        self._lock = threading.Lock()
+        self._stats = dict(hits=0, partial_hits=0, misses=0, fetches=0)
+
+    def get(self, key, start: int, end: int, period: int, loader):
+        """
+        区間のデータポイントを取得する
+
+        :param key: 系列のキー
+        :param start: 区間の開始(UNIX時間)
+        :param end: 区間の終了(UNIX時間) 終了時刻のデータポイントは含まない
+        :param period: データポイントの間隔(秒)
+        :param loader: (開始, 終了)を受け取り(タイムスタンプのリスト, 値のリスト)を返す関数
+        :return: (タイムスタンプのリスト, 値のリスト)
+        """
+        if end <= start:
+            return [], []
+        # 読み込む区間はデータポイントの間隔に揃え、返すデータポイントは要求された区間に絞る
+        request_start, request_end = start, end
+        start = start // period * period
+        end = -(-end // period) * period
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 同じ系列の読み込みは1つだけ実行する
+        with key_lock:
+            now = self._now()
+            stable_end = int((now - self.settle_seconds) // period * period)
+            with self._lock:
+                series = self._series.get(key)
+
+            if series is None or now - series.accessed_at > self.ttl or \
+                    end < series.start or start > series.end or \
+                    (start < series.start and series.start > stable_end):
+                # キャッシュがないか、取得済みの区間とつながらない場合は全区間を読み込む
+                timestamps, values = self._load(loader, start, end)
+                series = _Series(start)
+                series.extend(timestamps, values, end, stable_end, now)
+                self._count("misses")
+            else:
+                fetched = False
+                # 先頭の不足分
+                if start < series.start:
+                    series.prepend(*self._load(loader, start, series.start), start)
+                    fetched = True
+                # 末尾の不足分 直近の区間は期限内であればそのまま使用する
+                if end > series.end and \
+                        (end > series.tail_end or now - series.tail_fetched_at > self.latest_ttl):
+                    timestamps, values = self._load(loader, series.end, end)
+                    series.extend(timestamps, values, end, stable_end, now)
+                    fetched = True
+                self._count("partial_hits" if fetched else "hits")
+
+            series.accessed_at = now
+            with self._lock:
+                self._series[key] = series
+                self._series.move_to_end(key)
+                while len(self._series) > self.max_series:
+                    old_key, _ = self._series.popitem(last=False)
+                    self._key_locks.pop(old_key, None)
+
+            return series.slice(request_start, request_end)
+
+    def _load(self, loader, start: int, end: int):
+        self._count("fetches")
+        return loader(start, end)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        """
+        キャッシュの利用状況を返す
+
+        :return: ヒット数、部分ヒット数、ミス数、CloudWatchからの読み込み数、系列数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["series"] = len(self._series)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            self._key_locks.clear()
+
+    @staticmethod
+    def _now():
+        return time.time()
+
+
+class _Series:
+    """
+    1系列分のデータポイント
+
+    [start, end)は確定済みの区間でtimestamps/valuesに保持する
+    [end, tail_end)は直近の区間でtail_fetched_atに取得した値をtail_timestamps/tail_valuesに保持する
+    """
+
+    __slots__ = ("start", "end", "timestamps", "values",
+                 "tail_end", "tail_timestamps", "tail_values", "tail_fetched_at", "accessed_at")
+
+    def __init__(self, start: int):
+        self.start = start
+        self.end = start
+        self.timestamps = array('q')
+        self.values = array('d')
+        self.tail_end = start
+        self.tail_timestamps = []
+        self.tail_values = []
+        self.tail_fetched_at = 0
+        self.accessed_at = 0
+
+    def prepend(self, timestamps: list, values: list, start: int):
+        index = bisect_left(timestamps, self.start)
+        self.timestamps = array('q', timestamps[:index]) + self.timestamps
+        self.values = array('d', values[:index]) + self.values
+        self.start = start
+
+    def extend(self, timestamps: list, values: list, end: int, stable_end: int, now: float):
+        """
+        末尾に[self.end, end)のデータポイントを追加する
+        stable_endより前のものは確定済みの区間に、以降のものは直近の区間に入れる
+        """
+        new_end = max(self.end, min(end, stable_end))
+        index = bisect_left(timestamps, new_end)
+        self.timestamps.extend(timestamps[:index])
+        self.values.extend(values[:index])
+        self.end = new_end
+        self.tail_timestamps = list(timestamps[index:])
+        self.tail_values = list(values[index:])
+        self.tail_end = max(end, new_end)
+        self.tail_fetched_at = now
+
+    def slice(self, start: int, end: int):
+        left = bisect_left(self.timestamps, start)
+        right = bisect_left(self.timestamps, end)
+        timestamps = self.timestamps[left:right].tolist()
+        values = self.values[left:right].tolist()
+        if end > self.end:
+            left = bisect_left(self.tail_timestamps, start)
+            right = bisect_left(self.tail_timestamps, end)
+            timestamps.extend(self.tail_timestamps[left:right])
+            values.extend(self.tail_values[left:right])
+        return timestamps, values
@@ -27,6 +27,21 @@ class Rds(ExternalAwsClient):
 
         return resource
 
+    def start_db_instance(self, instance_id: str):
+        self.client.start_db_instance(
+            DBInstanceIdentifier=instance_id
+        )
+
+    def stop_db_instance(self, instance_id: str):
+        self.client.stop_db_instance(
+            DBInstanceIdentifier=instance_id
+        )
+
+    def reboot_db_instance(self, instance_id: str):
+        self.client.reboot_db_instance(
+            DBInstanceIdentifier=instance_id
+        )
+
     def describe_db_snapshots(self, instance_id: str):
         # Auroraの場合クラスターからスナップショットを作成する
         instance = self.client.describe_db_instances(DBInstanceIdentifier=instance_id)['DBInstances'][0]
@@ -1,11 +1,31 @@
 from django.conf import settings
-import boto3
+from backend.externals.shared_client import get_shared_client
+from botocore.exceptions import ClientError
+from string import Formatter
+import hashlib
+import json
+import threading
+
+# 登録済みのテンプレート名
+_templates = set()
+_templates_lock = threading.Lock()
 
 
 class Ses:
 
+    # 一括送信で1回に指定できる宛先の最大数
+    BULK_MAX_DESTINATIONS = 50
+
+    # スケジュール実行結果の件名・本文
+    SCHEDULE_RESULT_SUBJECT = "【鳴子】スケジュール実行結果 {name}"
+    SCHEDULE_RESULT_TEXT = "スケジュール {name} の実行に{result}しました。"
+
+    # アラームの状態変化をまとめた通知の件名・本文
+    DIGEST_SUBJECT = "{subject} ({count}件)"
+    DIGEST_TEXT = "{count}件のアラームの状態が変化しました。\n\n{summary}"
+
     def __init__(self, source, reply_to_address):
-        self.client = boto3.client('ses', region_name=settings.SES_REGION)
+        self.client = get_shared_client('ses', settings.SES_REGION)
         self.source = source
         self.reply_to_address = reply_to_address
 
@@ -46,29 +66,142 @@ class Ses:
             to_addresses=[user_mail]
         )
 
+    @staticmethod
+    def build_notify_data(notification_message):
+        return dict(
+            timestamp=notification_message.time,
+            aws_name=notification_message.aws.name,
+            aws_account_id=notification_message.aws.aws_account_id,
+            region="{}リージョン".format(notification_message.resource.get_region_japanese()),
+            service=notification_message.resource.get_service_name(),
+            resource_id=notification_message.resource.resource_id,
+            metrics=notification_message.resource.get_metrics_japanese(notification_message.metric),
+            level=notification_message.level
+        )
+
+    @staticmethod
+    def build_digest_data(notification_messages: list):
+        return dict(
+            subject=settings.NOTIFY_TEXT_SUBJECT,
+            count=len(notification_messages),
+            summary="\n\n".join(settings.NOTIFY_TEXT_MESSAGE.format(**Ses.build_notify_data(notification_message))
+                                 for notification_message in notification_messages)
+        )
+
+    @staticmethod
+    def build_schedule_result_data(schedule, result: bool):
+        return dict(name=schedule.event_model.name, result="成功" if result else "失敗")
+
     def send_notify_mail(self, notification_message, address: str):
         self.send_mail(
             subject=settings.NOTIFY_TEXT_SUBJECT,
-            text=settings.NOTIFY_TEXT_MESSAGE.format(
-                timestamp=notification_message.time,
-                aws_name=notification_message.aws.name,
-                aws_account_id=notification_message.aws.aws_account_id,
-                region="{}リージョン".format(notification_message.resource.get_region_japanese()),
-                service=notification_message.resource.get_service_name(),
-                resource_id=notification_message.resource.resource_id,
-                metrics=notification_message.resource.get_metrics_japanese(notification_message.metric),
-                level=notification_message.level
-            ),
+            text=settings.NOTIFY_TEXT_MESSAGE.format(**Ses.build_notify_data(notification_message)),
             to_addresses=[address]
         )
 
+    def send_bulk_notify_mail(self, notification_message, addresses: list):
+        return self.send_bulk_templated_mail(
+            subject=settings.NOTIFY_TEXT_SUBJECT,
+            text=settings.NOTIFY_TEXT_MESSAGE,
+            data=Ses.build_notify_data(notification_message),
+            addresses=addresses
+        )
+
+    def send_digest_mail(self, notification_messages: list, address: str):
+        data = Ses.build_digest_data(notification_messages)
+        self.send_mail(
+            subject=Ses.DIGEST_SUBJECT.format(**data),
+            text=Ses.DIGEST_TEXT.format(**data),
+            to_addresses=[address]
+        )
+
+    def send_bulk_digest_mail(self, notification_messages: list, addresses: list):
+        return self.send_bulk_templated_mail(
+            subject=Ses.DIGEST_SUBJECT,
+            text=Ses.DIGEST_TEXT,
+            data=Ses.build_digest_data(notification_messages),
+            addresses=addresses
+        )
+
     def send_schedule_result(self, schedule, address: str, result: bool):
+        data = Ses.build_schedule_result_data(schedule, result)
         self.send_mail(
-            subject="【鳴子】スケジュール実行結果 {}".format(schedule.event_model.name),
-            text="スケジュール {} の実行に{}しました。".format(schedule.event_model.name, "成功" if result else "失敗"),
+            subject=Ses.SCHEDULE_RESULT_SUBJECT.format(**data),
+            text=Ses.SCHEDULE_RESULT_TEXT.format(**data),
             to_addresses=[address]
         )
 
+    def send_bulk_schedule_result(self, schedule, addresses: list, result: bool):
+        return self.send_bulk_templated_mail(
+            subject=Ses.SCHEDULE_RESULT_SUBJECT,
+            text=Ses.SCHEDULE_RESULT_TEXT,
+            data=Ses.build_schedule_result_data(schedule, result),
+            addresses=addresses
+        )
+
+    def send_bulk_templated_mail(self, subject: str, text: str, data: dict, addresses: list):
+        """
+        同じ内容のメールをテンプレートを使って一括送信する
+
+        :param subject: 件名 str.format形式
+        :param text: 本文 str.format形式
+        :param data: 件名・本文に埋め込む値
+        :param addresses: 宛先のリスト
+        :return: 送信に失敗した宛先のリスト
+        """
+        if len(addresses) > Ses.BULK_MAX_DESTINATIONS:
+            raise ValueError("too many addresses: {}".format(len(addresses)))
+        if not addresses:
+            return []
+
+        try:
+            response = self.client.send_bulk_templated_email(
+                Source=self.source,
+                ReplyToAddresses=[self.reply_to_address],
+                Template=self._register_template(subject, text),
+                DefaultTemplateData=json.dumps({key: str(value) for key, value in data.items()}),
+                Destinations=[dict(Destination=dict(ToAddresses=[address])) for address in addresses]
+            )
+        except ClientError:
+            return list(addresses)
+
+        # 宛先ごとの結果は指定した宛先の順に返る
+        return [address for address, status in zip(addresses, response["Status"])
+                if status["Status"] != "Success"]
+
+    def _register_template(self, subject: str, text: str):
+        # 内容からテンプレート名を決めるため、内容が変わった場合は別のテンプレートとして登録される
+        subject_part = Ses.to_template(subject)
+        text_part = Ses.to_template(text)
+        name = "naruko-{}".format(hashlib.sha1((subject_part + "\0" + text_part).encode()).hexdigest()[:16])
+
+        with _templates_lock:
+            if name in _templates:
+                return name
+        try:
+            self.client.create_template(Template=dict(TemplateName=name, SubjectPart=subject_part, TextPart=text_part))
+        except ClientError as e:
+            # 別のプロセスが登録済みの場合
+            if e.response["Error"]["Code"] != "AlreadyExists":
+                raise
+        with _templates_lock:
+            _templates.add(name)
+        return name
+
+    @staticmethod
+    def to_template(format_string: str):
+        """
+        str.format形式の文字列をSESのテンプレート形式に変換する
+
+        値はエスケープせずに埋め込む
+        """
+        template = ""
+        for literal, field_name, _, _ in Formatter().parse(format_string):
+            template += literal
+            if field_name is not None:
+                template += "{{{" + field_name + "}}}"
+        return template
+
     def send_mail(self, subject, text, to_addresses: list, cc_addresses: list =[], bcc_addresses: list =[]):
         destination = Ses.build_destination(to_addresses, cc_addresses, bcc_addresses)
         message = Ses.build_message(subject, text)
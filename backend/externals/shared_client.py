@@ -0,0 +1,25 @@
+import boto3
+import threading
+
+_clients = dict()
+# boto3のデフォルトセッションはスレッドセーフではないためクライアント作成時は排他する
+_lock = threading.Lock()
+
+
+def get_shared_client(service_name: str, region: str):
+    """
+    NARUKO自身のアカウントのサービスクライアントを返す
+
+    クライアントはスレッドセーフのため、サービス・リージョンごとに1つだけ作成して使い回す
+
+    :param service_name: サービス名
+    :param region: リージョン
+    :return: boto3のクライアント
+    """
+    key = (service_name, region)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = boto3.client(service_name, region_name=region)
+            _clients[key] = client
+    return client
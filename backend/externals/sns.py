@@ -2,11 +2,23 @@ from Crypto.PublicKey import RSA
 from Crypto.Util.asn1 import DerSequence
 from base64 import b64decode, standard_b64decode
 from Crypto.Signature import PKCS1_v1_5
-from Crypto.Hash import SHA
+from Crypto.Hash import SHA, SHA256
 from django.conf import settings
+from django.core.cache import cache
 from backend.models import AwsEnvironmentModel
+from urllib.parse import urlparse
 import boto3
+import re
 import requests
+import threading
+import time
+
+# 署名用証明書の配布元として許可するホスト
+SIGNING_CERT_HOST = re.compile(r"^sns\.[a-z0-9-]+\.amazonaws\.com(\.cn)?$")
+
+# 証明書URLごとの公開鍵 {URL: (公開鍵, 有効期限)}
+_public_keys = dict()
+_public_keys_lock = threading.Lock()
 
 
 class Sns:
@@ -15,6 +27,11 @@ class Sns:
     ALLOW_ACTIONS = [
         "Publish"
     ]
+    # 署名バージョンごとのハッシュ関数
+    SIGNATURE_HASHES = {
+        "1": SHA,
+        "2": SHA256
+    }
 
     def __init__(self, region: str=None, arn: str=None):
         if arn:
@@ -42,6 +59,14 @@ class Sns:
 
     @staticmethod
     def verify_notification(notification_data):
+        hash_module = Sns.SIGNATURE_HASHES.get(notification_data.get("SignatureVersion", "1"))
+        if hash_module is None:
+            return False
+
+        pub = Sns.get_signing_public_key(notification_data["SigningCertURL"])
+        if pub is None:
+            return False
+
         notification_signing_input_key = [
             "Message",
             "MessageId",
@@ -59,25 +84,65 @@ class Sns:
                 if k in notification_data
         ])
 
-        res = requests.get(notification_data["SigningCertURL"])
-        public_key = res.text
+        verifier = PKCS1_v1_5.new(pub)
 
-        b64der = ''.join(public_key.split('\n')[1:][:-2])
-        cert = DerSequence()
-        cert.decode(b64decode(b64der))
+        sig = standard_b64decode(notification_data['Signature'])
+        sign_input = sign_input.encode('utf8')
 
-        tbs_certificate = DerSequence()
-        tbs_certificate.decode(cert[0])
+        dig = hash_module.new(sign_input)
 
-        subject_public_key_info = tbs_certificate[6]
+        return verifier.verify(dig, sig)
 
-        pub = RSA.importKey(subject_public_key_info)
+    @staticmethod
+    def is_valid_cert_url(cert_url: str):
+        # SNS以外から配布された証明書は使用しない
+        url = urlparse(cert_url)
+        return url.scheme == "https" and bool(SIGNING_CERT_HOST.match(url.hostname or "")) \
+            and url.path.endswith(".pem")
 
-        verifier = PKCS1_v1_5.new(pub)
+    @staticmethod
+    def get_signing_public_key(cert_url: str):
+        """
+        署名用証明書の公開鍵を取得する
+
+        公開鍵はプロセス内と共有キャッシュに証明書URLごとに保持し、期限内であれば証明書を取得しない
+
+        :param cert_url: 証明書のURL
+        :return: 公開鍵 証明書のURLがSNSのものでない場合はNone
+        """
+        if not Sns.is_valid_cert_url(cert_url):
+            return None
+
+        now = time.time()
+        with _public_keys_lock:
+            public_key, expires_at = _public_keys.get(cert_url, (None, 0))
+        if expires_at > now:
+            return public_key
+
+        cache_key = "sns_signing_cert:{}".format(cert_url)
+        subject_public_key_info = cache.get(cache_key)
+        if subject_public_key_info is None:
+            res = requests.get(cert_url, timeout=settings.SNS_SIGNING_CERT_TIMEOUT)
+            res.raise_for_status()
+            subject_public_key_info = Sns.extract_public_key(res.text)
+            cache.set(cache_key, subject_public_key_info, settings.SNS_SIGNING_CERT_TTL)
+
+        public_key = RSA.importKey(subject_public_key_info)
+        with _public_keys_lock:
+            # 期限切れの公開鍵を破棄する
+            for url in [url for url, (_, expires_at) in _public_keys.items() if expires_at <= now]:
+                del _public_keys[url]
+            _public_keys[cert_url] = (public_key, now + settings.SNS_SIGNING_CERT_TTL)
+        return public_key
 
-        sig = standard_b64decode(notification_data['Signature'])
-        sign_input = sign_input.encode('utf8')
+    @staticmethod
+    def extract_public_key(certificate: str):
+        # PEM形式の証明書から公開鍵情報を取り出す
+        b64der = ''.join(certificate.split('\n')[1:][:-2])
+        cert = DerSequence()
+        cert.decode(b64decode(b64der))
 
-        dig = SHA.new(sign_input)
+        tbs_certificate = DerSequence()
+        tbs_certificate.decode(cert[0])
 
-        return verifier.verify(dig, sig)
+        return tbs_certificate[6]
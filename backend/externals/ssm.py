@@ -1,6 +1,7 @@
+from django.conf import settings
+from django.core.cache import cache
 from backend.externals.external_aws_client import ExternalAwsClient
 from backend.models import Document, Parameter
-import time
 
 
 class Ssm(ExternalAwsClient):
@@ -8,34 +9,54 @@ class Ssm(ExternalAwsClient):
     def _service_name(self):
         return 'ssm'
 
+    # 1回のコマンド送信で指定できるインスタンス数の上限
+    SEND_COMMAND_MAX_INSTANCES = 50
+    # インスタンス情報を1回で取得する件数の上限
+    DESCRIBE_INSTANCE_INFORMATION_MAX_RESULTS = 50
+
     def send_command(self, command):
+        """
+        コマンドを送信する
+        実行の終了は待たずにコマンドIDを返す
+
+        :param command: Command
+        :return: コマンドID
+        """
+        if len(command.targets) > self.SEND_COMMAND_MAX_INSTANCES:
+            raise ValueError("too many targets. max: {}".format(self.SEND_COMMAND_MAX_INSTANCES))
+
         parameters = command.document.parameters
         res = self.client.send_command(
-            InstanceIds=[command.target.resource_id],
+            InstanceIds=[target.resource_id for target in command.targets],
             DocumentName=command.document.name,
             Parameters={param.key: [param.value] for param in parameters if param.value is not None}
         )
 
-        command_id = res["Command"]["CommandId"]
-
-        invocations = []
-
-        # コマンドの実行結果が取れるまで繰り返し
-        # コマンド送信直後は結果が取れないことがある
-        while not invocations:
-            # 1秒ごとに結果を取りに行く
-            time.sleep(1)
+        return res["Command"]["CommandId"]
 
-            invocations = self.client.list_command_invocations(
-                CommandId=command_id,
-                Details=True
-            ).get("CommandInvocations")
+    def list_command_invocations(self, command_id: str) -> list:
+        """
+        インスタンスごとのコマンドの実行状況を返す
+        コマンド送信直後は実行状況が取れないことがあるため、空のリストを返すことがある
 
-            # ステータスが実行中なら取り直す
-            if invocations and invocations[0]["CommandPlugins"][0]["Status"] == "InProgress":
-                invocations = []
-
-        return invocations[0]["CommandPlugins"][0]["Output"]
+        :param command_id: コマンドID
+        :return: [{"instance_id": str, "status": str, "output": str}, ...]
+        """
+        invocations = []
+        params = dict(CommandId=command_id, Details=True)
+        while True:
+            response = self.client.list_command_invocations(**params)
+            for invocation in response.get("CommandInvocations", []):
+                plugins = invocation.get("CommandPlugins", [])
+                invocations.append(dict(
+                    instance_id=invocation["InstanceId"],
+                    status=invocation["Status"],
+                    output="\n".join(plugin["Output"] for plugin in plugins if plugin.get("Output")) or None
+                ))
+
+            if not response.get("NextToken"):
+                return invocations
+            params["NextToken"] = response["NextToken"]
 
     def list_documents(self):
         # 最初はTokenなし
@@ -57,24 +78,120 @@ class Ssm(ExternalAwsClient):
 
     @staticmethod
     def _build_documents(documents: list):
-        return [Document(name=doc_dict["Name"]) for doc_dict in documents]
+        return [Document(
+            name=doc_dict["Name"],
+            owner=doc_dict.get("Owner"),
+            platform_types=doc_dict.get("PlatformTypes"),
+            document_version=doc_dict.get("DocumentVersion")
+        ) for doc_dict in documents]
+
+    def get_document_catalog(self) -> list:
+        """
+        Commandドキュメントの一覧を返す
+        一覧はAWSアカウント・リージョンごとにキャッシュする
+
+        :return: Documentのリスト
+        """
+        documents = cache.get(self._catalog_cache_key())
+        if documents is None:
+            documents = [document for documents in self.list_documents() for document in documents]
+            cache.set(self._catalog_cache_key(), documents, settings.SSM_DOCUMENT_CATALOG_TTL)
+        return documents
 
     def describe_document(self, document_name):
+        """
+        ドキュメントの詳細を返す
+        ドキュメントの内容はバージョンごとに変わらないため、バージョンをキーにキャッシュする
+        """
+        version = self._known_version(document_name)
+        if version:
+            document = cache.get(self._document_cache_key(document_name, version))
+            if document:
+                return document
+
         response = self.client.describe_document(
             Name=document_name
         )
 
         document_dict = response["Document"]
 
-        return Document(
+        document = Document(
             name=document_dict["Name"],
             parameters=[Parameter(
                 key=param["Name"],
                 description=param["Description"]
-            ) for param in document_dict["Parameters"]]
+            ) for param in document_dict["Parameters"]],
+            owner=document_dict.get("Owner"),
+            platform_types=document_dict.get("PlatformTypes"),
+            document_version=document_dict.get("DocumentVersion")
         )
 
-    def has_ssm_agent(self, ec2):
-        response = self.client.describe_instance_information()
+        if document.document_version:
+            # 一覧と異なるバージョンであれば一覧が古くなっているため破棄する
+            if version and version != document.document_version:
+                cache.delete(self._catalog_cache_key())
+            cache.set(self._document_cache_key(document_name, document.document_version), document,
+                      settings.SSM_DOCUMENT_TTL)
+            cache.set(self._version_cache_key(document_name), document.document_version,
+                      settings.SSM_DOCUMENT_CATALOG_TTL)
+
+        return document
+
+    def _known_version(self, document_name):
+        # キャッシュ済みの一覧か直近に取得したドキュメントのバージョン
+        documents = cache.get(self._catalog_cache_key())
+        if documents:
+            for document in documents:
+                if document.name == document_name:
+                    return document.document_version
+        return cache.get(self._version_cache_key(document_name))
+
+    def _catalog_cache_key(self):
+        return "ssm_documents:{}:{}".format(self.aws.aws_account_id, self.region)
+
+    def _version_cache_key(self, document_name):
+        return "ssm_document_version:{}:{}:{}".format(self.aws.aws_account_id, self.region, document_name)
+
+    def _document_cache_key(self, document_name, version):
+        return "ssm_document:{}:{}:{}:{}".format(self.aws.aws_account_id, self.region, document_name, version)
+
+    def _managed_instances_cache_key(self):
+        return "ssm_managed_instances:{}:{}".format(self.aws.aws_account_id, self.region)
+
+    def get_managed_instance_ids(self) -> frozenset:
+        """
+        SSMエージェントが登録されているインスタンスIDの一覧を返す
+        一覧はAWSアカウント・リージョンごとにキャッシュする
+
+        :return: インスタンスIDのfrozenset
+        """
+        instance_ids = cache.get(self._managed_instances_cache_key())
+        if instance_ids is None:
+            instance_ids = frozenset(info["InstanceId"] for info in self._describe_instance_information())
+            cache.set(self._managed_instances_cache_key(), instance_ids, settings.SSM_MANAGED_INSTANCES_TTL)
+        return instance_ids
 
-        return ec2.resource_id in [info["InstanceId"] for info in response["InstanceInformationList"]]
+    def has_ssm_agent(self, ec2):
+        """
+        インスタンスにSSMエージェントが登録されているかを返す
+        キャッシュ済みの一覧があれば使い、なければ対象のインスタンスだけを問い合わせる
+        """
+        instance_ids = cache.get(self._managed_instances_cache_key())
+        if instance_ids is not None:
+            return ec2.resource_id in instance_ids
+
+        infos = self._describe_instance_information(
+            InstanceInformationFilterList=[dict(key="InstanceIds", valueSet=[ec2.resource_id])]
+        )
+        return any(info["InstanceId"] == ec2.resource_id for info in infos)
+
+    def _describe_instance_information(self, **params):
+        # 全ページを取得する
+        params["MaxResults"] = self.DESCRIBE_INSTANCE_INFORMATION_MAX_RESULTS
+        while True:
+            response = self.client.describe_instance_information(**params)
+            yield from response["InstanceInformationList"]
+
+            if not response.get("NextToken"):
+                return
+            params["NextToken"] = response["NextToken"]
@@ -0,0 +1,52 @@
+# Generated by Django 2.1.2 on 2026-10-18 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0004_telephonedestination_country_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlarmIndexModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=50)),
+                ('reconciled_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('aws_environment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alarm_indexes', to='backend.AwsEnvironmentModel')),
+            ],
+            options={
+                'db_table': 'alarm_index',
+            },
+        ),
+        migrations.CreateModel(
+            name='AlarmStatusModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alarm_name', models.CharField(max_length=255)),
+                ('service', models.CharField(max_length=50)),
+                ('resource_id', models.CharField(max_length=200)),
+                ('level', models.CharField(max_length=50)),
+                ('state', models.CharField(max_length=50)),
+                ('state_updated_at', models.DateTimeField(null=True)),
+                ('index', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alarms', to='backend.AlarmIndexModel')),
+            ],
+            options={
+                'db_table': 'alarm_status',
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='alarmstatusmodel',
+            unique_together={('index', 'alarm_name')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='alarmindexmodel',
+            unique_together={('aws_environment', 'region')},
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.1.2 on 2026-10-18 13:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_alarm_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommandInvocationModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('instance_id', models.CharField(max_length=50)),
+                ('status', models.CharField(default='Pending', max_length=20)),
+                ('output', models.TextField(null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'command_invocation',
+            },
+        ),
+        migrations.CreateModel(
+            name='CommandJobModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=50)),
+                ('command_id', models.CharField(max_length=36, unique=True)),
+                ('document_name', models.CharField(max_length=128)),
+                ('status', models.CharField(default='Pending', max_length=20)),
+                ('polled_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('aws_environment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='command_jobs', to='backend.AwsEnvironmentModel')),
+            ],
+            options={
+                'db_table': 'command_job',
+            },
+        ),
+        migrations.AddField(
+            model_name='commandinvocationmodel',
+            name='job',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='invocations', to='backend.CommandJobModel'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='commandinvocationmodel',
+            unique_together={('job', 'instance_id')},
+        ),
+    ]
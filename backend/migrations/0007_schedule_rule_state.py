@@ -0,0 +1,23 @@
+# Generated by Django 2.1.2 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0006_command_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulemodel',
+            name='is_active',
+            field=models.BooleanField(null=True),
+        ),
+        migrations.AddField(
+            model_name='schedulemodel',
+            name='schedule_expression',
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.1.2 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_schedule_rule_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulemodel',
+            name='last_executed_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='schedulemodel',
+            name='last_message',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='schedulemodel',
+            name='last_result',
+            field=models.CharField(blank=True, max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.2 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_schedule_last_result'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='operationlogmodel',
+            name='result',
+            field=models.CharField(default='succeeded', max_length=10),
+        ),
+    ]
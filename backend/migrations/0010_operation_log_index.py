@@ -0,0 +1,21 @@
+# Generated by Django 2.1.2 on 2026-10-18 15:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_operation_log_result'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operationlogmodel',
+            index=models.Index(fields=['tenant', 'created_at'], name='operation_log_tenant_created'),
+        ),
+        migrations.AddIndex(
+            model_name='operationlogmodel',
+            index=models.Index(fields=['tenant', 'executor', 'created_at'], name='operation_log_executor_created'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.1.2 on 2026-10-18 16:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0010_operation_log_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulemodel',
+            name='rule_synced_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
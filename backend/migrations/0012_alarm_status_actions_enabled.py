@@ -0,0 +1,18 @@
+# Generated by Django 2.1.2 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0011_schedule_rule_synced_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alarmstatusmodel',
+            name='actions_enabled',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -10,6 +10,10 @@ from backend.models.notification_destination import TelephoneDestination
 from backend.models.eventmodel import EventModel
 from backend.models.eventmodel import ScheduleModel
 from backend.models.operation_log import OperationLogModel
+from backend.models.alarm_status import AlarmIndexModel
+from backend.models.alarm_status import AlarmStatusModel
+from backend.models.command_job import CommandJobModel
+from backend.models.command_job import CommandInvocationModel
 
 # python models
 from backend.models.monitor import Monitor
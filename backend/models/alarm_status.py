@@ -0,0 +1,208 @@
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
+from datetime import datetime, timedelta
+
+
+# アラーム状態索引モデルクラス
+class AlarmIndexModel(models.Model):
+    """
+    アラーム状態索引
+
+    AWS環境・リージョンごとにNARUKOが設定したアラームの状態を保持する
+    SNSから通知されたアラームの状態変化で随時更新し、
+    一定間隔でCloudWatchのアラームと洗い替える
+    """
+
+    class Meta:
+        db_table = 'alarm_index'
+        unique_together = ('aws_environment', 'region')
+
+    aws_environment = models.ForeignKey('AwsEnvironmentModel', on_delete=models.CASCADE,
+                                        related_name='alarm_indexes')
+    region = models.CharField(max_length=50)
+    # 最後にCloudWatchのアラームと洗い替えた時刻
+    reconciled_at = models.DateTimeField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    def get_index(aws_environment, region: str):
+        index, _ = AlarmIndexModel.objects.get_or_create(aws_environment=aws_environment, region=region)
+        return index
+
+    def needs_reconcile(self):
+        """
+        CloudWatchのアラームと洗い替える必要があるか
+
+        :return: 一度も洗い替えていないか、前回の洗い替えから設定された間隔が経過していればTrue
+            アクションを無効にしたアラームはSNSから状態変化が通知されないため、それを含む索引は常にTrue
+        """
+        if self.reconciled_at is None:
+            return True
+        if self.alarms.filter(actions_enabled=False).exists():
+            return True
+        return timezone.now() - self.reconciled_at >= timedelta(seconds=settings.ALARM_INDEX_RECONCILE_SECONDS)
+
+    @transaction.atomic
+    def reconcile(self, alarms: list):
+        """
+        CloudWatchから取得したアラームで索引を洗い替える
+
+        :param alarms: アラームのリスト
+            [{"alarm_name": str, "service": str, "resource_id": str, "level": str, "state": str,
+              "state_updated_at": datetime, "actions_enabled": bool}, ...]
+        """
+        self.alarms.all().delete()
+        AlarmStatusModel.objects.bulk_create([AlarmStatusModel(index=self, **alarm) for alarm in alarms])
+        self.reconciled_at = timezone.now()
+        self.save()
+
+    def put_alarm(self, alarm_name: str, service: str, resource_id: str, level: str, state: str,
+                  state_updated_at: datetime = None):
+        """
+        アラームの状態を更新する
+
+        索引に保持している状態より古い状態変化は無視する
+        """
+        alarm = self.alarms.filter(alarm_name=alarm_name).first()
+        if alarm is None:
+            alarm = AlarmStatusModel(index=self, alarm_name=alarm_name)
+        elif state_updated_at and alarm.state_updated_at and state_updated_at < alarm.state_updated_at:
+            return alarm
+
+        alarm.service = service
+        alarm.resource_id = resource_id
+        alarm.level = level
+        alarm.state = state
+        alarm.state_updated_at = state_updated_at
+        alarm.save()
+        return alarm
+
+    def add_alarm(self, alarm_name: str, service: str, resource_id: str, level: str, state: str,
+                  actions_enabled: bool = True):
+        """
+        設定したアラームを索引に追加する
+
+        既存のアラームを更新した場合はCloudWatchの状態が変わらないため、保持している状態をそのまま使う
+        """
+        alarm, created = self.alarms.get_or_create(alarm_name=alarm_name, defaults=dict(
+            service=service,
+            resource_id=resource_id,
+            level=level,
+            state=state,
+            actions_enabled=actions_enabled
+        ))
+        if not created and alarm.actions_enabled != actions_enabled:
+            alarm.actions_enabled = actions_enabled
+            alarm.save()
+        return alarm
+
+    def recover_metric_alarms(self, alarm_name: str, state_updated_at: datetime = None):
+        """
+        同じリソース・メトリクスの全レベルのアラームを復旧した状態にする
+
+        復旧時の通知は最も低いレベルのアラームにだけ設定しているため、
+        その復旧をもって高いレベルのアラームも復旧したものとする
+        """
+        alarms = self.alarms.filter(alarm_name__startswith=alarm_name.rsplit('-', 1)[0] + '-')
+        if state_updated_at:
+            alarms = alarms.filter(Q(state_updated_at__isnull=True) | Q(state_updated_at__lt=state_updated_at))
+        alarms.update(state=AlarmStatusModel.OK_STATE, state_updated_at=state_updated_at)
+
+    @staticmethod
+    def delete_alarms(aws_environment, region: str, alarm_names: list):
+        """
+        削除したアラームを索引から取り除く
+        """
+        AlarmStatusModel.objects.filter(
+            index__aws_environment=aws_environment,
+            index__region=region,
+            alarm_name__in=alarm_names
+        ).delete()
+
+    def resources_status(self):
+        """
+        索引からインスタンスの状態を返す
+
+        アラームが発生しているものの中で最も監視レベルが高いものをインスタンスの状態とする
+        アラームが発生していなければOK
+
+        :return:dict:
+            {
+                "EC2": {"instance_id": "status", ...},
+                "RDS": {"instance_id": "status", ...},
+                "ELB": {"instance_id": "status", ...}
+            }
+        """
+        response = {"EC2": {}, "RDS": {}, "ELB": {}}
+        for service, resource_id, level, state in self.alarms.values_list('service', 'resource_id', 'level', 'state'):
+            statuses = response.setdefault(service, {})
+            current = statuses.get(resource_id, AlarmStatusModel.LEVELS[0])
+            if state == AlarmStatusModel.ALARM_STATE and \
+                    AlarmStatusModel.LEVELS.index(level) > AlarmStatusModel.LEVELS.index(current):
+                current = level
+            statuses[resource_id] = current
+        return response
+
+    @staticmethod
+    def apply_alarm_message(alarm_message: dict):
+        """
+        CloudWatchアラームからSNSへ送られたメッセージで索引を更新する
+
+        :param alarm_message: CloudWatchアラームからSNSへ送られた生のメッセージ
+        :return: 更新したアラーム 索引の対象外であればNone
+        """
+        from backend.models.aws_environment import AwsEnvironmentModel
+
+        alarm_arn = alarm_message.get("AlarmArn")
+        aws_environment = AwsEnvironmentModel.objects.filter(aws_account_id=alarm_message["AWSAccountId"]).first()
+        # メッセージのRegionは表示名のためARNからリージョンを特定する
+        if not alarm_arn or aws_environment is None:
+            return None
+
+        region = alarm_arn.split(":")[3]  # ["arn", "aws", "cloudwatch", "region", "account_id", "alarm", "name"]
+        index = AlarmIndexModel.objects.filter(aws_environment=aws_environment, region=region).first()
+        # 一度も洗い替えていない索引は次回の参照時に作成する
+        if index is None:
+            return None
+
+        state_updated_at = datetime.strptime(alarm_message["StateChangeTime"], '%Y-%m-%dT%H:%M:%S.%f%z')
+        alarm = index.put_alarm(
+            alarm_name=alarm_message["AlarmName"],
+            service=alarm_message["Trigger"]["Namespace"].replace("AWS/", ""),
+            resource_id=alarm_message["Trigger"]["Dimensions"][0]["value"],
+            level=alarm_message["AlarmName"].rsplit('-', 1)[1],
+            state=alarm_message["NewStateValue"],
+            state_updated_at=state_updated_at
+        )
+        if alarm_message["NewStateValue"] == AlarmStatusModel.OK_STATE:
+            index.recover_metric_alarms(alarm_message["AlarmName"], state_updated_at)
+            alarm.refresh_from_db()
+        return alarm
+
+
+# アラーム状態モデルクラス
+class AlarmStatusModel(models.Model):
+
+    class Meta:
+        db_table = 'alarm_status'
+        unique_together = ('index', 'alarm_name')
+
+    # 監視レベル 後ろほど優先度が高い
+    LEVELS = ["OK", "CAUTION", "DANGER"]
+    ALARM_STATE = "ALARM"
+    OK_STATE = "OK"
+
+    index = models.ForeignKey('AlarmIndexModel', on_delete=models.CASCADE, related_name='alarms')
+    alarm_name = models.CharField(max_length=255)
+    service = models.CharField(max_length=50)
+    resource_id = models.CharField(max_length=200)
+    # CAUTION or DANGER
+    level = models.CharField(max_length=50)
+    # OK or ALARM or INSUFFICIENT_DATA
+    state = models.CharField(max_length=50)
+    state_updated_at = models.DateTimeField(null=True)
+    # アクションが無効なアラームはSNSから状態変化が通知されない
+    actions_enabled = models.BooleanField(default=True)
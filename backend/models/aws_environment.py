@@ -1,8 +1,6 @@
 from django.db import models
-from backend.models.soft_deletion_model import SoftDeletionModel
+from backend.models.soft_deletion_model import SoftDeletionModel, register_cascade
 from backend.models.tenant import TenantModel
-from django.dispatch import receiver
-from django.db.models.signals import pre_save
 
 
 # AWS環境モデルクラス
@@ -23,9 +21,5 @@ class AwsEnvironmentModel(SoftDeletionModel):
     def is_belong_to_tenant(self, tenant):
         return self.tenant_id == tenant.id
 
-    @staticmethod
-    @receiver(pre_save, sender=TenantModel)
-    def tenant_soft_delete_cascade(instance: TenantModel, **kwargs):
-        if instance.deleted:
-            for aws in instance.aws_environments.all():
-                aws.delete()
+
+register_cascade(TenantModel, AwsEnvironmentModel, "tenant")
@@ -0,0 +1,116 @@
+from django.db import models, transaction
+from django.utils import timezone
+
+
+# コマンド実行ジョブモデルクラス
+class CommandJobModel(models.Model):
+    """
+    SSMで実行したコマンドの実行状況
+
+    コマンドの送信時に作成し、バックグラウンドで確認した実行状況と出力を保持する
+    """
+
+    class Meta:
+        db_table = 'command_job'
+
+    # 実行が終了したことを示すSSMのステータス
+    FINISHED_STATUSES = ("Success", "Cancelled", "TimedOut", "Failed", "Undeliverable", "Terminated")
+
+    aws_environment = models.ForeignKey('AwsEnvironmentModel', on_delete=models.CASCADE,
+                                        related_name='command_jobs')
+    region = models.CharField(max_length=50)
+    command_id = models.CharField(max_length=36, unique=True)
+    document_name = models.CharField(max_length=128)
+    status = models.CharField(max_length=20, default="Pending")
+    # 最後にSSMに実行状況を確認した時刻
+    polled_at = models.DateTimeField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @staticmethod
+    @transaction.atomic
+    def create_job(aws_environment, command):
+        """
+        送信したコマンドの実行ジョブを作成する
+
+        :param aws_environment: AWS環境
+        :param command: 送信済みのCommand
+        :return: CommandJobModel
+        """
+        job = CommandJobModel.objects.create(
+            aws_environment=aws_environment,
+            region=command.target.region,
+            command_id=command.command_id,
+            document_name=command.document.name
+        )
+        CommandInvocationModel.objects.bulk_create([
+            CommandInvocationModel(job=job, instance_id=target.resource_id) for target in command.targets
+        ])
+        return job
+
+    def is_finished(self):
+        return self.status in self.FINISHED_STATUSES
+
+    @transaction.atomic
+    def update_invocations(self, invocations: list):
+        """
+        SSMから取得したインスタンスごとの実行状況で更新する
+
+        :param invocations: [{"instance_id": str, "status": str, "output": str}, ...]
+        """
+        current = {invocation.instance_id: invocation for invocation in self.invocations.all()}
+        for invocation in invocations:
+            model = current.get(invocation["instance_id"])
+            if model is None:
+                model = CommandInvocationModel(job=self, instance_id=invocation["instance_id"])
+                current[model.instance_id] = model
+            model.status = invocation["status"]
+            model.output = invocation["output"]
+            model.save()
+
+        self.status = self._job_status([invocation.status for invocation in current.values()])
+        self.polled_at = timezone.now()
+        self.save()
+
+    @classmethod
+    def _job_status(cls, statuses: list):
+        # 1台でも終了していなければ実行中、全台成功していれば成功、それ以外は失敗とする
+        if not statuses or all(status == "Pending" for status in statuses):
+            return "Pending"
+        if any(status not in cls.FINISHED_STATUSES for status in statuses):
+            return "InProgress"
+        if all(status == "Success" for status in statuses):
+            return "Success"
+        return "Failed"
+
+    def serialize(self):
+        return dict(
+            command_id=self.command_id,
+            region=self.region,
+            document_name=self.document_name,
+            status=self.status,
+            created_at=self.created_at,
+            polled_at=self.polled_at,
+            invocations=[invocation.serialize() for invocation in self.invocations.order_by("instance_id")]
+        )
+
+
+# インスタンスごとのコマンド実行状況モデルクラス
+class CommandInvocationModel(models.Model):
+
+    class Meta:
+        db_table = 'command_invocation'
+        unique_together = ('job', 'instance_id')
+
+    job = models.ForeignKey('CommandJobModel', on_delete=models.CASCADE, related_name='invocations')
+    instance_id = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, default="Pending")
+    output = models.TextField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def serialize(self):
+        return dict(
+            instance_id=self.instance_id,
+            status=self.status,
+            output=self.output
+        )
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+
+# 集計方法
+AGGREGATIONS = ["avg", "min", "max", "lttb"]
+
+
+def downsample(timestamps: list, values: list, max_points: int = None, aggregation: str = "avg"):
+    """
+    時系列データを指定した点数以下に間引く
+
+    avg/min/maxは系列を点数分の区間に分け、区間ごとに平均・最小・最大を取る
+    lttbはLargest-Triangle-Three-Bucketsで系列の形を保つ点を選ぶ
+
+    :param timestamps: タイムスタンプのリスト 昇順
+    :param values: 値のリスト
+    :param max_points: 最大の点数 指定がなければ間引かない
+    :param aggregation: 集計方法
+    :return: (タイムスタンプのリスト, 値のリスト)
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError("invalid aggregation: {}".format(aggregation))
+
+    if max_points is None or len(values) <= int(max_points):
+        return list(timestamps), list(values)
+
+    max_points = int(max_points)
+    if max_points < 1:
+        raise ValueError("max_points must be positive: {}".format(max_points))
+
+    if aggregation == "lttb":
+        return _lttb(timestamps, values, max_points)
+    return _aggregate(timestamps, values, max_points, aggregation)
+
+
+def _bucket_bounds(length: int, buckets: int):
+    # 区間の点数の差が1以下になるように分割する
+    return [(length * i // buckets, length * (i + 1) // buckets) for i in range(buckets)]
+
+
+def _aggregate(timestamps: list, values: list, max_points: int, aggregation: str):
+    res_timestamps = []
+    res_values = []
+    for start, end in _bucket_bounds(len(values), max_points):
+        bucket = values[start:end]
+        if aggregation == "avg":
+            # 平均は区間の先頭のタイムスタンプで代表する
+            res_timestamps.append(timestamps[start])
+            res_values.append(sum(bucket) / len(bucket))
+        else:
+            # 最小・最大は値を取った点のタイムスタンプを使う
+            pick = min if aggregation == "min" else max
+            index = pick(range(start, end), key=values.__getitem__)
+            res_timestamps.append(timestamps[index])
+            res_values.append(values[index])
+    return res_timestamps, res_values
+
+
+def _lttb(timestamps: list, values: list, max_points: int):
+    length = len(values)
+    if max_points < 3:
+        indexes = [0, length - 1][:max_points]
+        return [timestamps[i] for i in indexes], [values[i] for i in indexes]
+
+    xs = [_to_number(timestamp) for timestamp in timestamps]
+    # 先頭と末尾は必ず残し、間の点を区間ごとに1点選ぶ
+    bounds = [(1 + start, 1 + end) for start, end in _bucket_bounds(length - 2, max_points - 2)]
+    indexes = [0]
+    for i, (start, end) in enumerate(bounds):
+        # 次の区間の平均点 最後の区間では末尾の点
+        next_start, next_end = bounds[i + 1] if i + 1 < len(bounds) else (length - 1, length)
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(values[next_start:next_end]) / (next_end - next_start)
+
+        # 前に選んだ点と次の区間の平均点とで作る三角形の面積が最大になる点を選ぶ
+        prev_x = xs[indexes[-1]]
+        prev_y = values[indexes[-1]]
+        indexes.append(max(range(start, end), key=lambda j: abs(
+            (prev_x - avg_x) * (values[j] - prev_y) - (prev_x - xs[j]) * (avg_y - prev_y)
+        )))
+    indexes.append(length - 1)
+
+    return [timestamps[i] for i in indexes], [values[i] for i in indexes]
+
+
+def _to_number(timestamp):
+    return timestamp.timestamp() if isinstance(timestamp, datetime) else float(timestamp)
@@ -1,6 +1,7 @@
-from django.http import HttpRequest
-from rest_framework.request import Request
 from rest_framework import status
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
 from backend.models.event.cloudwatchevent import CloudWatchEvent
 from backend.models.eventmodel import ScheduleModel, EventModel
 from backend.externals.events import Events
@@ -8,9 +9,8 @@ from backend.models.resource.resource import Resource
 from backend.models.user import UserModel
 from backend.models.aws_environment import AwsEnvironmentModel
 from backend.models.role import RoleModel
-from enum import Enum
+from backend.models.notification_destination import NotificationDestinationModel
 import json
-import importlib
 
 
 class Event:
@@ -28,25 +28,7 @@ class Event:
             "updated_at": self.event_model.updated_at
         }
 
-    def execute(self):
-        self._execute_view(self._build_request())
-
-    def _build_request(self) -> Request:
-        request = Request(HttpRequest())
-        request.user = self._get_executor()
-        params = self._add_params()
-        if params:
-            request._full_data = params
-
-        return request
-
-    def _add_params(self):
-        return None
-
-    def _get_executor(self) -> UserModel:
-        raise NotImplementedError
-
-    def _execute_view(self, request: Request):
+    def get_executor(self) -> UserModel:
         raise NotImplementedError
 
     def identifier_for_log(self):
@@ -71,84 +53,42 @@ class Schedule(Event):
                 "params": json.loads(self.event_model.params) if self.event_model.params else None,
                 "resource": self.event_model.resource_id,
                 "service": self.event_model.service,
-                "region": self.event_model.region
+                "region": self.event_model.region,
+                "last_executed_at": self.event_model.last_executed_at,
+                "last_result": self.event_model.last_result,
+                "last_message": self.event_model.last_message
             }
         )
         return serialize
 
-    def _get_executor(self):
+    def get_executor(self):
         return UserModel.objects.get(
             tenant=self.event_model.aws_environment.tenant,
             role_id=RoleModel.SCHEDULER_ID
         )
 
-    def _execute_view(self, request: Request):
-        # イベントのアクションを特定する
-        action = Schedule.Actions[self.event_model.action]
-        request.method = action.http_method
+    def get_resource(self) -> Resource:
+        return Resource.get_service_resource(self.event_model.region, self.event_model.service,
+                                             self.event_model.resource_id)
+
+    def get_params(self) -> dict:
+        return json.loads(self.event_model.params) if self.event_model.params else dict()
 
-        view_class = getattr(importlib.import_module(action.module), action.view)
-        view_func = getattr(view_class(), action.method_name)
-        response = view_func(request, **action.params_dict(self))
+    def record_result(self, succeeded: bool, message: str = None):
+        """
+        実行結果を保存し、通知設定がされていれば通知する
+        """
+        self.event_model.last_executed_at = timezone.now()
+        self.event_model.last_result = "succeeded" if succeeded else "failed"
+        self.event_model.last_message = message
+        self.event_model.save(update_fields=["last_executed_at", "last_result", "last_message", "updated_at"])
 
-        # 通知設定がされていれば通知を行う
         if self.event_model.notification:
-            for group in self.event_model.aws_environment.notification_groups.filter(deleted=0):
-                for dest in group.destinations.filter(deleted=0):
-                    dest.result_schedule(self, status.is_success(response.status_code))
-
-    def _add_params(self):
-        return json.loads(self.event_model.params)
-
-    class Actions(Enum):
-
-        START = ("backend.views.resource_view_set", "ResourceViewSet", "post", "start", dict(
-            tenant_id="tenant_pk",
-            aws_env_id="aws_env_pk",
-            region="region_pk",
-            service="service_pk",
-            resource="pk"
-        ))
-        STOP = ("backend.views.resource_view_set", "ResourceViewSet", "post", "stop", dict(
-            tenant_id="tenant_pk",
-            aws_env_id="aws_env_pk",
-            region="region_pk",
-            service="service_pk",
-            resource="pk"
-        ))
-        REBOOT = ("backend.views.resource_view_set", "ResourceViewSet", "post", "reboot", dict(
-            tenant_id="tenant_pk",
-            aws_env_id="aws_env_pk",
-            region="region_pk",
-            service="service_pk",
-            resource="pk"
-        ))
-        BACKUP = ("backend.views.backup_view_set", "BackupViewSet", "post", "create", dict(
-            tenant_id="tenant_pk",
-            aws_env_id="aws_env_pk",
-            region="region_pk",
-            service="service_pk",
-            resource="resource_pk"
-        ))
-
-        def __new__(cls, module, view, http_method, method_name, params):
-            obj = object.__new__(cls)
-            obj.module = module
-            obj.view = view
-            obj.http_method = http_method
-            obj.method_name = method_name
-            obj.params = params
-            return obj
-
-        def params_dict(self, schedule):
-            params_dict = dict(
-                tenant_id=schedule.event_model.aws_environment.tenant.id,
-                aws_env_id=schedule.event_model.aws_environment.id,
-                region=schedule.event_model.region,
-                service=schedule.event_model.service,
-                resource=schedule.event_model.resource_id
+            NotificationDestinationModel.result_schedule_all(
+                NotificationDestinationModel.destinations_for(self.event_model.aws_environment),
+                self,
+                succeeded
             )
-            return {self.params[key]: params_dict[key] for key in self.params}
 
     def identifier_for_log(self):
         return self.event_model.name
@@ -202,7 +142,10 @@ class EventRepository:
 
     @staticmethod
     def save(event: Event):
-        # DBへの保存
+        # DBへの保存 ルールの状態も合わせて保存し、一覧の取得時にAWSへ問い合わせなくて済むようにする
+        event.event_model.schedule_expression = event.cloudwatchevent.schedule_expression
+        event.event_model.is_active = event.cloudwatchevent.is_active
+        event.event_model.rule_synced_at = timezone.now()
         event.event_model.save()
 
         # CloudWatchEventの保存
@@ -219,17 +162,34 @@ class EventRepository:
             aws_environment=aws
         ).filter(deleted=0)
 
-        # AWSからCloudWatchEventを取得
-        cloudwatchevents = Events().list_rules()
+        # ルールの状態を保存していないものと、保存してから一定時間が経過したものだけAWSから取得する
+        # NARUKOの外でルールが変更・削除された場合もここで反映する
+        names = {database.id: EventRepository.NARUKO_EVENT_NAME.format(event_id=database.id)
+                 for database in database_data_list}
+        synced_after = timezone.now() - timedelta(seconds=settings.SCHEDULE_RULE_SYNC_SECONDS)
+        unsynced = {database.id for database in database_data_list if database.is_active is None or
+                    database.rule_synced_at is None or database.rule_synced_at < synced_after}
+        unsynced_names = [names[database.id] for database in database_data_list if database.id in unsynced]
+        cloudwatchevents = Events().describe_events(unsynced_names) if unsynced_names else dict()
 
         response = []
         for database in database_data_list:
-            name = EventRepository.NARUKO_EVENT_NAME.format(event_id=database.id)
-            target_cloudwatchevent = [c for c in cloudwatchevents if c.name == name]
-            if target_cloudwatchevent:
-                response.append(Schedule(database, target_cloudwatchevent[0]))
+            name = names[database.id]
+            if database.id not in unsynced:
+                response.append(Schedule(database, CloudWatchEvent(
+                    name=name,
+                    schedule_expression=database.schedule_expression,
+                    is_active=database.is_active
+                )))
+            elif name in cloudwatchevents:
+                # 取得したルールの状態を保存する
+                database.schedule_expression = cloudwatchevents[name].schedule_expression
+                database.is_active = cloudwatchevents[name].is_active
+                database.rule_synced_at = timezone.now()
+                database.save()
+                response.append(Schedule(database, cloudwatchevents[name]))
             else:
-                # DBだけにあるデータは削除する
+                # AWSにルールがないデータは削除する
                 database.delete()
 
         return response
@@ -247,6 +207,12 @@ class EventRepository:
     def get(pk: int):
         database = EventModel.get(pk=pk)
 
-        aws = Events().describe_event(EventRepository.NARUKO_EVENT_NAME.format(event_id=database.id))
+        name = EventRepository.NARUKO_EVENT_NAME.format(event_id=database.id)
+        # ルールの状態を保存しているものはAWSに問い合わせない
+        if getattr(database, "is_active", None) is not None:
+            aws = CloudWatchEvent(name=name, schedule_expression=database.schedule_expression,
+                                  is_active=database.is_active)
+        else:
+            aws = Events().describe_event(name)
 
         return EventRepository.EVENT_CLASSES[type(database)](database, aws)
@@ -1,9 +1,7 @@
 from django.db import models
 from polymorphic.models import PolymorphicModel
-from backend.models.soft_deletion_model import SoftDeletionModel
+from backend.models.soft_deletion_model import SoftDeletionModel, register_cascade
 from backend.models.aws_environment import AwsEnvironmentModel
-from django.dispatch import receiver
-from django.db.models.signals import pre_save
 
 
 class EventModel(PolymorphicModel, SoftDeletionModel):
@@ -39,10 +37,15 @@ class ScheduleModel(EventModel, SoftDeletionModel):
     resource_id = models.CharField(max_length=200)
     service = models.CharField(max_length=50)
     region = models.CharField(max_length=50)
-
-    @staticmethod
-    @receiver(pre_save, sender=AwsEnvironmentModel)
-    def aws_soft_delete_cascade(instance: AwsEnvironmentModel, **kwargs):
-        if instance.deleted:
-            for schedule in instance.schedules.all():
-                schedule.delete()
+    # CloudWatchEventsのルールの状態 ルールの保存時に合わせて保存する
+    schedule_expression = models.CharField(max_length=200, blank=True, null=True)
+    is_active = models.BooleanField(null=True)
+    # 最後にルールの状態を保存した時刻
+    rule_synced_at = models.DateTimeField(null=True)
+    # 最後に実行した結果
+    last_executed_at = models.DateTimeField(null=True)
+    last_result = models.CharField(max_length=20, blank=True, null=True)
+    last_message = models.TextField(blank=True, null=True)
+
+
+register_cascade(AwsEnvironmentModel, ScheduleModel, "aws_environment")
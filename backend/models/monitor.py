@@ -1,5 +1,6 @@
 from enum import Enum, IntEnum
 from dateutil.parser import parse
+from backend.models.downsampling import downsample, AGGREGATIONS
 
 
 class Monitor:
@@ -48,21 +49,28 @@ class Monitor:
 
 class MonitorGraph:
 
-    def __init__(self, start_time: str, end_time: str, period: int, stat: str, metric_name: str):
+    def __init__(self, start_time: str, end_time: str, period: int, stat: str, metric_name: str,
+                 max_points: int = None, aggregation: str = "avg"):
+        if aggregation not in AGGREGATIONS:
+            raise ValueError("invalid aggregation: {}".format(aggregation))
         self.start_time = parse(start_time)
         self.end_time = parse(end_time)
         self.period = period
         self.stat = stat
         self.metric_name = metric_name
+        # レスポンスの最大の点数と間引く際の集計方法
+        self.max_points = max_points
+        self.aggregation = aggregation
         self.timestamps = []
         self.values = []
         self.service_name = ''
         self.dimensions = []
 
     def serialize(self):
+        timestamps, values = downsample(self.timestamps, self.values, self.max_points, self.aggregation)
         return {
-            "timestamps": self.timestamps,
-            "values": self.values
+            "timestamps": timestamps,
+            "values": values
         }
 
 
@@ -1,15 +1,14 @@
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import pre_save
-from django.dispatch import receiver
 from polymorphic.models import PolymorphicModel
-from backend.models.soft_deletion_model import SoftDeletionModel
+from backend.models.soft_deletion_model import SoftDeletionModel, register_cascade
 from backend.models.tenant import TenantModel
 from backend.models.resource.resource import Resource
 from backend.models.aws_environment import AwsEnvironmentModel
 from backend.externals.ses import Ses
 from backend.externals.connect import Connect
 from datetime import datetime, timedelta
+from backend.models.notification_dispatcher import NotificationDispatcher
 from botocore.exceptions import ClientError
 import phonenumbers
 
@@ -25,6 +24,12 @@ class NotificationDestinationModel(PolymorphicModel, SoftDeletionModel):
     class Meta:
         db_table = "notification_destination"
 
+    # 通知先への通知を並列に実行する
+    DISPATCHER = NotificationDispatcher(settings.NOTIFICATION_MAX_WORKERS, settings.NOTIFICATION_RATE_LIMITS)
+
+    # 通知方法
+    CHANNEL = None
+
     name = models.CharField(max_length=50)
     tenant = models.ForeignKey('TenantModel', on_delete=models.CASCADE, related_name='notification_destinations')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -41,12 +46,77 @@ class NotificationDestinationModel(PolymorphicModel, SoftDeletionModel):
             raise models.ObjectDoesNotExist("id: {}, tenant_id: {}".format(pk, tenant_pk))
         return query_set[0]
 
-    @staticmethod
-    @receiver(pre_save, sender=TenantModel)
-    def company_soft_delete_cascade(instance: TenantModel, **kwargs):
-        if instance.deleted:
-            for notification_destination in instance.notification_destinations.all():
-                notification_destination.delete()
+    @classmethod
+    def destinations_for(cls, aws: AwsEnvironmentModel) -> list:
+        """
+        AWS環境に紐づく通知グループの通知先をまとめて取得する
+        複数の通知グループに属する通知先は1つにまとめる
+
+        :param aws: AWS環境
+        :return: 通知先のリスト
+        """
+        return list(cls.all().filter(
+            notification_groups__aws_environments=aws,
+            notification_groups__deleted=0
+        ).distinct().order_by("id"))
+
+    @classmethod
+    def notify_all(cls, destinations: list, message) -> list:
+        """
+        通知先にまとめて通知する
+
+        メール通知先は一括送信し、それ以外は通知先ごとに並列に通知する
+
+        :param destinations: 通知先のリスト
+        :param message: 通知メッセージ
+        :return: 通知先ごとの処理結果メッセージのリスト
+        """
+        return cls._send_all(
+            destinations,
+            lambda emails: EmailDestination.bulk_notify(emails, message),
+            lambda dest: dest.notify(message)
+        )
+
+    @classmethod
+    def notify_digest_all(cls, destinations: list, messages: list) -> list:
+        """
+        通知先にまとめて複数の状態変化を1件の通知として通知する
+
+        :param destinations: 通知先のリスト
+        :param messages: 通知メッセージのリスト
+        :return: 通知先ごとの処理結果メッセージのリスト
+        """
+        return cls._send_all(
+            destinations,
+            lambda emails: EmailDestination.bulk_notify_digest(emails, messages),
+            lambda dest: dest.notify_digest(messages)
+        )
+
+    @classmethod
+    def result_schedule_all(cls, destinations: list, schedule, result: bool) -> list:
+        """
+        通知先にまとめてスケジュール実行結果を通知する
+
+        :param destinations: 通知先のリスト
+        :param schedule: スケジュール
+        :param result: スケジュール結果成否
+        :return: 通知先ごとの処理結果メッセージのリスト
+        """
+        return cls._send_all(
+            destinations,
+            lambda emails: EmailDestination.bulk_result_schedule(emails, schedule, result),
+            lambda dest: dest.result_schedule(schedule, result)
+        )
+
+    @classmethod
+    def _send_all(cls, destinations: list, send_emails, send) -> list:
+        emails = [dest for dest in destinations if isinstance(dest, EmailDestination)]
+        others = [dest for dest in destinations if not isinstance(dest, EmailDestination)]
+
+        results = dict(zip([dest.id for dest in others], cls.DISPATCHER.dispatch(others, send)))
+        if emails:
+            results.update(send_emails(emails))
+        return [results[dest.id] for dest in destinations]
 
     class NotificationMessage:
         """
@@ -83,6 +153,9 @@ class NotificationDestinationModel(PolymorphicModel, SoftDeletionModel):
             self.aws = AwsEnvironmentModel.objects.get(aws_account_id=alarm_message["AWSAccountId"])
             self.time = time_date.strftime('%Y{}%m{}%d{} %H{}%M{}%S{}').format("年", "月", "日", "時", "分", "秒")
 
+        def is_danger(self):
+            return self.level == self.LEVEL["DANGER"]
+
     def notify(self, message: NotificationMessage):
         """
         通知
@@ -94,6 +167,17 @@ class NotificationDestinationModel(PolymorphicModel, SoftDeletionModel):
         """
         raise NotImplementedError
 
+    def notify_digest(self, messages: list):
+        """
+        まとめ通知
+
+        複数の通知メッセージを1件の通知にまとめて各通知方法にしたがって通知を行う
+
+        :param messages: 通知メッセージのリスト
+        :return: 処理結果メッセージ
+        """
+        raise NotImplementedError
+
     def result_schedule(self, schedule, result: bool):
         """
         スケジュール結果通知
@@ -117,6 +201,9 @@ class EmailDestination(NotificationDestinationModel, SoftDeletionModel):
     class Meta:
         db_table = "email_destination"
 
+    # 通知方法 送信数の制限に使用する
+    CHANNEL = "email"
+
     address = models.EmailField(max_length=200)
 
     def notify(self, message: NotificationDestinationModel.NotificationMessage):
@@ -128,6 +215,15 @@ class EmailDestination(NotificationDestinationModel, SoftDeletionModel):
         else:
             return "SUCCESS."
 
+    def notify_digest(self, messages: list):
+        try:
+            ses = Ses(settings.SES_ADDRESS, settings.SES_ADDRESS)
+            ses.send_digest_mail(messages, self.address)
+        except ClientError as e:
+            return e.response["Error"]["Message"]
+        else:
+            return "SUCCESS."
+
     def result_schedule(self, schedule, result: bool):
         try:
             ses = Ses(settings.SES_ADDRESS, settings.SES_ADDRESS)
@@ -137,6 +233,71 @@ class EmailDestination(NotificationDestinationModel, SoftDeletionModel):
         else:
             return "SUCCESS."
 
+    @classmethod
+    def bulk_notify(cls, destinations: list, message: NotificationDestinationModel.NotificationMessage) -> dict:
+        """
+        メール通知先に一括送信で通知する
+
+        :param destinations: メール通知先のリスト
+        :param message: 通知メッセージ
+        :return: {通知先ID: 処理結果メッセージ}
+        """
+        ses = Ses(settings.SES_ADDRESS, settings.SES_ADDRESS)
+        return cls._bulk_send(
+            destinations,
+            lambda addresses: ses.send_bulk_notify_mail(message, addresses),
+            lambda dest: dest.notify(message)
+        )
+
+    @classmethod
+    def bulk_notify_digest(cls, destinations: list, messages: list) -> dict:
+        """
+        メール通知先に一括送信で複数の状態変化をまとめて通知する
+
+        :param destinations: メール通知先のリスト
+        :param messages: 通知メッセージのリスト
+        :return: {通知先ID: 処理結果メッセージ}
+        """
+        ses = Ses(settings.SES_ADDRESS, settings.SES_ADDRESS)
+        return cls._bulk_send(
+            destinations,
+            lambda addresses: ses.send_bulk_digest_mail(messages, addresses),
+            lambda dest: dest.notify_digest(messages)
+        )
+
+    @classmethod
+    def bulk_result_schedule(cls, destinations: list, schedule, result: bool) -> dict:
+        """
+        メール通知先に一括送信でスケジュール実行結果を通知する
+
+        :param destinations: メール通知先のリスト
+        :param schedule: スケジュール
+        :param result: スケジュール結果成否
+        :return: {通知先ID: 処理結果メッセージ}
+        """
+        ses = Ses(settings.SES_ADDRESS, settings.SES_ADDRESS)
+        return cls._bulk_send(
+            destinations,
+            lambda addresses: ses.send_bulk_schedule_result(schedule, addresses, result),
+            lambda dest: dest.result_schedule(schedule, result)
+        )
+
+    @classmethod
+    def _bulk_send(cls, destinations: list, send_bulk, send) -> dict:
+        results = dict()
+        for i in range(0, len(destinations), Ses.BULK_MAX_DESTINATIONS):
+            chunk = destinations[i:i + Ses.BULK_MAX_DESTINATIONS]
+            cls.DISPATCHER.throttle(cls.CHANNEL, len(chunk))
+            failed = set(send_bulk([dest.address for dest in chunk]))
+            for dest in chunk:
+                # 一括送信に失敗した宛先は1件ずつ送り直す
+                if dest.address in failed:
+                    cls.DISPATCHER.throttle(cls.CHANNEL)
+                    results[dest.id] = send(dest)
+                else:
+                    results[dest.id] = "SUCCESS."
+        return results
+
 
 class TelephoneDestination(NotificationDestinationModel, SoftDeletionModel):
     """
@@ -148,10 +309,23 @@ class TelephoneDestination(NotificationDestinationModel, SoftDeletionModel):
     class Meta:
         db_table = "telephone_destination"
 
+    # 通知方法 送信数の制限に使用する
+    CHANNEL = "telephone"
+
     phone_number = models.CharField(max_length=15)
     country_code = models.IntegerField(default=81)
 
     def notify(self, message: NotificationDestinationModel.NotificationMessage):
+        return self._call(
+            lambda connect, e164_number: connect.start_outbound_voice_contact(message, e164_number)
+        )
+
+    def notify_digest(self, messages: list):
+        return self._call(
+            lambda connect, e164_number: connect.start_outbound_voice_contact_digest(messages, e164_number)
+        )
+
+    def _call(self, start_contact):
         try:
             region = phonenumbers.COUNTRY_CODE_TO_REGION_CODE.get(self.country_code, ())[0]
             connect = Connect(settings.CONNECT_PHONE_NUMBER)
@@ -159,7 +333,7 @@ class TelephoneDestination(NotificationDestinationModel, SoftDeletionModel):
                 phonenumbers.parse(self.phone_number, region),
                 phonenumbers.PhoneNumberFormat.E164
             )
-            connect.start_outbound_voice_contact(message, e164_number)
+            start_contact(connect, e164_number)
         except ClientError as e:
             return e.response["Error"]["Message"]
         except IndexError:
@@ -170,3 +344,6 @@ class TelephoneDestination(NotificationDestinationModel, SoftDeletionModel):
     def result_schedule(self, schedule, result: bool):
         # スケジュール実行時による電話通知はしない
         pass
+
+
+register_cascade(TenantModel, NotificationDestinationModel, "tenant")
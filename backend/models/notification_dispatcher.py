@@ -0,0 +1,76 @@
+from django.db import connection
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+
+class NotificationDispatcher:
+    """
+    複数の通知先への通知を並列に実行する
+
+    通知方法ごとに1秒あたりの送信数を制限する
+    """
+
+    def __init__(self, max_workers: int, rate_limits: dict):
+        """
+        :param max_workers: 同時に通知する最大数
+        :param rate_limits: {通知方法: 1秒あたりの送信数}
+        """
+        self.max_workers = max_workers
+        self._limiters = {channel: _RateLimiter(rate) for channel, rate in rate_limits.items()}
+
+    def dispatch(self, destinations: list, send) -> list:
+        """
+        通知先ごとに通知する
+
+        :param destinations: 通知先のリスト
+        :param send: 通知先を受け取って通知し、処理結果メッセージを返す関数
+        :return: 通知先ごとの処理結果メッセージのリスト
+        """
+        if not destinations:
+            return []
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(destinations)))
+        futures = [executor.submit(self._send, destination, send) for destination in destinations]
+        executor.shutdown()
+        return [future.result() for future in futures]
+
+    def throttle(self, channel: str, count: int = 1):
+        """
+        通知方法の送信数の制限に達している場合は待機する
+
+        :param channel: 通知方法
+        :param count: 送信数
+        """
+        limiter = self._limiters.get(channel)
+        if limiter:
+            limiter.acquire(count)
+
+    def _send(self, destination, send):
+        self.throttle(destination.CHANNEL)
+        try:
+            return send(destination)
+        except Exception as e:
+            return str(e)
+        finally:
+            # ワーカースレッドに作成されたDB接続を閉じる
+            connection.close()
+
+
+class _RateLimiter:
+    """
+    呼び出しの間隔を(送信数/rate)秒以上空ける
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self, permits: int = 1):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval * permits
+        if wait > 0:
+            time.sleep(wait)
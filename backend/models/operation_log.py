@@ -1,9 +1,13 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.conf import settings
 from django.db import models
-from backend.models.soft_deletion_model import SoftDeletionModel
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from logging import getLogger
+from backend.models.operation_log_buffer import OperationLogBuffer
+from backend.models.soft_deletion_model import SoftDeletionModel, register_cascade, SET_NULL
 from backend.models.tenant import TenantModel
 from backend.models.user import UserModel
-from django.dispatch import receiver
-from django.db.models.signals import pre_save
 
 
 # 操作ログモデルクラス
@@ -11,6 +15,16 @@ class OperationLogModel(SoftDeletionModel):
 
     class Meta:
         db_table = 'operation_log'
+        indexes = [
+            models.Index(fields=['tenant', 'created_at'], name='operation_log_tenant_created'),
+            models.Index(fields=['tenant', 'executor', 'created_at'], name='operation_log_executor_created'),
+        ]
+
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    # 1ページに取得できる最大件数
+    MAX_PAGE_SIZE = 1000
 
     tenant = models.ForeignKey('TenantModel', on_delete=models.CASCADE, related_name='operation_logs')
     # 実行者
@@ -18,31 +32,81 @@ class OperationLogModel(SoftDeletionModel):
                                  null=True, blank=True)
     # 操作内容
     operation = models.CharField(max_length=200)
+    # 実行結果 succeeded/failed
+    result = models.CharField(max_length=10, default=SUCCEEDED)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def page(cls, logs, cursor: str = None, limit: int = None):
+        """
+        カーソルの次から1ページ分の操作ログを取得する
+
+        :param logs: 作成日時・IDの降順に並べた操作ログのクエリセット
+        :param cursor: 前のページの最後の操作ログを示すカーソル 指定がなければ先頭から取得する
+        :param limit: 1ページの件数 指定がなければPAGE_SIZE
+        :return: (操作ログのリスト, 次のページのカーソル 次のページがなければNone)
+        """
+        limit = int(limit) if limit else settings.REST_FRAMEWORK["PAGE_SIZE"]
+        if not 0 < limit <= cls.MAX_PAGE_SIZE:
+            raise ValueError("invalid limit: {}".format(limit))
+
+        if cursor:
+            created_at, pk = cls.decode_cursor(cursor)
+            logs = logs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        # 次のページがあるかを判定するために1件多く取得する
+        rows = list(logs[:limit + 1])
+        next_cursor = cls.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    @staticmethod
+    def iterate(logs, chunk_size: int):
+        """
+        操作ログを1件ずつ返す
+
+        全件をメモリに読み込まないよう、作成日時・IDをキーにしてchunk_size件ずつ読み込む
+
+        :param logs: 作成日時・IDの降順に並べ、created_atとidを含めてvalues()で取得する操作ログのクエリセット
+        :param chunk_size: 1回に読み込む件数
+        :return: 操作ログの辞書のジェネレーター
+        """
+        last = None
+        while True:
+            chunk = logs
+            if last:
+                chunk = logs.filter(Q(created_at__lt=last["created_at"]) |
+                                    Q(created_at=last["created_at"], id__lt=last["id"]))
+            rows = list(chunk[:chunk_size])
+            yield from rows
+            if len(rows) < chunk_size:
+                return
+            last = rows[-1]
+
     @staticmethod
-    @receiver(pre_save, sender=TenantModel)
-    def tenant_soft_delete_cascade(instance: TenantModel, **kwargs):
-        if instance.deleted:
-            for operation_log in instance.operation_logs.all():
-                operation_log.delete()
+    def encode_cursor(operation_log):
+        return urlsafe_b64encode("{}|{}".format(operation_log.created_at.isoformat(), operation_log.id)
+                                 .encode()).decode()
 
     @staticmethod
-    @receiver(pre_save, sender=UserModel)
-    def user_soft_delete_set_null(instance: UserModel, **kwargs):
-        if instance.deleted:
-            for operation_log in instance.operation_logs.all():
-                operation_log.executor = None
-                operation_log.save()
+    def decode_cursor(cursor: str):
+        created_at, pk = urlsafe_b64decode(cursor.encode()).decode().split("|")
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError("invalid cursor: {}".format(cursor))
+        return created_at, int(pk)
 
     @classmethod
     def operation_log(cls, executor_index: int=None, target_method=None, target_arg_index_list: list =None):
         """
         操作ログ書き込み
 
+        失敗した操作も記録する 書き込みはOPERATION_LOG_BUFFERでまとめて行う
+
         :param executor_index: リクエストユーザーの引数のインデックス
         :param target_method: 操作対象を取得するための関数
+            操作対象のリストを返した場合は操作対象ごとに1行ずつ書き込む
+            その場合、呼び出し元のメソッドが操作対象ごとの結果({"result": ...})のリストを返せば、それぞれの結果を記録する
         :param target_arg_index_list: 呼び出し元のメソッドの引数のインデックス
         :return:
         """
@@ -52,20 +116,54 @@ class OperationLogModel(SoftDeletionModel):
         def _decorator(func):
             def wrapper(*args, **kwargs):
                 # 実行
-                res = func(*args, **kwargs)
-
-                # 実行者を取得
-                executor = args[executor_index] if executor_index is not None else None
+                result = cls.SUCCEEDED
+                returned = None
+                try:
+                    returned = func(*args, **kwargs)
+                    return returned
+                except Exception:
+                    result = cls.FAILED
+                    raise
+                finally:
+                    # 実行者を取得
+                    executor = args[executor_index] if executor_index is not None else None
 
-                # 操作対象の情報を取得
-                target_info = target_method.__func__(*(args[index] for index in target_arg_index_list)) if target_method else None
+                    # 操作対象の情報を取得
+                    # 取得に失敗しても操作の結果や例外は変えず、操作対象なしで記録する
+                    try:
+                        target_info = target_method.__func__(*(args[index] for index in target_arg_index_list)) if target_method else None
+                    except Exception as e:
+                        getLogger(__name__).warning("failed to get operation target. operation: {} error: {}"
+                                                    .format(func.__name__, e))
+                        target_info = None
 
-                # ログ書き込み
-                cls.objects.create(
-                    tenant=executor.tenant if executor else None,
-                    executor=executor,
-                    operation=func.__name__ + (": " + target_info if target_info else "")
-                ).save()
-                return res
+                    # ログ書き込み
+                    if isinstance(target_info, list) and target_info:
+                        results = cls._target_results(returned, len(target_info), result)
+                    else:
+                        target_info, results = [target_info], [result]
+                    for target, target_result in zip(target_info, results):
+                        OPERATION_LOG_BUFFER.put(cls(
+                            tenant=executor.tenant if executor else None,
+                            executor=executor,
+                            operation=func.__name__ + (": " + target if target else ""),
+                            result=target_result
+                        ))
             return wrapper
         return _decorator
+
+    @classmethod
+    def _target_results(cls, returned, count: int, result: str) -> list:
+        # 操作対象ごとの結果が返されていればそれを使い、そうでなければ操作全体の結果を使う
+        if result == cls.SUCCEEDED and isinstance(returned, list) and len(returned) == count and \
+                all(isinstance(item, dict) and item.get("result") in (cls.SUCCEEDED, cls.FAILED) for item in returned):
+            return [item["result"] for item in returned]
+        return [result] * count
+
+
+register_cascade(TenantModel, OperationLogModel, "tenant")
+register_cascade(UserModel, OperationLogModel, "executor", SET_NULL)
+
+# 操作ログの書き込みバッファ
+OPERATION_LOG_BUFFER = OperationLogBuffer(OperationLogModel, settings.OPERATION_LOG_BUFFER_SIZE,
+                                          settings.OPERATION_LOG_FLUSH_SECONDS)
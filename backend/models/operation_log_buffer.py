@@ -0,0 +1,93 @@
+from django.db import connection, transaction
+from logging import getLogger
+import atexit
+import threading
+
+
+class OperationLogBuffer:
+    """
+    操作ログを一定件数・一定時間ためてからまとめて書き込むバッファ
+
+    最初の操作ログを受け付けてからflush_seconds秒後か、max_size件たまった時点で
+    バックグラウンドのスレッドからbulk_createでまとめて書き込む
+    呼び出し元がトランザクション中の場合はコミット時にも書き込む
+    """
+
+    def __init__(self, model, max_size: int, flush_seconds: float):
+        """
+        :param model: 操作ログのモデルクラス
+        :param max_size: まとめて書き込む最大件数
+        :param flush_seconds: 書き込むまで待つ秒数
+        """
+        self.model = model
+        self.max_size = max_size
+        self.flush_seconds = flush_seconds
+        self.logger = getLogger(__name__)
+        self._lock = threading.Lock()
+        # 書き込みは1つずつ実行する
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+        # プロセスの終了時に残っている操作ログを書き込む
+        atexit.register(self.flush)
+
+    def put(self, entry):
+        """
+        操作ログを書き込み待ちにする
+
+        :param entry: 保存前の操作ログ
+        """
+        with self._lock:
+            self._pending.append(entry)
+            if len(self._pending) >= self.max_size:
+                self._schedule(0)
+            elif self._timer is None:
+                self._schedule(self.flush_seconds)
+
+        if connection.in_atomic_block:
+            transaction.on_commit(self.flush_soon)
+
+    def flush_soon(self):
+        with self._lock:
+            if self._pending:
+                self._schedule(0)
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._flush_in_background)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        finally:
+            # タイマーのスレッドに作成されたDB接続を閉じる
+            connection.close()
+
+    def flush(self):
+        """
+        書き込み待ちの操作ログを書き込む
+        """
+        with self._flush_lock:
+            with self._lock:
+                entries, self._pending = self._pending, []
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+
+            if not entries:
+                return
+            try:
+                self.model.objects.bulk_create(entries, batch_size=self.max_size)
+            except Exception as e:
+                # まとめて書き込めない場合は1件ずつ書き込み、書き込めないものだけを破棄する
+                self.logger.warning("failed to bulk create operation logs. count: {} error: {}"
+                                    .format(len(entries), e))
+                for entry in entries:
+                    try:
+                        entry.save()
+                    except Exception as e:
+                        self.logger.error("failed to create operation log. operation: {} error: {}"
+                                          .format(entry.operation, e))
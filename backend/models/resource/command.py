@@ -3,36 +3,64 @@ from backend.models.resource.ec2 import Ec2
 
 class Command:
 
-    def __init__(self, document, target_ec2: Ec2):
-        if not isinstance(target_ec2, Ec2):
-            raise TypeError(type(target_ec2))
+    def __init__(self, document, target_ec2):
+        """
+        :param document: 実行するドキュメント
+        :param target_ec2: 実行対象のEC2 同じリージョンの複数のEC2を対象にする場合はリスト
+        """
+        targets = target_ec2 if isinstance(target_ec2, list) else [target_ec2]
+        if not targets:
+            raise ValueError("target is required.")
+        for target in targets:
+            if not isinstance(target, Ec2):
+                raise TypeError(type(target))
+        if len({target.region for target in targets}) > 1:
+            raise ValueError("targets must be in the same region.")
 
         self.document = document
-        self.target = target_ec2
+        self.targets = targets
+        self.target = targets[0]
+        self.command_id = None
+        self.status = None
         self.out_put = None
 
     def run(self, aws):
+        """
+        コマンドを送信する
+        実行の終了は待たず、実行状況はコマンドIDで確認する
+        """
         from backend.externals.ssm import Ssm
-        self.out_put = Ssm(aws_environment=aws, region=self.target.region).send_command(self)
+        self.command_id = Ssm(aws_environment=aws, region=self.target.region).send_command(self)
+        self.status = "Pending"
 
     def serialize(self):
         return dict(
+            command_id=self.command_id,
+            status=self.status,
             document=self.document.serialize(),
             target=self.target.serialize(),
+            targets=[target.serialize() for target in self.targets],
             out_put=self.out_put
         )
 
 
 class Document:
 
-    def __init__(self, name: str, parameters: list=None):
+    def __init__(self, name: str, parameters: list=None, owner: str=None, platform_types: list=None,
+                 document_version: str=None):
         self.name = name
         self.parameters = parameters if parameters else []
+        self.owner = owner
+        self.platform_types = platform_types if platform_types else []
+        self.document_version = document_version
 
     def serialize(self):
         return dict(
             name=self.name,
-            parameters=[params.serialize() for params in self.parameters]
+            parameters=[params.serialize() for params in self.parameters],
+            owner=self.owner,
+            platform_types=self.platform_types,
+            document_version=self.document_version
         )
 
 
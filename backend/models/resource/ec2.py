@@ -40,6 +40,16 @@ class Ec2(Resource):
         from backend.externals.ec2 import Ec2
         Ec2(aws, self.region).stop_instances([self.resource_id])
 
+    @staticmethod
+    def power_instances(aws, region: str, action: str, instance_ids: list):
+        """
+        同じリージョンのインスタンスを1回のAPI呼び出しでまとめて起動・停止・再起動する
+
+        :param action: start/stop/reboot
+        """
+        from backend.externals.ec2 import Ec2
+        getattr(Ec2(aws, region), "{}_instances".format(action))(instance_ids)
+
     def describe(self, aws):
         from backend.externals.ec2 import Ec2
         from backend.externals.ssm import Ssm
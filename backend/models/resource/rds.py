@@ -30,6 +30,18 @@ class Rds(resource.Resource):
         )
         return res
 
+    def start(self, aws):
+        from backend.externals.rds import Rds
+        Rds(aws, self.region).start_db_instance(self.resource_id)
+
+    def reboot(self, aws):
+        from backend.externals.rds import Rds
+        Rds(aws, self.region).reboot_db_instance(self.resource_id)
+
+    def stop(self, aws):
+        from backend.externals.rds import Rds
+        Rds(aws, self.region).stop_db_instance(self.resource_id)
+
     def describe(self, aws):
         from backend.externals.rds import Rds
         return Rds(aws, self.region).describe_instance(self.resource_id)
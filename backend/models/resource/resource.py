@@ -18,6 +18,25 @@ class Resource:
         "South America (São Paulo)": "サンパウロ",
     }
 
+    # NARUKOで取り扱うリージョン
+    REGION_IDS = [
+        "us-east-1",
+        "us-east-2",
+        "us-west-1",
+        "us-west-2",
+        "ap-south-1",
+        "ap-northeast-2",
+        "ap-southeast-1",
+        "ap-southeast-2",
+        "ap-northeast-1",
+        "ca-central-1",
+        "eu-central-1",
+        "eu-west-1",
+        "eu-west-2",
+        "eu-west-3",
+        "sa-east-1",
+    ]
+
     def __init__(self, region: str, resource_id: str):
         self.region = region
         self.resource_id = resource_id
@@ -64,6 +83,10 @@ class Resource:
 
         return [Ec2, Rds, Elb]
 
+    @staticmethod
+    def get_all_regions():
+        return list(Resource.REGION_IDS)
+
     @staticmethod
     def get_id_name():
         raise NotImplementedError
@@ -1,5 +1,68 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.deletion import ProtectedError
 from django.db.models.query import QuerySet
+from django.utils import timezone
+
+# 論理削除したときの関連する行の扱い
+CASCADE = "cascade"
+SET_NULL = "set_null"
+PROTECT = "protect"
+
+# 論理削除の連鎖 {親モデル: [(子モデル, 親を参照する外部キー名, 扱い), ...]}
+_cascades = dict()
+
+
+def register_cascade(parent, child, field_name: str, on_delete: str = CASCADE):
+    """
+    親モデルを論理削除したときの子モデルの扱いを登録する
+
+    :param parent: 親モデル
+    :param child: 子モデル
+    :param field_name: 子モデルの親を参照する外部キー名
+    :param on_delete: CASCADE 子も論理削除する SET_NULL 外部キーをNULLにする PROTECT 子があれば削除できない
+    """
+    _cascades.setdefault(parent, []).append((child, field_name, on_delete))
+
+
+def soft_delete(queryset: QuerySet):
+    """
+    クエリセットの行と、登録された連鎖にしたがって関連する行をまとめて論理削除する
+
+    1行ずつ保存せず、テーブルごとにSOFT_DELETE_BATCH_SIZE件ずつUPDATEする
+    全体を1つのトランザクションで実行する
+
+    :param queryset: 論理削除するクエリセット
+    :return: 論理削除した件数
+    """
+    with transaction.atomic():
+        return _soft_delete(queryset.model, queryset)
+
+
+def _soft_delete(model, queryset: QuerySet):
+    count = 0
+    while True:
+        # 論理削除した行は次の読み込みで対象外になる
+        ids = list(queryset.filter(deleted=0).values_list("pk", flat=True)[:settings.SOFT_DELETE_BATCH_SIZE])
+        if not ids:
+            return count
+
+        for child, field_name, on_delete in _cascades.get(model, []):
+            children = child._base_manager.filter(**{field_name + "__in": ids, "deleted": 0})
+            if on_delete == PROTECT:
+                protected = list(children[:1])
+                if protected:
+                    raise ProtectedError("{} has {}.".format(model.__name__, child.__name__), protected)
+            elif on_delete == SET_NULL:
+                children.update(**{field_name: None})
+            else:
+                _soft_delete(child, children)
+
+        values = dict(deleted=F("pk"))
+        if any(field.name == "updated_at" for field in model._meta.get_fields()):
+            values["updated_at"] = timezone.now()
+        count += model._base_manager.filter(pk__in=ids).update(**values)
 
 
 class SoftDeletionManager(models.Manager):
@@ -26,8 +89,8 @@ class SoftDeletionModel(models.Model):
         abstract = True
 
     def delete(self):
+        soft_delete(type(self)._base_manager.filter(pk=self.pk))
         self.deleted = self.pk
-        self.save()
 
     def hard_delete(self):
         super(SoftDeletionModel, self).delete()
@@ -35,9 +98,7 @@ class SoftDeletionModel(models.Model):
 
 class SoftDeletionQuerySet(QuerySet):
     def delete(self):
-        for instance in self:
-            instance.delete()
-        return len(self)
+        return soft_delete(self)
 
     def hard_delete(self):
         return super(SoftDeletionQuerySet, self).delete()
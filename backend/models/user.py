@@ -1,15 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils.translation import ugettext_lazy as _
 from backend.models.role import RoleModel
 from backend.models.tenant import TenantModel
 from backend.models.aws_environment import AwsEnvironmentModel
 from django.contrib.auth.hashers import make_password
-from backend.models.soft_deletion_model import SoftDeletionManager
+from backend.models.soft_deletion_model import SoftDeletionManager, soft_delete, register_cascade, PROTECT
 from datetime import datetime
-from django.dispatch import receiver
-from django.db.models.signals import pre_save
-from django.db.models.deletion import ProtectedError
+from django.utils.functional import cached_property
 import re
 import string
 import random
@@ -89,28 +87,30 @@ class UserModel(AbstractBaseUser, PermissionsMixin):
     PASSWORD_PATTERN = r'^(?=.*?[a-z])(?=.*?[A-Z])(?=.*?\d)(?=.*?[!-/:-@[-`{-~])[!-~]{8,200}$'
 
     def delete(self):
+        soft_delete(UserModel.objects.filter(pk=self.pk))
         self.deleted = self.pk
-        self.save()
-
-    @staticmethod
-    @receiver(pre_save, sender=TenantModel)
-    def tenant_soft_delete_cascade(instance: TenantModel, **kwargs):
-        if instance.deleted:
-            for user in instance.users.all():
-                user.delete()
-
-    @staticmethod
-    @receiver(pre_save, sender=RoleModel)
-    def role_soft_delete_protect(instance: RoleModel, **kwargs):
-        if instance.deleted:
-            users_all = instance.users.all()
-            if users_all:
-                raise ProtectedError("role has users.", users_all)
 
     @staticmethod
     def get_scheduler(tenant: TenantModel):
         return UserModel.objects.get(tenant=tenant, role=RoleModel.objects.get(id=RoleModel.SCHEDULER_ID))
 
+    @cached_property
+    def aws_environment_ids(self):
+        """
+        利用できるAWS環境のID
+
+        最初に参照したときに取得し、以降は同じものを使う
+        ユーザーはリクエストごとに取得し直すため、リクエスト中に1度だけ問い合わせる
+        :return: AWS環境のIDのfrozenset
+        """
+        return frozenset(self.aws_environments.values_list("id", flat=True))
+
+    def clear_aws_environment_ids(self):
+        """
+        紐づくAWS環境を変更した場合に取得済みのAWS環境のIDを破棄する
+        """
+        self.__dict__.pop("aws_environment_ids", None)
+
     def is_belong_to_tenant(self, tenant):
         """
         対象のテナントに属しているか
@@ -119,17 +119,18 @@ class UserModel(AbstractBaseUser, PermissionsMixin):
         """
         return self.tenant_id == tenant.id
 
+    # ロールの確認ではロールを取得しない
     def _is_master(self):
-        return self.role.id == RoleModel.MASTER_ID
+        return self.role_id == RoleModel.MASTER_ID
 
     def _is_admin(self):
-        return self.role.id == RoleModel.ADMIN_ID
+        return self.role_id == RoleModel.ADMIN_ID
 
     def _is_user(self):
-        return self.role.id == RoleModel.USER_ID
+        return self.role_id == RoleModel.USER_ID
 
     def _is_scheduler(self):
-        return self.role.id == RoleModel.SCHEDULER_ID
+        return self.role_id == RoleModel.SCHEDULER_ID
 
     def can_control_other_user(self):
         """
@@ -152,11 +153,11 @@ class UserModel(AbstractBaseUser, PermissionsMixin):
             return False
 
         # 他のテナントのユーザーは操作できない
-        if self.tenant.id != user.tenant.id:
+        if self.tenant_id != user.tenant_id:
             return False
 
         # 自分自身は操作可能
-        if self.id == user.id and self.role.id == user.role.id:
+        if self.id == user.id and self.role_id == user.role_id:
             return True
 
         # 自身がUSER権限の場合：他のユーザーは操作できない
@@ -180,11 +181,11 @@ class UserModel(AbstractBaseUser, PermissionsMixin):
             return False
 
         # 他のテナントのユーザーは操作できない
-        if self.tenant.id != user.tenant.id:
+        if self.tenant_id != user.tenant_id:
             return False
 
         # 自分自身は削除できない
-        if self.id == user.id and self.role.id == user.role.id:
+        if self.id == user.id and self.role_id == user.role_id:
             return False
 
         # 自身がUSER権限の場合：他のユーザーは削除できない
@@ -215,29 +216,36 @@ class UserModel(AbstractBaseUser, PermissionsMixin):
         """
         指定されたAWS環境に洗い替える
 
-        トランザクション管理は呼び出し元で実施する
+        現在の紐づけとの差分だけを追加・削除する
+        不正なAWS環境が含まれる場合は何も変更しない
 
         :param user: 変更対象のユーザー
-        :param aws_environments:AWS環境
+        :param aws_environments:AWS環境のクエリセット
         :return: 洗い替えに成功した場合True 不正なAWS環境を指定された場合False
         """
+        requested = dict(aws_environments.values_list("id", "tenant_id"))
+        current_ids = set(user.aws_environments.values_list("id", flat=True))
+        new_ids = set(requested)
+
         # 実行者がUSER権限の場合
         if self._is_user():
             # AWS環境の変更はできない
-            if [aws.id for aws in user.aws_environments.all()] != [aws.id for aws in aws_environments.all()]:
+            if current_ids != new_ids:
                 return False
 
-        # 現在のAWS環境との紐づけをすべて削除する
-        for aws in user.aws_environments.all():
-            user.aws_environments.remove(aws.id)
+        # ユーザーのテナントに属さないAWS環境は使用できない
+        if any(tenant_id != user.tenant_id for tenant_id in requested.values()):
+            return False
 
-        # 指定されたAWS環境すべてと紐づける
-        for aws_env in aws_environments:
-            # ユーザーのテナントに属さないAWS環境は使用できない
-            if not aws_env.is_belong_to_tenant(user.tenant):
-                return False
-            user.aws_environments.add(aws_env)
+        with transaction.atomic():
+            removed_ids = current_ids - new_ids
+            if removed_ids:
+                user.aws_environments.remove(*removed_ids)
+            added_ids = new_ids - current_ids
+            if added_ids:
+                user.aws_environments.add(*added_ids)
 
+        user.clear_aws_environment_ids()
         return True
 
     def set_password(self, raw_password):
@@ -278,7 +286,7 @@ class UserModel(AbstractBaseUser, PermissionsMixin):
         :param aws:
         :return:
         """
-        return aws in self.aws_environments.all()
+        return aws.id in self.aws_environment_ids
 
     def can_control_tenant(self):
         """
@@ -307,3 +315,7 @@ class UserModel(AbstractBaseUser, PermissionsMixin):
         :return:
         """
         return self._is_master() or self._is_admin() or self._is_scheduler()
+
+
+register_cascade(TenantModel, UserModel, "tenant")
+register_cascade(RoleModel, UserModel, "role", PROTECT)
@@ -43,4 +43,7 @@ class NotificationGroupModelDetailSerializer(serializers.ModelSerializer):
 
     def get_destinations(self, instance: NotificationGroupModel):
         from backend.serializers.notification_destination_serializer import serialize_destination
-        return [serialize_destination(dest) for dest in instance.destinations.all().filter(deleted=0)]
+        destinations = getattr(instance, NotificationGroupModel.ALIVE_DESTINATIONS, None)
+        if destinations is None:
+            destinations = instance.destinations.all().filter(deleted=0)
+        return [serialize_destination(dest) for dest in destinations]
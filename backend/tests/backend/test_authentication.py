@@ -0,0 +1,26 @@
+from django.test import TestCase
+from rest_framework.exceptions import AuthenticationFailed
+from backend.authentication import NarukoJSONWebTokenAuthentication
+from backend.models import UserModel, TenantModel, RoleModel
+
+
+class NarukoJSONWebTokenAuthenticationTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        role = RoleModel.objects.create(id=RoleModel.ADMIN_ID, role_name="test_role")
+        tenant = TenantModel.objects.create(tenant_name="test_tenant")
+        UserModel.objects.create(email="test@example.com", name="test_name", password="test_password",
+                                 tenant=tenant, role=role)
+
+    # ロールとテナントを結合してユーザーを取得する
+    def test_authenticate_credentials(self):
+        with self.assertNumQueries(1):
+            user = NarukoJSONWebTokenAuthentication().authenticate_credentials(dict(username="test@example.com"))
+            self.assertEqual(user.role.role_name, "test_role")
+            self.assertEqual(user.tenant.tenant_name, "test_tenant")
+
+    # 存在しないユーザーは認証に失敗する
+    def test_authenticate_credentials_not_found(self):
+        with self.assertRaises(AuthenticationFailed):
+            NarukoJSONWebTokenAuthentication().authenticate_credentials(dict(username="none@example.com"))
@@ -0,0 +1,200 @@
+from django.test import TestCase
+from backend.externals.aws_client_cache import AwsClientCache
+from backend.externals.external_aws_client import ExternalAwsClient
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import threading
+import time
+
+
+class AwsClientCacheTestCase(TestCase):
+
+    @staticmethod
+    def _create_cache():
+        return AwsClientCache(renew_before=timedelta(minutes=15), expire_before=timedelta(minutes=5))
+
+    # 2回目以降はキャッシュから取得する
+    def test_get_hit(self):
+        cache = self._create_cache()
+        loader = mock.Mock(return_value=("value", datetime.now(timezone.utc) + timedelta(hours=1)))
+
+        self.assertEqual("value", cache.get("key", loader))
+        self.assertEqual("value", cache.get("key", loader))
+
+        loader.assert_called_once()
+        stats = cache.stats()
+        self.assertEqual(1, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+        self.assertEqual(1, stats["entries"])
+
+    # キーごとに別々にキャッシュする
+    def test_get_per_key(self):
+        cache = self._create_cache()
+        expiration = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        self.assertEqual("value1", cache.get("key1", lambda: ("value1", expiration)))
+        self.assertEqual("value2", cache.get("key2", lambda: ("value2", expiration)))
+        self.assertEqual("value1", cache.get("key1", lambda: ("other", expiration)))
+
+    # 期限切れの場合は読み込み直す
+    def test_get_expired(self):
+        cache = self._create_cache()
+        loader = mock.Mock(side_effect=[
+            ("old", datetime.now(timezone.utc) + timedelta(minutes=4)),
+            ("new", datetime.now(timezone.utc) + timedelta(hours=1))
+        ])
+
+        self.assertEqual("old", cache.get("key", loader))
+        self.assertEqual("new", cache.get("key", loader))
+        self.assertEqual(2, cache.stats()["misses"])
+
+    # 期限が近い場合は現在の値を返しバックグラウンドで更新する
+    def test_get_renew(self):
+        cache = self._create_cache()
+        renewed = threading.Event()
+
+        def renew_loader():
+            renewed.set()
+            return "new", datetime.now(timezone.utc) + timedelta(hours=1)
+
+        cache.get("key", lambda: ("old", datetime.now(timezone.utc) + timedelta(minutes=10)))
+        self.assertEqual("old", cache.get("key", renew_loader))
+        self.assertTrue(renewed.wait(5))
+
+        # 更新の完了を待つ
+        for _ in range(50):
+            if cache.stats()["refreshes"]:
+                break
+            time.sleep(0.1)
+        self.assertEqual("new", cache.get("key", renew_loader))
+        self.assertEqual(1, cache.stats()["refreshes"])
+
+    # バックグラウンド更新に失敗しても現在の値を使い続ける
+    def test_get_renew_error(self):
+        cache = self._create_cache()
+        cache.get("key", lambda: ("old", datetime.now(timezone.utc) + timedelta(minutes=10)))
+
+        self.assertEqual("old", cache.get("key", mock.Mock(side_effect=Exception)))
+        for _ in range(50):
+            if cache.stats()["refresh_errors"]:
+                break
+            time.sleep(0.1)
+
+        self.assertEqual(1, cache.stats()["refresh_errors"])
+        self.assertEqual("old", cache.get("key", lambda: ("new", datetime.now(timezone.utc))))
+
+    # freshを指定した場合は期限が近いエントリを使わずに読み込み直す
+    def test_get_fresh(self):
+        cache = self._create_cache()
+        cache.get("key", lambda: ("old", datetime.now(timezone.utc) + timedelta(minutes=10)))
+
+        self.assertEqual("new", cache.get("key", lambda: ("new", datetime.now(timezone.utc) + timedelta(hours=1)),
+                                          fresh=True))
+        self.assertEqual("new", cache.get("key", lambda: ("other", datetime.now(timezone.utc)), fresh=True))
+
+    # 期限切れのエントリとキーのロックは取り除く
+    def test_evict_expired(self):
+        cache = self._create_cache()
+        now = datetime.now(timezone.utc)
+        cache.get("old", lambda: ("old", now + timedelta(minutes=10)))
+        cache.get("alive", lambda: ("alive", now + timedelta(hours=1)))
+
+        with mock.patch.object(cache, "_now", return_value=now + timedelta(minutes=6)):
+            cache.get("alive", mock.Mock())
+
+        stats = cache.stats()
+        self.assertEqual(1, stats["evictions"])
+        self.assertEqual(1, stats["entries"])
+        self.assertNotIn("old", cache._key_locks)
+
+    # 同時に読み込みが発生しても読み込みは1回だけ実行する
+    def test_get_single_flight(self):
+        cache = self._create_cache()
+        call_count = []
+
+        def loader():
+            call_count.append(1)
+            time.sleep(0.2)
+            return "value", datetime.now(timezone.utc) + timedelta(hours=1)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("key", loader))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(["value"] * 5, results)
+        self.assertEqual(1, len(call_count))
+
+
+class ExternalAwsClientTestCase(TestCase):
+
+    class Client(ExternalAwsClient):
+        def _service_name(self):
+            return "ec2"
+
+    def setUp(self):
+        ExternalAwsClient.CACHE.clear()
+
+    def tearDown(self):
+        ExternalAwsClient.CACHE.clear()
+
+    # 同じAWS環境・サービス・リージョンではSTSとクライアント作成を再実行しない
+    @mock.patch('backend.externals.external_aws_client.boto3')
+    def test_build_client_cached(self, mock_boto3):
+        sts = mock_boto3.client.return_value
+        sts.assume_role.return_value = dict(Credentials=dict(
+            AccessKeyId="key",
+            SecretAccessKey="secret",
+            SessionToken="token",
+            Expiration=datetime.now(timezone.utc) + timedelta(hours=1)
+        ))
+        ExternalAwsClient._sts_client = None
+        aws = mock.Mock(aws_account_id="123456789012", aws_role="role", aws_external_id="external")
+
+        client1 = self.Client(aws, "ap-northeast-1")
+        client2 = self.Client(aws, "ap-northeast-1")
+        self.Client(aws, "us-east-1")
+
+        self.assertEqual(client1.client, client2.client)
+        sts.assume_role.assert_called_once_with(
+            RoleArn="arn:aws:iam::123456789012:role/role",
+            RoleSessionName="session",
+            ExternalId="external"
+        )
+        mock_boto3.Session.assert_called_once_with(
+            aws_access_key_id="key",
+            aws_secret_access_key="secret",
+            aws_session_token="token"
+        )
+        self.assertEqual(2, mock_boto3.Session.return_value.client.call_count)
+        ExternalAwsClient._sts_client = None
+
+    # クライアントの更新は期限が近い認証情報を使わず、STSから取得し直した認証情報で行う
+    @mock.patch('backend.externals.external_aws_client.boto3')
+    def test_build_client_renew(self, mock_boto3):
+        sts = mock_boto3.client.return_value
+        now = datetime.now(timezone.utc)
+        sts.assume_role.side_effect = [dict(Credentials=dict(
+            AccessKeyId="key",
+            SecretAccessKey="secret",
+            SessionToken="token",
+            Expiration=expiration
+        )) for expiration in [now + timedelta(minutes=10), now + timedelta(hours=1)]]
+        ExternalAwsClient._sts_client = None
+        aws = mock.Mock(aws_account_id="123456789012", aws_role="role", aws_external_id="external")
+
+        self.Client(aws, "ap-northeast-1")
+        # 期限が近いためバックグラウンドで更新される
+        self.Client(aws, "ap-northeast-1")
+        for _ in range(50):
+            if ExternalAwsClient.cache_stats()["refreshes"]:
+                break
+            time.sleep(0.1)
+
+        self.assertEqual(1, ExternalAwsClient.cache_stats()["refreshes"])
+        self.assertEqual(2, sts.assume_role.call_count)
+        client_key = ("123456789012", "role", "external", "ec2", "ap-northeast-1")
+        self.assertEqual(now + timedelta(hours=1), ExternalAwsClient.CACHE._entries[client_key][1])
+        ExternalAwsClient._sts_client = None
@@ -0,0 +1,216 @@
+from django.test import TestCase, override_settings
+from botocore.exceptions import ClientError
+from backend.externals.cloudwatch import CloudWatch
+from backend.models import Resource
+from backend.models.monitor import MonitorGraph
+from datetime import datetime, timezone
+from unittest import mock
+
+
+class CloudWatchTestCase(TestCase):
+
+    @staticmethod
+    def _create_cloudwatch():
+        with mock.patch('backend.externals.external_aws_client.ExternalAwsClient._build_client'):
+            cloudwatch = CloudWatch(aws_environment=mock.Mock(), region="ap-northeast-1")
+        cloudwatch.client = mock.Mock()
+        cloudwatch.aws = mock.Mock(aws_account_id="123456789012")
+        return cloudwatch
+
+    @staticmethod
+    def _metric_alarm(instance_id, level, state):
+        return dict(
+            AlarmName="NARUKO-EC2-{}-CPUUtilization-{}".format(instance_id, level),
+            Namespace="AWS/EC2",
+            Dimensions=[dict(Name="InstanceId", Value=instance_id)],
+            StateValue=state
+        )
+
+    # 索引が古い場合はCloudWatchの全ページから洗い替える
+    @mock.patch('backend.externals.cloudwatch.AlarmIndexModel')
+    def test_get_resources_status_reconcile(self, mock_index_model):
+        cloudwatch = self._create_cloudwatch()
+        index = mock_index_model.get_index.return_value
+        index.needs_reconcile.return_value = True
+        cloudwatch.client.describe_alarms.side_effect = [
+            dict(MetricAlarms=[self._metric_alarm("i-1", "CAUTION", "ALARM")], NextToken="token"),
+            dict(MetricAlarms=[self._metric_alarm("i-2", "DANGER", "OK")])
+        ]
+
+        res = cloudwatch.get_resources_status()
+
+        self.assertEqual(res, index.resources_status.return_value)
+        cloudwatch.client.describe_alarms.assert_called_with(AlarmNamePrefix="NARUKO-", NextToken="token")
+        alarms = index.reconcile.call_args[0][0]
+        self.assertEqual([(alarm["service"], alarm["resource_id"], alarm["level"], alarm["state"])
+                          for alarm in alarms],
+                         [("EC2", "i-1", "CAUTION", "ALARM"), ("EC2", "i-2", "DANGER", "OK")])
+
+    # 索引が新しい場合はCloudWatchを参照しない
+    @mock.patch('backend.externals.cloudwatch.AlarmIndexModel')
+    def test_get_resources_status_indexed(self, mock_index_model):
+        cloudwatch = self._create_cloudwatch()
+        index = mock_index_model.get_index.return_value
+        index.needs_reconcile.return_value = False
+
+        res = cloudwatch.get_resources_status()
+
+        self.assertEqual(res, index.resources_status.return_value)
+        cloudwatch.client.describe_alarms.assert_not_called()
+        index.reconcile.assert_not_called()
+
+    # アラームの一括削除は100件ごとに分割し、監視設定のアラームは分割しない
+    @mock.patch('backend.externals.cloudwatch.AlarmIndexModel')
+    def test_delete_monitor_alarms(self, mock_index_model):
+        cloudwatch = self._create_cloudwatch()
+        monitors = [(Resource.get_service_resource("ap-northeast-1", "ec2", "i-{}".format(i)), "CPUUtilization")
+                    for i in range(51)]
+        cloudwatch.client.describe_alarms.side_effect = lambda **params: dict(
+            MetricAlarms=[dict(AlarmName=name) for name in params["AlarmNames"]])
+        cloudwatch.client.delete_alarms.side_effect = [None, Exception("error")]
+
+        res = cloudwatch.delete_monitor_alarms(monitors)
+
+        calls = cloudwatch.client.delete_alarms.call_args_list
+        self.assertEqual([len(call[1]["AlarmNames"]) for call in calls], [100, 2])
+        self.assertEqual(calls[1][1]["AlarmNames"], ["NARUKO-EC2-i-50-CPUUtilization-CAUTION",
+                                                     "NARUKO-EC2-i-50-CPUUtilization-DANGER"])
+        self.assertEqual(res[:50], [None] * 50)
+        self.assertEqual(str(res[50]), "error")
+        mock_index_model.delete_alarms.assert_called_once()
+
+    # 存在しないアラームは削除の対象から除き、同じ呼び出しの他の監視設定を失敗させない
+    @mock.patch('backend.externals.cloudwatch.AlarmIndexModel')
+    def test_delete_monitor_alarms_missing(self, mock_index_model):
+        cloudwatch = self._create_cloudwatch()
+        monitors = [(Resource.get_service_resource("ap-northeast-1", "ec2", "i-{}".format(i)), "CPUUtilization")
+                    for i in range(3)]
+        cloudwatch.client.describe_alarms.return_value = dict(MetricAlarms=[
+            dict(AlarmName="NARUKO-EC2-i-0-CPUUtilization-CAUTION"),
+            dict(AlarmName="NARUKO-EC2-i-0-CPUUtilization-DANGER"),
+            dict(AlarmName="NARUKO-EC2-i-2-CPUUtilization-DANGER")
+        ])
+
+        res = cloudwatch.delete_monitor_alarms(monitors)
+
+        self.assertEqual(res, [None] * 3)
+        cloudwatch.client.delete_alarms.assert_called_once_with(AlarmNames=[
+            "NARUKO-EC2-i-0-CPUUtilization-CAUTION",
+            "NARUKO-EC2-i-0-CPUUtilization-DANGER",
+            "NARUKO-EC2-i-2-CPUUtilization-DANGER"
+        ])
+        # 索引からは存在しないアラームも取り除く
+        self.assertEqual(len(mock_index_model.delete_alarms.call_args[0][2]), 6)
+
+    # スロットリングされた場合は再実行する
+    @override_settings(CLOUDWATCH_THROTTLING_MAX_RETRIES=2, CLOUDWATCH_THROTTLING_BACKOFF_SECONDS=0)
+    def test_call_with_retry(self):
+        cloudwatch = self._create_cloudwatch()
+        throttling = ClientError({"Error": {"Code": "Throttling"}}, "PutMetricAlarm")
+        method = mock.Mock(side_effect=[throttling, throttling, "result"])
+
+        self.assertEqual(cloudwatch._call_with_retry(method, AlarmName="name"), "result")
+        self.assertEqual(method.call_count, 3)
+
+        # 再実行回数を超えた場合とスロットリング以外のエラーは例外を送出する
+        method = mock.Mock(side_effect=[throttling, throttling, throttling])
+        with self.assertRaises(ClientError):
+            cloudwatch._call_with_retry(method)
+        self.assertEqual(method.call_count, 3)
+
+        method = mock.Mock(side_effect=ClientError({"Error": {"Code": "ValidationError"}}, "PutMetricAlarm"))
+        with self.assertRaises(ClientError):
+            cloudwatch._call_with_retry(method)
+        method.assert_called_once()
+
+    # 複数リソースの監視設定を全ページから1回のスキャンで取得する
+    def test_describe_resources_monitors(self):
+        cloudwatch = self._create_cloudwatch()
+        alarm1 = dict(self._metric_alarm("i-1", "CAUTION", "ALARM"), MetricName="CPUUtilization", Threshold=60,
+                      ActionsEnabled=True, Period=300, EvaluationPeriods=1, Statistic="Average")
+        alarm2 = dict(alarm1, AlarmName="NARUKO-EC2-i-1-CPUUtilization-DANGER", StateValue="OK", Threshold=90)
+        alarm3 = dict(self._metric_alarm("i-9", "CAUTION", "ALARM"), MetricName="CPUUtilization", Threshold=60)
+        cloudwatch.client.describe_alarms.side_effect = [
+            dict(MetricAlarms=[alarm1, alarm3], NextToken="token"),
+            dict(MetricAlarms=[alarm2])
+        ]
+        resources = [Resource.get_service_resource("ap-northeast-1", "ec2", "i-1"),
+                     Resource.get_service_resource("ap-northeast-1", "ec2", "i-2")]
+
+        res = cloudwatch.describe_resources_monitors(resources)
+
+        cloudwatch.client.describe_alarms.assert_any_call(AlarmNamePrefix="NARUKO-EC2-")
+        self.assertEqual(cloudwatch.client.describe_alarms.call_count, 2)
+        self.assertEqual(set(res.keys()), {("EC2", "i-1"), ("EC2", "i-2")})
+        monitors = {monitor.metric.name: monitor.serialize() for monitor in res[("EC2", "i-1")]}
+        self.assertEqual(monitors["CPUUtilization"]["values"], {"caution": 60, "danger": 90})
+        self.assertEqual(monitors["CPUUtilization"]["status"], "CAUTION")
+        self.assertTrue(all(monitor.status.name == "UNSET" for monitor in res[("EC2", "i-2")]))
+
+    # グラフデータは取得済みの区間をキャッシュから返す
+    def test_get_chart_cached(self):
+        CloudWatch.SERIES_CACHE.clear()
+        cloudwatch = self._create_cloudwatch()
+        cloudwatch.client.get_metric_data.return_value = dict(MetricDataResults=[dict(
+            Timestamps=[datetime(2019, 1, 1, 0, 0, tzinfo=timezone.utc),
+                        datetime(2019, 1, 1, 0, 5, tzinfo=timezone.utc)],
+            Values=[1.0, 2.0]
+        )])
+
+        def create_graph():
+            graph = MonitorGraph("2019-01-01T00:00:00Z", "2019-01-01T00:10:00Z", 300, "Average", "CPUUtilization")
+            graph.service_name = "AWS/EC2"
+            graph.dimensions.append(dict(Name="InstanceId", Value="i-1"))
+            return graph
+
+        graph1 = cloudwatch.get_chart(create_graph())
+        graph2 = cloudwatch.get_chart(create_graph())
+
+        cloudwatch.client.get_metric_data.assert_called_once()
+        self.assertEqual(graph1.serialize(), graph2.serialize())
+        self.assertEqual(graph2.timestamps[1], datetime(2019, 1, 1, 0, 5, tzinfo=timezone.utc))
+        self.assertEqual(graph2.values, [1.0, 2.0])
+        CloudWatch.SERIES_CACHE.clear()
+
+    # 複数メトリクスのグラフデータは500件ごとに分割して取得し、Idで振り分ける
+    def test_get_multi_charts(self):
+        cloudwatch = self._create_cloudwatch()
+        queries = [dict(metric_name="CPUUtilization", dimensions=[dict(Name="InstanceId", Value="i-{}".format(i))])
+                   for i in range(501)]
+        cloudwatch.client.get_metric_data.side_effect = [
+            dict(MetricDataResults=[dict(Id="request1", Timestamps=[1], Values=[1.0]),
+                                    dict(Id="request0", Timestamps=[1], Values=[0.0])], NextToken="token"),
+            dict(MetricDataResults=[dict(Id="request0", Timestamps=[2], Values=[0.5])]),
+            dict(MetricDataResults=[dict(Id="request500", Timestamps=[1], Values=[500.0])])
+        ]
+
+        res = cloudwatch.get_multi_charts("AWS/EC2", 300, "Average", "start", "end", queries)
+
+        calls = cloudwatch.client.get_metric_data.call_args_list
+        self.assertEqual([len(call[1]["MetricDataQueries"]) for call in calls], [500, 500, 1])
+        self.assertEqual(calls[1][1]["NextToken"], "token")
+        self.assertEqual(calls[2][1]["MetricDataQueries"][0]["Id"], "request500")
+        self.assertEqual(len(res), 501)
+        self.assertEqual(res[0]["values"], [0.0, 0.5])
+        self.assertEqual(res[1]["values"], [1.0])
+        self.assertEqual(res[2]["values"], [])
+        self.assertEqual(res[500]["config"], queries[500])
+
+    # 複数リソース・メトリクスのグラフデータを1回のget_metric_dataで取得する
+    def test_get_charts(self):
+        cloudwatch = self._create_cloudwatch()
+        graphs = []
+        for resource_id, metric_name in [("i-1", "CPUUtilization"), ("i-2", "NetworkIn")]:
+            graph = MonitorGraph("2019-01-01T00:00:00Z", "2019-01-01T00:10:00Z", 300, "Average", metric_name)
+            graph.service_name = "AWS/EC2"
+            graph.dimensions.append(dict(Name="InstanceId", Value=resource_id))
+            graphs.append(graph)
+        cloudwatch.client.get_metric_data.return_value = dict(MetricDataResults=[
+            dict(Id="request1", Timestamps=[2], Values=[2.0]),
+            dict(Id="request0", Timestamps=[1], Values=[1.0])
+        ])
+
+        res = cloudwatch.get_charts(graphs)
+
+        cloudwatch.client.get_metric_data.assert_called_once()
+        self.assertEqual([graph.values for graph in res], [[1.0], [2.0]])
@@ -0,0 +1,37 @@
+from botocore.exceptions import ClientError
+from django.test import TestCase
+from backend.externals.events import Events
+from unittest import mock
+
+
+class EventsTestCase(TestCase):
+
+    @staticmethod
+    def _rule(name):
+        return dict(Name=name, ScheduleExpression="cron(0 * * * ? *)", State="ENABLED")
+
+    # 指定したルールだけを取得し、存在しないルールは含めない
+    @mock.patch("backend.externals.events.boto3")
+    def test_describe_events(self, mock_boto3):
+        client = mock_boto3.client.return_value
+        client.describe_rule.side_effect = [
+            self._rule("NARUKO-1"),
+            ClientError(dict(Error=dict(Code="ResourceNotFoundException", Message="not found")), "DescribeRule"),
+            self._rule("NARUKO-3"),
+        ]
+
+        events = Events().describe_events(["NARUKO-1", "NARUKO-2", "NARUKO-3"])
+
+        self.assertEqual(sorted(events), ["NARUKO-1", "NARUKO-3"])
+        self.assertTrue(events["NARUKO-1"].is_active)
+        client.list_rules.assert_not_called()
+
+    # ルールがない以外のエラーはそのまま送出する
+    @mock.patch("backend.externals.events.boto3")
+    def test_describe_events_error(self, mock_boto3):
+        client = mock_boto3.client.return_value
+        client.describe_rule.side_effect = ClientError(
+            dict(Error=dict(Code="ThrottlingException", Message="rate exceeded")), "DescribeRule")
+
+        with self.assertRaises(ClientError):
+            Events().describe_events(["NARUKO-1"])
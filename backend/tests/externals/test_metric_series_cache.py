@@ -0,0 +1,93 @@
+from django.test import TestCase
+from backend.externals.metric_series_cache import MetricSeriesCache
+from unittest import mock
+
+
+class MetricSeriesCacheTestCase(TestCase):
+
+    NOW = 100000
+
+    def setUp(self):
+        self.cache = MetricSeriesCache(ttl=3600, latest_ttl=60, settle_seconds=600, max_series=2)
+        self.cache._now = mock.Mock(return_value=self.NOW)
+
+    # 60秒ごとに値が(タイムスタンプ/60)のデータポイントを返すloader
+    @staticmethod
+    def _loader():
+        def load(start, end):
+            timestamps = list(range(start, end, 60))
+            return timestamps, [float(timestamp // 60) for timestamp in timestamps]
+        return mock.Mock(side_effect=load)
+
+    # 初回はCloudWatchから読み込み、2回目はキャッシュから返す
+    def test_get_hit(self):
+        loader = self._loader()
+
+        res1 = self.cache.get("key", 60000, 63600, 60, loader)
+        res2 = self.cache.get("key", 60000, 63600, 60, loader)
+
+        self.assertEqual(res1, res2)
+        self.assertEqual(res1[0], list(range(60000, 63600, 60)))
+        loader.assert_called_once_with(60000, 63600)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    # 要求された区間に絞って返す
+    def test_get_sub_window(self):
+        loader = self._loader()
+        self.cache.get("key", 60000, 63600, 60, loader)
+
+        timestamps, values = self.cache.get("key", 60030, 60200, 60, loader)
+
+        self.assertEqual(timestamps, [60060, 60120, 60180])
+        self.assertEqual(values, [1001.0, 1002.0, 1003.0])
+        loader.assert_called_once()
+
+    # 先頭と末尾の不足している区間だけを読み込む
+    def test_get_head_and_tail(self):
+        loader = self._loader()
+        self.cache.get("key", 60000, 63600, 60, loader)
+
+        timestamps, _ = self.cache.get("key", 56400, 67200, 60, loader)
+
+        self.assertEqual(timestamps, list(range(56400, 67200, 60)))
+        self.assertEqual(loader.call_args_list[1:], [mock.call(56400, 60000), mock.call(63600, 67200)])
+        self.assertEqual(self.cache.stats()["partial_hits"], 1)
+
+    # 直近の区間は期限内であればキャッシュを使い、期限が切れたら読み込み直す
+    def test_get_latest(self):
+        loader = self._loader()
+        self.cache.get("key", self.NOW - 3600, self.NOW, 60, loader)
+        stable_end = (self.NOW - 600) // 60 * 60
+
+        self.cache._now.return_value = self.NOW + 30
+        self.cache.get("key", self.NOW - 3600, self.NOW, 60, loader)
+        self.assertEqual(loader.call_count, 1)
+
+        self.cache._now.return_value = self.NOW + 120
+        self.cache.get("key", self.NOW - 3600, self.NOW + 120, 60, loader)
+        self.assertEqual(loader.call_args, mock.call(stable_end, -(-(self.NOW + 120) // 60) * 60))
+
+    # 取得済みの区間とつながらない場合は作り直す
+    def test_get_disjoint(self):
+        loader = self._loader()
+        self.cache.get("key", 60000, 63600, 60, loader)
+
+        timestamps, _ = self.cache.get("key", 30000, 33600, 60, loader)
+
+        self.assertEqual(timestamps, list(range(30000, 33600, 60)))
+        loader.assert_called_with(30000, 33600)
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    # 保持する系列の最大数を超えた場合は最も参照されていない系列から破棄する
+    def test_get_evict(self):
+        loader = self._loader()
+        self.cache.get("key1", 60000, 63600, 60, loader)
+        self.cache.get("key2", 60000, 63600, 60, loader)
+        self.cache.get("key1", 60000, 63600, 60, loader)
+        self.cache.get("key3", 60000, 63600, 60, loader)
+
+        self.assertEqual(self.cache.stats()["series"], 2)
+        self.cache.get("key1", 60000, 63600, 60, loader)
+        self.assertEqual(loader.call_count, 3)
+        self.cache.get("key2", 60000, 63600, 60, loader)
+        self.assertEqual(loader.call_count, 4)
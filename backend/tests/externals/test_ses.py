@@ -0,0 +1,95 @@
+from botocore.exceptions import ClientError
+from django.test import TestCase
+from backend.externals import ses as ses_module
+from backend.externals.ses import Ses
+from unittest import mock
+import json
+
+
+class SesTestCase(TestCase):
+
+    def setUp(self):
+        ses_module._templates.clear()
+
+    def tearDown(self):
+        ses_module._templates.clear()
+
+    @staticmethod
+    @mock.patch('backend.externals.ses.get_shared_client')
+    def _create_ses(mock_get_shared_client):
+        return Ses("source@example.com", "reply@example.com")
+
+    # str.format形式をSESのテンプレート形式に変換する
+    def test_to_template(self):
+        self.assertEqual(Ses.to_template("{name} の実行に{result}しました。"), "{{{name}}} の実行に{{{result}}}しました。")
+
+    # まとめ通知は件数と状態変化ごとの本文を埋め込む
+    @mock.patch('backend.externals.ses.settings')
+    def test_build_digest_data(self, mock_settings):
+        mock_settings.NOTIFY_TEXT_SUBJECT = "件名"
+        mock_settings.NOTIFY_TEXT_MESSAGE = "{resource_id} {level}"
+        messages = []
+        for resource_id, level in [("i-1", "危険"), ("i-2", "警告")]:
+            message = mock.Mock(level=level)
+            message.resource.resource_id = resource_id
+            messages.append(message)
+
+        data = Ses.build_digest_data(messages)
+
+        self.assertEqual(data, dict(subject="件名", count=2, summary="i-1 危険\n\ni-2 警告"))
+        self.assertEqual(Ses.DIGEST_SUBJECT.format(**data), "件名 (2件)")
+
+    # テンプレートを1度だけ登録し、宛先をまとめて送信する
+    def test_send_bulk_templated_mail(self):
+        ses = self._create_ses()
+        ses.client.send_bulk_templated_email.return_value = dict(Status=[
+            dict(Status="Success", MessageId="1"),
+            dict(Status="MessageRejected", Error="rejected"),
+        ])
+
+        failed1 = ses.send_bulk_templated_mail("件名 {name}", "本文 {result}", dict(name="test", result=1),
+                                               ["a@example.com", "b@example.com"])
+        failed2 = ses.send_bulk_templated_mail("件名 {name}", "本文 {result}", dict(name="test", result=2),
+                                               ["c@example.com"])
+
+        self.assertEqual(failed1, ["b@example.com"])
+        self.assertEqual(failed2, [])
+        ses.client.create_template.assert_called_once()
+        template = ses.client.create_template.call_args[1]["Template"]
+        self.assertEqual(template["SubjectPart"], "件名 {{{name}}}")
+        self.assertEqual(template["TextPart"], "本文 {{{result}}}")
+
+        kwargs = ses.client.send_bulk_templated_email.call_args_list[0][1]
+        self.assertEqual(kwargs["Template"], template["TemplateName"])
+        self.assertEqual(json.loads(kwargs["DefaultTemplateData"]), dict(name="test", result="1"))
+        self.assertEqual(kwargs["Destinations"], [
+            dict(Destination=dict(ToAddresses=["a@example.com"])),
+            dict(Destination=dict(ToAddresses=["b@example.com"]))
+        ])
+
+    # 登録済みのテンプレートはそのまま使用する
+    def test_send_bulk_templated_mail_template_exists(self):
+        ses = self._create_ses()
+        ses.client.create_template.side_effect = ClientError(
+            dict(Error=dict(Code="AlreadyExists", Message="exists")), "CreateTemplate")
+        ses.client.send_bulk_templated_email.return_value = dict(Status=[dict(Status="Success")])
+
+        self.assertEqual(ses.send_bulk_templated_mail("件名", "本文", dict(), ["a@example.com"]), [])
+
+    # 一括送信自体に失敗した場合は全ての宛先を失敗として返す
+    def test_send_bulk_templated_mail_error(self):
+        ses = self._create_ses()
+        ses.client.send_bulk_templated_email.side_effect = ClientError(
+            dict(Error=dict(Code="Throttling", Message="throttling")), "SendBulkTemplatedEmail")
+
+        self.assertEqual(ses.send_bulk_templated_mail("件名", "本文", dict(), ["a@example.com", "b@example.com"]),
+                         ["a@example.com", "b@example.com"])
+
+    # 一度に指定できる宛先数を超える場合はエラー
+    def test_send_bulk_templated_mail_too_many_addresses(self):
+        ses = self._create_ses()
+
+        with self.assertRaises(ValueError):
+            ses.send_bulk_templated_mail("件名", "本文", dict(),
+                                         ["{}@example.com".format(i) for i in range(Ses.BULK_MAX_DESTINATIONS + 1)])
+        ses.client.send_bulk_templated_email.assert_not_called()
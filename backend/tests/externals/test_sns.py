@@ -0,0 +1,96 @@
+from Crypto.Hash import SHA, SHA256
+from Crypto.PublicKey import RSA
+from Crypto.Signature import PKCS1_v1_5
+from base64 import standard_b64encode
+from django.core.cache import cache
+from django.test import TestCase
+from backend.externals import sns as sns_module
+from backend.externals.sns import Sns
+from unittest import mock
+
+
+class SnsTestCase(TestCase):
+
+    CERT_URL = "https://sns.ap-northeast-1.amazonaws.com/SimpleNotificationService-test.pem"
+    KEY = RSA.generate(1024)
+
+    def setUp(self):
+        cache.clear()
+        sns_module._public_keys.clear()
+
+    def tearDown(self):
+        cache.clear()
+        sns_module._public_keys.clear()
+
+    def _notification(self, signature_version="1"):
+        data = dict(
+            Type="Notification",
+            MessageId="message_id",
+            TopicArn="arn:aws:sns:ap-northeast-1:123456789012:test",
+            Message="message",
+            Timestamp="2018-12-01T00:00:00.000Z",
+            SignatureVersion=signature_version,
+            SigningCertURL=self.CERT_URL
+        )
+        sign_input = "".join("{}\n{}\n".format(key, data[key])
+                             for key in ["Message", "MessageId", "Timestamp", "TopicArn", "Type"])
+        hash_module = SHA256 if signature_version == "2" else SHA
+        signature = PKCS1_v1_5.new(self.KEY).sign(hash_module.new(sign_input.encode("utf8")))
+        data["Signature"] = standard_b64encode(signature).decode()
+        return data
+
+    def _patch_certificate(self):
+        return mock.patch.object(Sns, "extract_public_key",
+                                 return_value=self.KEY.publickey().exportKey("DER"))
+
+    # 署名バージョン1・2の署名を検証でき、証明書は1度だけ取得する
+    @mock.patch("backend.externals.sns.requests")
+    def test_verify_notification(self, mock_requests):
+        with self._patch_certificate():
+            self.assertTrue(Sns.verify_notification(self._notification("1")))
+            self.assertTrue(Sns.verify_notification(self._notification("2")))
+
+        mock_requests.get.assert_called_once_with(self.CERT_URL, timeout=5)
+
+    # 署名が一致しない場合は検証に失敗する
+    @mock.patch("backend.externals.sns.requests")
+    def test_verify_notification_invalid_signature(self, mock_requests):
+        data = self._notification("2")
+        data["Message"] = "tampered"
+
+        with self._patch_certificate():
+            self.assertFalse(Sns.verify_notification(data))
+
+    # 未知の署名バージョンは検証に失敗する
+    @mock.patch("backend.externals.sns.requests")
+    def test_verify_notification_unknown_version(self, mock_requests):
+        self.assertFalse(Sns.verify_notification(self._notification("3")))
+        mock_requests.get.assert_not_called()
+
+    # SNS以外から配布された証明書は取得しない
+    @mock.patch("backend.externals.sns.requests")
+    def test_verify_notification_invalid_cert_url(self, mock_requests):
+        for cert_url in ["https://example.com/cert.pem",
+                         "http://sns.ap-northeast-1.amazonaws.com/cert.pem",
+                         "https://sns.ap-northeast-1.amazonaws.com.example.com/cert.pem",
+                         "https://sns.ap-northeast-1.amazonaws.com/cert.txt"]:
+            data = self._notification()
+            data["SigningCertURL"] = cert_url
+            self.assertFalse(Sns.verify_notification(data))
+
+        mock_requests.get.assert_not_called()
+
+    # プロセス内の公開鍵が期限切れの場合は共有キャッシュから読み込む
+    @mock.patch("backend.externals.sns.time")
+    @mock.patch("backend.externals.sns.requests")
+    def test_get_signing_public_key_expired(self, mock_requests, mock_time):
+        mock_time.time.return_value = 1000
+        with self._patch_certificate():
+            Sns.get_signing_public_key(self.CERT_URL)
+
+            mock_time.time.return_value = 1000 + 86400
+            public_key = Sns.get_signing_public_key(self.CERT_URL)
+
+        self.assertEqual(public_key, self.KEY.publickey())
+        self.assertEqual(sns_module._public_keys[self.CERT_URL][1], 1000 + 86400 * 2)
+        mock_requests.get.assert_called_once()
@@ -0,0 +1,166 @@
+from django.core.cache import cache
+from django.test import TestCase
+from backend.externals.ssm import Ssm
+from backend.models.resource.command import Command, Document, Parameter
+from backend.models.resource.ec2 import Ec2
+from unittest import mock
+
+
+class SsmTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    @staticmethod
+    def _create_ssm():
+        with mock.patch('backend.externals.external_aws_client.ExternalAwsClient._build_client'):
+            ssm = Ssm(aws_environment=mock.Mock(aws_account_id="123456789012"), region="ap-northeast-1")
+        ssm.client = mock.Mock()
+        return ssm
+
+    @staticmethod
+    def _describe_response(version):
+        return dict(Document=dict(
+            Name="AWS-RunShellScript",
+            Owner="Amazon",
+            PlatformTypes=["Linux"],
+            DocumentVersion=version,
+            Parameters=[dict(Name="commands", Description="commands")]
+        ))
+
+    # ドキュメント一覧は全ページを取得してキャッシュする
+    def test_get_document_catalog(self):
+        ssm = self._create_ssm()
+        ssm.client.list_documents.side_effect = [
+            dict(DocumentIdentifiers=[dict(Name="AWS-RunShellScript", Owner="Amazon", PlatformTypes=["Linux"],
+                                           DocumentVersion="1")], NextToken="token"),
+            dict(DocumentIdentifiers=[dict(Name="Custom", Owner="123456789012", PlatformTypes=["Windows"],
+                                           DocumentVersion="3")])
+        ]
+
+        documents = ssm.get_document_catalog()
+        self.assertEqual([document.name for document in documents], ["AWS-RunShellScript", "Custom"])
+        self.assertEqual(documents[1].document_version, "3")
+
+        # 別のクライアントでも同じアカウント・リージョンであればキャッシュを使う
+        other = self._create_ssm()
+        self.assertEqual([document.name for document in other.get_document_catalog()], ["AWS-RunShellScript", "Custom"])
+        self.assertEqual(ssm.client.list_documents.call_count, 2)
+        other.client.list_documents.assert_not_called()
+
+    # ドキュメント詳細はバージョンごとにキャッシュする
+    def test_describe_document_cached(self):
+        ssm = self._create_ssm()
+        ssm.client.describe_document.return_value = self._describe_response("1")
+
+        document1 = ssm.describe_document("AWS-RunShellScript")
+        document2 = ssm.describe_document("AWS-RunShellScript")
+
+        ssm.client.describe_document.assert_called_once_with(Name="AWS-RunShellScript")
+        self.assertEqual(document1.serialize(), document2.serialize())
+        self.assertEqual(document2.parameters[0].key, "commands")
+
+    # 一覧のバージョンが変わった場合は取得し直し、古い一覧は破棄する
+    def test_describe_document_new_version(self):
+        ssm = self._create_ssm()
+        ssm.client.describe_document.return_value = self._describe_response("1")
+        ssm.describe_document("AWS-RunShellScript")
+
+        ssm.client.list_documents.return_value = dict(DocumentIdentifiers=[
+            dict(Name="AWS-RunShellScript", Owner="Amazon", PlatformTypes=["Linux"], DocumentVersion="2")
+        ])
+        ssm.get_document_catalog()
+        ssm.client.describe_document.return_value = self._describe_response("2")
+
+        self.assertEqual(ssm.describe_document("AWS-RunShellScript").document_version, "2")
+        self.assertEqual(ssm.client.describe_document.call_count, 2)
+        self.assertEqual(ssm.describe_document("AWS-RunShellScript").document_version, "2")
+        self.assertEqual(ssm.client.describe_document.call_count, 2)
+
+    # コマンドは実行の終了を待たずにコマンドIDを返す
+    def test_send_command(self):
+        ssm = self._create_ssm()
+        ssm.client.send_command.return_value = dict(Command=dict(CommandId="command_id"))
+        command = Command(Document("AWS-RunShellScript", [Parameter(key="commands", value="ls")]),
+                          [Ec2("ap-northeast-1", "i-1"), Ec2("ap-northeast-1", "i-2")])
+
+        self.assertEqual(ssm.send_command(command), "command_id")
+        ssm.client.send_command.assert_called_once_with(
+            InstanceIds=["i-1", "i-2"],
+            DocumentName="AWS-RunShellScript",
+            Parameters={"commands": ["ls"]}
+        )
+        ssm.client.list_command_invocations.assert_not_called()
+
+    # 一度に指定できるインスタンス数を超える場合はエラー
+    def test_send_command_too_many_targets(self):
+        ssm = self._create_ssm()
+        command = Command(Document("AWS-RunShellScript"),
+                          [Ec2("ap-northeast-1", "i-{}".format(i)) for i in range(Ssm.SEND_COMMAND_MAX_INSTANCES + 1)])
+
+        with self.assertRaises(ValueError):
+            ssm.send_command(command)
+        ssm.client.send_command.assert_not_called()
+
+    # SSMエージェントが登録されているインスタンスは全ページを取得してキャッシュする
+    def test_get_managed_instance_ids(self):
+        ssm = self._create_ssm()
+        ssm.client.describe_instance_information.side_effect = [
+            dict(InstanceInformationList=[dict(InstanceId="i-1")], NextToken="token"),
+            dict(InstanceInformationList=[dict(InstanceId="i-2")])
+        ]
+
+        self.assertEqual(ssm.get_managed_instance_ids(), frozenset(["i-1", "i-2"]))
+        self.assertEqual(ssm.get_managed_instance_ids(), frozenset(["i-1", "i-2"]))
+        self.assertEqual(ssm.client.describe_instance_information.call_args_list, [
+            mock.call(MaxResults=50),
+            mock.call(MaxResults=50, NextToken="token")
+        ])
+
+    # 一覧がキャッシュされていなければ対象のインスタンスだけを問い合わせる
+    def test_has_ssm_agent(self):
+        ssm = self._create_ssm()
+        ssm.client.describe_instance_information.return_value = dict(InstanceInformationList=[
+            dict(InstanceId="i-1")
+        ])
+
+        self.assertTrue(ssm.has_ssm_agent(Ec2("ap-northeast-1", "i-1")))
+        ssm.client.describe_instance_information.assert_called_once_with(
+            InstanceInformationFilterList=[dict(key="InstanceIds", valueSet=["i-1"])],
+            MaxResults=50
+        )
+
+        ssm.client.describe_instance_information.return_value = dict(InstanceInformationList=[])
+        self.assertFalse(ssm.has_ssm_agent(Ec2("ap-northeast-1", "i-2")))
+
+    # 一覧がキャッシュされていればSSMに問い合わせない
+    def test_has_ssm_agent_cached(self):
+        ssm = self._create_ssm()
+        ssm.client.describe_instance_information.return_value = dict(InstanceInformationList=[
+            dict(InstanceId="i-1")
+        ])
+        ssm.get_managed_instance_ids()
+
+        self.assertTrue(ssm.has_ssm_agent(Ec2("ap-northeast-1", "i-1")))
+        self.assertFalse(ssm.has_ssm_agent(Ec2("ap-northeast-1", "i-2")))
+        ssm.client.describe_instance_information.assert_called_once()
+
+    # インスタンスごとの実行状況を全ページ取得する
+    def test_list_command_invocations(self):
+        ssm = self._create_ssm()
+        ssm.client.list_command_invocations.side_effect = [
+            dict(CommandInvocations=[dict(InstanceId="i-1", Status="Success",
+                                          CommandPlugins=[dict(Output="out1"), dict(Output="out2")])],
+                 NextToken="token"),
+            dict(CommandInvocations=[dict(InstanceId="i-2", Status="InProgress", CommandPlugins=[])])
+        ]
+
+        self.assertEqual(ssm.list_command_invocations("command_id"), [
+            dict(instance_id="i-1", status="Success", output="out1\nout2"),
+            dict(instance_id="i-2", status="InProgress", output=None)
+        ])
+        ssm.client.list_command_invocations.assert_called_with(CommandId="command_id", Details=True,
+                                                               NextToken="token")
@@ -0,0 +1,179 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from backend.models import AwsEnvironmentModel, TenantModel, AlarmIndexModel, AlarmStatusModel
+from datetime import datetime, timedelta
+
+
+class AlarmIndexModelTests(TestCase):
+
+    def setUp(self):
+        now = datetime.now()
+        tenant = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+        self.aws = AwsEnvironmentModel.objects.create(
+            name="test_name",
+            aws_account_id="123456789012",
+            aws_role="test_aws_role",
+            aws_external_id="test_aws_external_id",
+            tenant=tenant,
+            created_at=now,
+            updated_at=now
+        )
+
+    @staticmethod
+    def _alarm(resource_id, level, state, service="EC2", metric="CPUUtilization"):
+        return dict(
+            alarm_name="NARUKO-{}-{}-{}-{}".format(service, resource_id, metric, level),
+            service=service,
+            resource_id=resource_id,
+            level=level,
+            state=state,
+            state_updated_at=timezone.now()
+        )
+
+    # 索引はAWS環境・リージョンごとに1つだけ作成されることを確認する
+    def test_get_index(self):
+        index = AlarmIndexModel.get_index(self.aws, "ap-northeast-1")
+        self.assertEqual(index, AlarmIndexModel.get_index(self.aws, "ap-northeast-1"))
+        self.assertNotEqual(index, AlarmIndexModel.get_index(self.aws, "us-east-1"))
+        self.assertEqual(AlarmIndexModel.objects.count(), 2)
+
+    # 洗い替えの要否を確認する
+    @override_settings(ALARM_INDEX_RECONCILE_SECONDS=900)
+    def test_needs_reconcile(self):
+        index = AlarmIndexModel.get_index(self.aws, "ap-northeast-1")
+        self.assertTrue(index.needs_reconcile())
+
+        index.reconcile([])
+        self.assertFalse(index.needs_reconcile())
+
+        index.reconciled_at = timezone.now() - timedelta(seconds=900)
+        self.assertTrue(index.needs_reconcile())
+
+    # アクションを無効にしたアラームを含む索引は常に洗い替えることを確認する
+    @override_settings(ALARM_INDEX_RECONCILE_SECONDS=900)
+    def test_needs_reconcile_actions_disabled(self):
+        index = AlarmIndexModel.get_index(self.aws, "ap-northeast-1")
+        index.reconcile([dict(self._alarm("i-1", "CAUTION", "OK"), actions_enabled=False)])
+        self.assertTrue(index.needs_reconcile())
+
+        index.add_alarm("NARUKO-EC2-i-1-CPUUtilization-CAUTION", "EC2", "i-1", "CAUTION", "INSUFFICIENT_DATA")
+        self.assertFalse(index.needs_reconcile())
+
+    # 洗い替えで既存のアラームが置き換わることを確認する
+    def test_reconcile(self):
+        index = AlarmIndexModel.get_index(self.aws, "ap-northeast-1")
+        index.reconcile([self._alarm("i-1", "CAUTION", "OK"), self._alarm("i-2", "CAUTION", "OK")])
+        index.reconcile([self._alarm("i-3", "DANGER", "ALARM")])
+
+        self.assertEqual(list(index.alarms.values_list("resource_id", flat=True)), ["i-3"])
+        self.assertIsNotNone(index.reconciled_at)
+
+    # アラームが発生しているもので最も監視レベルが高いものがインスタンスの状態になることを確認する
+    def test_resources_status(self):
+        index = AlarmIndexModel.get_index(self.aws, "ap-northeast-1")
+        index.reconcile([
+            self._alarm("i-1", "CAUTION", "ALARM"),
+            self._alarm("i-1", "DANGER", "ALARM"),
+            self._alarm("i-2", "CAUTION", "ALARM", metric="StatusCheckFailed"),
+            self._alarm("i-2", "DANGER", "OK", metric="StatusCheckFailed"),
+            self._alarm("i-3", "DANGER", "INSUFFICIENT_DATA"),
+            self._alarm("db-1", "CAUTION", "OK", service="RDS"),
+        ])
+
+        self.assertEqual(index.resources_status(), {
+            "EC2": {"i-1": "DANGER", "i-2": "CAUTION", "i-3": "OK"},
+            "RDS": {"db-1": "OK"},
+            "ELB": {}
+        })
+
+    # 古い状態変化では更新されないことを確認する
+    def test_put_alarm_older(self):
+        index = AlarmIndexModel.get_index(self.aws, "ap-northeast-1")
+        now = timezone.now()
+        index.put_alarm("NARUKO-EC2-i-1-CPUUtilization-DANGER", "EC2", "i-1", "DANGER", "ALARM", now)
+        index.put_alarm("NARUKO-EC2-i-1-CPUUtilization-DANGER", "EC2", "i-1", "DANGER", "OK",
+                        now - timedelta(minutes=1))
+
+        self.assertEqual(AlarmStatusModel.objects.get().state, "ALARM")
+
+    # 索引にないアラームだけが追加され、既存のアラームの状態は変わらないことを確認する
+    def test_add_alarm(self):
+        index = AlarmIndexModel.get_index(self.aws, "ap-northeast-1")
+        alarm = self._alarm("i-1", "DANGER", "ALARM")
+        index.reconcile([alarm])
+
+        index.add_alarm(alarm["alarm_name"], "EC2", "i-1", "DANGER", "INSUFFICIENT_DATA")
+        index.add_alarm("NARUKO-EC2-i-2-CPUUtilization-DANGER", "EC2", "i-2", "DANGER", "INSUFFICIENT_DATA")
+
+        updated = AlarmStatusModel.objects.get(alarm_name=alarm["alarm_name"])
+        self.assertEqual(updated.state, "ALARM")
+        self.assertEqual(updated.state_updated_at, alarm["state_updated_at"])
+        added = AlarmStatusModel.objects.get(resource_id="i-2")
+        self.assertEqual(added.state, "INSUFFICIENT_DATA")
+        self.assertIsNone(added.state_updated_at)
+
+    # SNSのメッセージで索引が更新されることを確認する
+    def test_apply_alarm_message(self):
+        index = AlarmIndexModel.get_index(self.aws, "ap-northeast-1")
+        index.reconcile([self._alarm("i-1", "DANGER", "OK")])
+
+        alarm = AlarmIndexModel.apply_alarm_message({
+            "AlarmName": "NARUKO-EC2-i-1-CPUUtilization-DANGER",
+            "AWSAccountId": "123456789012",
+            "NewStateValue": "ALARM",
+            "StateChangeTime": (datetime.utcnow() + timedelta(minutes=1)).strftime('%Y-%m-%dT%H:%M:%S.%f+0000'),
+            "Region": "Asia Pacific (Tokyo)",
+            "AlarmArn": "arn:aws:cloudwatch:ap-northeast-1:123456789012:alarm:NARUKO-EC2-i-1-CPUUtilization-DANGER",
+            "Trigger": {
+                "MetricName": "CPUUtilization",
+                "Namespace": "AWS/EC2",
+                "Dimensions": [{"value": "i-1", "name": "InstanceId"}]
+            }
+        })
+
+        self.assertEqual(alarm.state, "ALARM")
+        self.assertEqual(index.resources_status()["EC2"], {"i-1": "DANGER"})
+
+    # 最も低いレベルのアラームの復旧で、同じメトリクスの全レベルが復旧することを確認する
+    def test_apply_alarm_message_recover(self):
+        index = AlarmIndexModel.get_index(self.aws, "ap-northeast-1")
+        index.reconcile([
+            self._alarm("i-1", "CAUTION", "ALARM"),
+            self._alarm("i-1", "DANGER", "ALARM"),
+            self._alarm("i-1", "DANGER", "ALARM", metric="StatusCheckFailed"),
+        ])
+
+        alarm = AlarmIndexModel.apply_alarm_message({
+            "AlarmName": "NARUKO-EC2-i-1-CPUUtilization-CAUTION",
+            "AWSAccountId": "123456789012",
+            "NewStateValue": "OK",
+            "StateChangeTime": (datetime.utcnow() + timedelta(minutes=1)).strftime('%Y-%m-%dT%H:%M:%S.%f+0000'),
+            "Region": "Asia Pacific (Tokyo)",
+            "AlarmArn": "arn:aws:cloudwatch:ap-northeast-1:123456789012:alarm:NARUKO-EC2-i-1-CPUUtilization-CAUTION",
+            "Trigger": {
+                "MetricName": "CPUUtilization",
+                "Namespace": "AWS/EC2",
+                "Dimensions": [{"value": "i-1", "name": "InstanceId"}]
+            }
+        })
+
+        self.assertEqual(alarm.state, "OK")
+        self.assertEqual(AlarmStatusModel.objects.get(alarm_name="NARUKO-EC2-i-1-CPUUtilization-DANGER").state, "OK")
+        # 別のメトリクスのアラームは変わらない
+        self.assertEqual(AlarmStatusModel.objects.get(alarm_name="NARUKO-EC2-i-1-StatusCheckFailed-DANGER").state,
+                         "ALARM")
+
+    # 索引がないリージョンのメッセージは無視されることを確認する
+    def test_apply_alarm_message_no_index(self):
+        alarm = AlarmIndexModel.apply_alarm_message({
+            "AlarmName": "NARUKO-EC2-i-1-CPUUtilization-DANGER",
+            "AWSAccountId": "123456789012",
+            "AlarmArn": "arn:aws:cloudwatch:us-east-1:123456789012:alarm:NARUKO-EC2-i-1-CPUUtilization-DANGER",
+        })
+
+        self.assertIsNone(alarm)
+        self.assertEqual(AlarmStatusModel.objects.count(), 0)
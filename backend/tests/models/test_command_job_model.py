@@ -0,0 +1,77 @@
+from django.test import TestCase
+from backend.models import AwsEnvironmentModel, TenantModel, CommandJobModel, CommandInvocationModel
+from backend.models.resource.command import Command, Document
+from backend.models.resource.ec2 import Ec2
+from datetime import datetime
+
+
+class CommandJobModelTests(TestCase):
+
+    def setUp(self):
+        now = datetime.now()
+        tenant = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+        self.aws = AwsEnvironmentModel.objects.create(
+            name="test_name",
+            aws_account_id="123456789012",
+            aws_role="test_aws_role",
+            aws_external_id="test_aws_external_id",
+            tenant=tenant,
+            created_at=now,
+            updated_at=now
+        )
+
+    def _create_job(self, *instance_ids):
+        command = Command(Document("AWS-RunShellScript"),
+                          [Ec2("ap-northeast-1", instance_id) for instance_id in instance_ids])
+        command.command_id = "command_id"
+        return CommandJobModel.create_job(self.aws, command)
+
+    # 対象のインスタンスごとに実行状況が作成されることを確認する
+    def test_create_job(self):
+        job = self._create_job("i-1", "i-2")
+
+        self.assertEqual(job.status, "Pending")
+        self.assertEqual(job.region, "ap-northeast-1")
+        self.assertEqual(sorted(job.invocations.values_list("instance_id", flat=True)), ["i-1", "i-2"])
+
+    # 1台でも終了していなければ実行中となることを確認する
+    def test_update_invocations_in_progress(self):
+        job = self._create_job("i-1", "i-2")
+
+        job.update_invocations([
+            dict(instance_id="i-1", status="Success", output="ok"),
+            dict(instance_id="i-2", status="InProgress", output=None),
+        ])
+
+        self.assertEqual(job.status, "InProgress")
+        self.assertFalse(job.is_finished())
+        self.assertIsNotNone(job.polled_at)
+        self.assertEqual(CommandInvocationModel.objects.get(instance_id="i-1").output, "ok")
+
+    # 全台成功した場合は成功、失敗を含む場合は失敗となることを確認する
+    def test_update_invocations_finished(self):
+        job = self._create_job("i-1", "i-2")
+
+        job.update_invocations([
+            dict(instance_id="i-1", status="Success", output="ok"),
+            dict(instance_id="i-2", status="Success", output="ok"),
+        ])
+        self.assertEqual(job.status, "Success")
+
+        job.update_invocations([dict(instance_id="i-2", status="Failed", output="error")])
+        self.assertEqual(job.status, "Failed")
+        self.assertTrue(job.is_finished())
+
+    # 実行状況が取れない間は待機中のままとなることを確認する
+    def test_update_invocations_empty(self):
+        job = self._create_job("i-1")
+
+        job.update_invocations([])
+
+        self.assertEqual(job.status, "Pending")
+        self.assertEqual(job.serialize()["invocations"],
+                         [dict(instance_id="i-1", status="Pending", output=None)])
@@ -0,0 +1,58 @@
+from django.test import TestCase
+from backend.models.downsampling import downsample
+from backend.models.monitor import MonitorGraph
+from datetime import datetime, timedelta, timezone
+
+
+class DownsamplingTestCase(TestCase):
+
+    TIMESTAMPS = list(range(0, 600, 60))
+    VALUES = [1.0, 5.0, 2.0, 8.0, 3.0, 3.0, 9.0, 1.0, 4.0, 6.0]
+
+    # 点数の指定がないか点数以下の場合は間引かない
+    def test_downsample_not_reduced(self):
+        self.assertEqual(downsample(self.TIMESTAMPS, self.VALUES), (self.TIMESTAMPS, self.VALUES))
+        self.assertEqual(downsample(self.TIMESTAMPS, self.VALUES, 10), (self.TIMESTAMPS, self.VALUES))
+
+    # 平均
+    def test_downsample_avg(self):
+        self.assertEqual(downsample(self.TIMESTAMPS, self.VALUES, 3, "avg"),
+                         ([0, 180, 360], [8.0 / 3, 14.0 / 3, 5.0]))
+
+    # 最小・最大は値を取った点のタイムスタンプを使う
+    def test_downsample_min_max(self):
+        self.assertEqual(downsample(self.TIMESTAMPS, self.VALUES, 3, "min"), ([0, 240, 420], [1.0, 3.0, 1.0]))
+        self.assertEqual(downsample(self.TIMESTAMPS, self.VALUES, 3, "max"), ([60, 180, 360], [5.0, 8.0, 9.0]))
+
+    # LTTBは先頭と末尾を残し、区間ごとに形を保つ点を選ぶ
+    def test_downsample_lttb(self):
+        timestamps, values = downsample(self.TIMESTAMPS, self.VALUES, 4, "lttb")
+
+        self.assertEqual(timestamps, [0, 180, 420, 540])
+        self.assertEqual(values, [1.0, 8.0, 1.0, 6.0])
+
+    # LTTBはdatetimeのタイムスタンプも扱える
+    def test_downsample_lttb_datetime(self):
+        start = datetime(2019, 1, 1, tzinfo=timezone.utc)
+        timestamps = [start + timedelta(seconds=timestamp) for timestamp in self.TIMESTAMPS]
+
+        res_timestamps, res_values = downsample(timestamps, self.VALUES, 4, "lttb")
+
+        self.assertEqual(res_timestamps, [timestamps[0], timestamps[3], timestamps[7], timestamps[9]])
+
+    # 不正な集計方法
+    def test_downsample_invalid_aggregation(self):
+        with self.assertRaises(ValueError):
+            downsample(self.TIMESTAMPS, self.VALUES, 3, "invalid")
+
+    # グラフデータのシリアライズ時に間引く
+    def test_monitor_graph_serialize(self):
+        graph = MonitorGraph("2019-01-01T00:00:00Z", "2019-01-01T00:10:00Z", 60, "Average", "CPUUtilization",
+                             max_points=5, aggregation="max")
+        graph.timestamps.extend(self.TIMESTAMPS)
+        graph.values.extend(self.VALUES)
+
+        self.assertEqual(graph.serialize(), {
+            "timestamps": [60, 180, 240, 360, 540],
+            "values": [5.0, 8.0, 3.0, 9.0, 6.0]
+        })
@@ -1,9 +1,10 @@
 from django.db.models import ObjectDoesNotExist
 from backend.models.event.event import EventRepository, ScheduleFactory, ScheduleModel, EventModel
-from backend.models import AwsEnvironmentModel, TenantModel, CloudWatchEvent, Schedule, Event, RoleModel, UserModel
+from backend.models import AwsEnvironmentModel, TenantModel, CloudWatchEvent, Schedule, RoleModel, UserModel
 from django.test import TestCase
+from django.utils import timezone
 from unittest import mock
-from datetime import datetime
+from datetime import datetime, timedelta
 import json
 
 
@@ -105,6 +106,19 @@ class EventTestCase(TestCase):
         mock_events.return_value.save_event.assert_called_once_with(test_event)
         self.assertEqual(repository_save, mock_events.return_value.save_event.return_value)
 
+    @mock.patch("backend.models.event.event.Events")
+    def test_save_rule_state(self, mock_events: mock.Mock):
+        test_event = Schedule(ScheduleModel.get(pk=1),
+                              CloudWatchEvent(schedule_expression="cron(0 * * * ? *)", is_active=False))
+
+        EventRepository.save(test_event)
+
+        # ルールの状態がDBにも保存されていること
+        schedule = ScheduleModel.get(pk=1)
+        self.assertEqual(schedule.schedule_expression, "cron(0 * * * ? *)")
+        self.assertFalse(schedule.is_active)
+        self.assertEqual(test_event.cloudwatchevent.name, "NARUKO-1")
+
     @mock.patch("backend.models.event.event.Events")
     def test_fetch_schedules_by_resource(self, mock_events: mock.Mock):
         mock_resource = mock.Mock()
@@ -113,19 +127,77 @@ class EventTestCase(TestCase):
         mock_resource.region = "ap-northeast-1"
         aws = AwsEnvironmentModel.objects.get(name="test_name1")
 
-        list_rules = mock_events.return_value.list_rules
+        describe_events = mock_events.return_value.describe_events
         expected = CloudWatchEvent(name="NARUKO-1", schedule_expression="TEST", is_active=True)
-        list_rules.return_value = [
-            expected,
-            CloudWatchEvent(name="NARUKO-2", schedule_expression="TEST", is_active=True),
-            CloudWatchEvent(name="NARUKO-3", schedule_expression="TEST", is_active=True)
-        ]
+        describe_events.return_value = {"NARUKO-1": expected}
 
         schedules_by_resource = EventRepository.fetch_schedules_by_resource(mock_resource, aws)
 
-        list_rules.assert_called_once()
+        # ルールの状態を保存していないものだけAWSから取得する
+        describe_events.assert_called_once_with(["NARUKO-1"])
         self.assertEqual(len(schedules_by_resource), 1)
         self.assertEqual(schedules_by_resource[0].cloudwatchevent, expected)
+        # 取得したルールの状態が保存されていること
+        self.assertEqual(ScheduleModel.get(pk=1).schedule_expression, "TEST")
+        self.assertTrue(ScheduleModel.get(pk=1).is_active)
+
+    # ルールの状態を保存しているものはAWSに問い合わせない
+    @mock.patch("backend.models.event.event.Events")
+    def test_fetch_schedules_by_resource_synced(self, mock_events: mock.Mock):
+        mock_resource = mock.Mock()
+        mock_resource.resource_id = "i-01234567890"
+        mock_resource.get_service_name.return_value = "ec2"
+        mock_resource.region = "ap-northeast-1"
+        aws = AwsEnvironmentModel.objects.get(name="test_name1")
+        ScheduleModel.objects.filter(id=1).update(schedule_expression="cron(0 * * * ? *)", is_active=False,
+                                                  rule_synced_at=timezone.now())
+
+        schedules_by_resource = EventRepository.fetch_schedules_by_resource(mock_resource, aws)
+
+        mock_events.return_value.describe_events.assert_not_called()
+        self.assertEqual(len(schedules_by_resource), 1)
+        self.assertEqual(schedules_by_resource[0].cloudwatchevent.name, "NARUKO-1")
+        self.assertEqual(schedules_by_resource[0].cloudwatchevent.schedule_expression, "cron(0 * * * ? *)")
+        self.assertFalse(schedules_by_resource[0].cloudwatchevent.is_active)
+
+    # 保存してから一定時間が経過したルールの状態はAWSから取得し直す
+    @mock.patch("backend.models.event.event.Events")
+    def test_fetch_schedules_by_resource_expired(self, mock_events: mock.Mock):
+        mock_resource = mock.Mock()
+        mock_resource.resource_id = "i-01234567890"
+        mock_resource.get_service_name.return_value = "ec2"
+        mock_resource.region = "ap-northeast-1"
+        aws = AwsEnvironmentModel.objects.get(name="test_name1")
+        ScheduleModel.objects.filter(id=1).update(schedule_expression="cron(0 * * * ? *)", is_active=True,
+                                                  rule_synced_at=timezone.now() - timedelta(days=1))
+        describe_events = mock_events.return_value.describe_events
+        describe_events.return_value = {
+            "NARUKO-1": CloudWatchEvent(name="NARUKO-1", schedule_expression="cron(0 * * * ? *)", is_active=False)
+        }
+
+        schedules_by_resource = EventRepository.fetch_schedules_by_resource(mock_resource, aws)
+
+        # NARUKOの外で無効にされたルールの状態が反映されること
+        describe_events.assert_called_once_with(["NARUKO-1"])
+        self.assertFalse(schedules_by_resource[0].cloudwatchevent.is_active)
+        self.assertFalse(ScheduleModel.get(pk=1).is_active)
+        self.assertGreater(ScheduleModel.get(pk=1).rule_synced_at, timezone.now() - timedelta(minutes=1))
+
+    # AWSにルールがないものはDBから削除する
+    @mock.patch("backend.models.event.event.Events")
+    def test_fetch_schedules_by_resource_no_rule(self, mock_events: mock.Mock):
+        mock_resource = mock.Mock()
+        mock_resource.resource_id = "i-01234567890"
+        mock_resource.get_service_name.return_value = "ec2"
+        mock_resource.region = "ap-northeast-1"
+        aws = AwsEnvironmentModel.objects.get(name="test_name1")
+        mock_events.return_value.describe_events.return_value = dict()
+
+        schedules_by_resource = EventRepository.fetch_schedules_by_resource(mock_resource, aws)
+
+        self.assertEqual(schedules_by_resource, [])
+        with self.assertRaises(ObjectDoesNotExist):
+            ScheduleModel.get(pk=1)
 
     @mock.patch("backend.models.event.event.Events")
     def test_delete(self, mock_events: mock.Mock):
@@ -145,6 +217,17 @@ class EventTestCase(TestCase):
 
         self.assertTrue(isinstance(res, Schedule))
 
+    # ルールの状態を保存しているものはAWSに問い合わせない
+    @mock.patch("backend.models.event.event.Events")
+    def test_get_synced(self, mock_events: mock.Mock):
+        ScheduleModel.objects.filter(id=1).update(schedule_expression="cron(0 * * * ? *)", is_active=True)
+
+        res = EventRepository.get(pk=1)
+
+        mock_events.return_value.describe_event.assert_not_called()
+        self.assertEqual(res.cloudwatchevent.name, "NARUKO-1")
+        self.assertTrue(res.cloudwatchevent.is_active)
+
     # ScheduleFactory
     def test_schedule_factory_create(self):
         name = "test"
@@ -249,78 +332,60 @@ class EventTestCase(TestCase):
                 event_id=event_id
             )
 
-    def test_execute_event(self):
-        mock_model = mock.Mock()
-        mock_aws = mock.Mock()
-
-        with self.assertRaises(NotImplementedError):
-            Event(mock_model, mock_aws).execute()
-
-    @mock.patch('backend.models.event.event.getattr')
-    def test_execute_schedule(self, mock_getattr):
+    # 実行結果が保存され、通知設定がされていれば通知されることを確認する
+    @mock.patch("backend.models.event.event.NotificationDestinationModel.destinations_for")
+    def test_record_result(self, mock_destinations_for):
         mock_dest = mock.Mock()
-        mock_group = mock.Mock()
-        mock_group.destinations.filter.return_value = [mock_dest]
-
-        mock_response = mock.Mock()
-        mock_response.status_code = 200
-        mock_view_func = mock.Mock()
-        mock_view_func.return_value = mock_response
-        mock_getattr.return_value = mock_view_func
+        mock_dest.CHANNEL = "email"
+        mock_destinations_for.return_value = [mock_dest]
 
         mock_aws_env = mock.Mock(spec=AwsEnvironmentModel)
-        mock_aws_env.tenant = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1")
-        mock_aws_env.notification_groups.filter.return_value = [mock_group]
-        mock_aws_env.id = 1
 
         # scheduleModel mock
         mock_schedule = mock.Mock()
         mock_schedule.params = '{"test": "test"}'
-        mock_schedule.action = "START"
         mock_schedule.aws_environment = mock_aws_env
-        mock_schedule.service = 'EC2'
-        # cloudwatchevent mock
-        mock_aws_cloudwatchevent = mock.Mock()
+        mock_schedule.notification = True
 
         # 検証対象実行
-        schedule = Schedule(mock_schedule, mock_aws_cloudwatchevent)
-        schedule.execute()
-
-        # 通知がされているか
-        self.assertTrue(mock_schedule.notification)
-        mock_dest.result_schedule.assert_called_once_with(schedule, True)
-
-    @mock.patch('backend.models.event.event.getattr')
-    def test_execute_schedule_no_notification(self, mock_getattr):
+        schedule = Schedule(mock_schedule, mock.Mock())
+        schedule.record_result(False, "error")
+
+        self.assertEqual(mock_schedule.last_result, "failed")
+        self.assertEqual(mock_schedule.last_message, "error")
+        self.assertIsNotNone(mock_schedule.last_executed_at)
+        mock_schedule.save.assert_called_once()
+        mock_destinations_for.assert_called_once_with(mock_aws_env)
+        mock_dest.result_schedule.assert_called_once_with(schedule, False)
+
+    # 通知設定がされていなければ通知されないことを確認する
+    @mock.patch("backend.models.event.event.NotificationDestinationModel.destinations_for")
+    def test_record_result_no_notification(self, mock_destinations_for):
         mock_dest = mock.Mock()
-        mock_group = mock.Mock()
-        mock_group.destinations.filter.return_value = [mock_dest]
-
-        mock_response = mock.Mock()
-        mock_response.status_code = 200
-        mock_view_func = mock.Mock()
-        mock_view_func.return_value = mock_response
-        mock_getattr.return_value = mock_view_func
+        mock_destinations_for.return_value = [mock_dest]
 
         mock_aws_env = mock.Mock(spec=AwsEnvironmentModel)
-        mock_aws_env.tenant = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1")
-        mock_aws_env.notification_groups.filter.return_value = [mock_group]
-        mock_aws_env.id = 1
 
         # scheduleModel mock
         mock_schedule = mock.Mock()
-        mock_schedule.params = '{"test": "test"}'
-        mock_schedule.action = "START"
+        mock_schedule.params = None
         mock_schedule.aws_environment = mock_aws_env
         mock_schedule.notification = False
-        mock_schedule.service = 'EC2'
-        # cloudwatchevent mock
-        mock_aws_cloudwatchevent = mock.Mock()
 
         # 検証対象実行
-        schedule = Schedule(mock_schedule, mock_aws_cloudwatchevent)
-        schedule.execute()
+        schedule = Schedule(mock_schedule, mock.Mock())
+        schedule.record_result(True)
 
-        # 通知がされていないか
-        self.assertFalse(mock_schedule.notification)
+        self.assertEqual(mock_schedule.last_result, "succeeded")
+        mock_destinations_for.assert_not_called()
         mock_dest.result_schedule.assert_not_called()
+
+    # 実行者とリソースを取得できることを確認する
+    def test_get_executor_and_resource(self):
+        schedule = Schedule(ScheduleModel.get(pk=1), mock.Mock())
+
+        self.assertEqual(schedule.get_executor().email, "test_email")
+        resource = schedule.get_resource()
+        self.assertEqual((resource.get_service_name(), resource.region, resource.resource_id),
+                         ("EC2", "ap-northeast-1", "i-01234567890"))
+        self.assertEqual(schedule.get_params(), {"test": "test"})
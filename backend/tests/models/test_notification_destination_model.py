@@ -1,7 +1,7 @@
 from django.test import TestCase
 from backend.models.notification_destination import NotificationDestinationModel, EmailDestination, TenantModel, \
     TelephoneDestination
-from backend.models import AwsEnvironmentModel, TenantModel
+from backend.models import AwsEnvironmentModel, TenantModel, NotificationGroupModel
 from backend.models.resource.ec2 import Ec2
 from datetime import datetime
 from unittest import mock
@@ -137,6 +137,47 @@ class NotificationDestinationModelTestCase(TestCase):
         model_objects_all = NotificationDestinationModel.all()
         self.assertEqual(model_objects_all.count(), 0)
 
+    # AWS環境に紐づく通知先を重複なく取得し、削除された通知グループの通知先は含めないことを確認する
+    def test_destinations_for(self):
+        now = datetime.now()
+        tenant_model = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+        aws = AwsEnvironmentModel.objects.create(
+            name="test_name",
+            aws_account_id="123456789012",
+            aws_role="test_aws_role",
+            aws_external_id="test_aws_external_id",
+            tenant=tenant_model,
+            created_at=now,
+            updated_at=now
+        )
+        shared = EmailDestination.objects.create(
+            name="shared", tenant=tenant_model, address="shared@example.com", created_at=now, updated_at=now)
+        telephone = TelephoneDestination.objects.create(
+            name="telephone", tenant=tenant_model, phone_number="080-1234-5678", created_at=now, updated_at=now)
+        deleted = EmailDestination.objects.create(
+            name="deleted", tenant=tenant_model, address="deleted@example.com", created_at=now, updated_at=now)
+
+        group1 = NotificationGroupModel.objects.create(name="group1", tenant=tenant_model)
+        group1.destinations.set([shared, telephone])
+        group1.aws_environments.set([aws])
+        group2 = NotificationGroupModel.objects.create(name="group2", tenant=tenant_model)
+        group2.destinations.set([shared])
+        group2.aws_environments.set([aws])
+        deleted_group = NotificationGroupModel.objects.create(name="deleted", tenant=tenant_model)
+        deleted_group.destinations.set([deleted])
+        deleted_group.aws_environments.set([aws])
+        deleted_group.delete()
+
+        destinations = NotificationDestinationModel.destinations_for(aws)
+
+        self.assertEqual([destination.id for destination in destinations], [shared.id, telephone.id])
+        self.assertTrue(isinstance(destinations[0], EmailDestination))
+        self.assertTrue(isinstance(destinations[1], TelephoneDestination))
+
     # NotificationMessageクラス
     def test_notification_message(self):
         tenant_model = TenantModel.objects.create(
@@ -221,6 +262,57 @@ class NotificationDestinationModelTestCase(TestCase):
         mock_ses.return_value.send_notify_mail.assert_called_with(mock_message, "test@test.com")
         self.assertEqual(res, "TEST_MESSAGE")
 
+    # メール一括通知：一括送信に失敗した宛先だけ1件ずつ送り直す
+    @mock.patch('backend.models.notification_destination.Ses')
+    def test_email_bulk_notify(self, mock_ses):
+        now = datetime.now()
+        tenant_model = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+        destinations = [EmailDestination.objects.create(
+            name="test", tenant=tenant_model, address="test{}@test.com".format(i), created_at=now, updated_at=now)
+            for i in range(3)]
+
+        mock_ses.BULK_MAX_DESTINATIONS = 2
+        mock_ses.return_value.send_bulk_notify_mail.side_effect = [["test1@test.com"], []]
+
+        mock_message = mock.Mock()
+        res = EmailDestination.bulk_notify(destinations, mock_message)
+
+        self.assertEqual(mock_ses.return_value.send_bulk_notify_mail.call_args_list, [
+            mock.call(mock_message, ["test0@test.com", "test1@test.com"]),
+            mock.call(mock_message, ["test2@test.com"])
+        ])
+        mock_ses.return_value.send_notify_mail.assert_called_once_with(mock_message, "test1@test.com")
+        self.assertEqual(res, {destination.id: "SUCCESS." for destination in destinations})
+
+    # まとめて通知：メール通知先は一括送信し、それ以外は通知先ごとに通知する
+    @mock.patch('backend.models.notification_destination.EmailDestination.bulk_notify')
+    @mock.patch('backend.models.notification_destination.TelephoneDestination.notify')
+    def test_notify_all(self, mock_telephone_notify, mock_bulk_notify):
+        now = datetime.now()
+        tenant_model = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+        email = EmailDestination.objects.create(
+            name="email", tenant=tenant_model, address="test@test.com", created_at=now, updated_at=now)
+        telephone = TelephoneDestination.objects.create(
+            name="telephone", tenant=tenant_model, phone_number="080-1234-5678", created_at=now, updated_at=now)
+
+        mock_bulk_notify.return_value = {email.id: "EMAIL"}
+        mock_telephone_notify.return_value = "TELEPHONE"
+
+        mock_message = mock.Mock()
+        res = NotificationDestinationModel.notify_all([telephone, email], mock_message)
+
+        self.assertEqual(res, ["TELEPHONE", "EMAIL"])
+        mock_bulk_notify.assert_called_once_with([email], mock_message)
+        mock_telephone_notify.assert_called_once_with(mock_message)
+
     # 電話通知：正常系
     @mock.patch('backend.models.notification_destination.Connect')
     def test_telephone_notify(self, mock_connect):
@@ -241,6 +333,24 @@ class NotificationDestinationModelTestCase(TestCase):
         mock_connect.return_value.start_outbound_voice_contact.assert_called_with(mock_message, "+818012345678")
         self.assertEqual(res, "SUCCESS.")
 
+    # 電話まとめ通知：正常系
+    @mock.patch('backend.models.notification_destination.Connect')
+    def test_telephone_notify_digest(self, mock_connect):
+        now = datetime.now()
+        tenant_model = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+        objects_create = TelephoneDestination.objects.create(
+            name="test", tenant=tenant_model, phone_number="080-1234-5678", country_code=81, created_at=now, updated_at=now)
+
+        mock_messages = [mock.Mock(), mock.Mock()]
+        res = objects_create.notify_digest(mock_messages)
+
+        mock_connect.return_value.start_outbound_voice_contact_digest.assert_called_with(mock_messages, "+818012345678")
+        self.assertEqual(res, "SUCCESS.")
+
     # 電話通知：Connectとの接続でエラーが起きた場合
     @mock.patch('backend.models.notification_destination.Connect')
     def test_telephone_notify_exception(self, mock_connect):
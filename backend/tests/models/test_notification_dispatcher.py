@@ -0,0 +1,56 @@
+from django.test import TestCase
+from backend.models.notification_dispatcher import NotificationDispatcher, _RateLimiter
+from unittest import mock
+
+
+class NotificationDispatcherTestCase(TestCase):
+
+    # 通知先の順に処理結果を返す
+    def test_dispatch(self):
+        dispatcher = NotificationDispatcher(max_workers=3, rate_limits={})
+        destinations = [mock.Mock(CHANNEL="email", id=i) for i in range(5)]
+
+        res = dispatcher.dispatch(destinations, lambda destination: "sent: {}".format(destination.id))
+
+        self.assertEqual(res, ["sent: {}".format(i) for i in range(5)])
+
+    # 通知先がなければ何もしない
+    def test_dispatch_empty(self):
+        send = mock.Mock()
+
+        self.assertEqual(NotificationDispatcher(max_workers=3, rate_limits={}).dispatch([], send), [])
+        send.assert_not_called()
+
+    # 通知に失敗した場合もほかの通知先には通知し、エラーメッセージを返す
+    def test_dispatch_exception(self):
+        dispatcher = NotificationDispatcher(max_workers=2, rate_limits={})
+        send = mock.Mock(side_effect=["ok", Exception("error"), "ok"])
+
+        res = dispatcher.dispatch([mock.Mock(CHANNEL="email") for _ in range(3)], send)
+
+        self.assertEqual(sorted(res), ["error", "ok", "ok"])
+        self.assertEqual(send.call_count, 3)
+
+    # 送信数の制限がある通知方法は待機してから通知する
+    @mock.patch("backend.models.notification_dispatcher._RateLimiter.acquire")
+    def test_dispatch_rate_limit(self, mock_acquire):
+        dispatcher = NotificationDispatcher(max_workers=2, rate_limits={"telephone": 1})
+
+        dispatcher.dispatch([mock.Mock(CHANNEL="telephone"), mock.Mock(CHANNEL="email")], lambda destination: "ok")
+
+        mock_acquire.assert_called_once_with(1)
+
+
+class RateLimiterTestCase(TestCase):
+
+    # 呼び出しの間隔を1/rate秒以上空ける
+    @mock.patch("backend.models.notification_dispatcher.time")
+    def test_acquire(self, mock_time):
+        mock_time.monotonic.return_value = 100.0
+        limiter = _RateLimiter(rate=4)
+
+        limiter.acquire()
+        limiter.acquire()
+        limiter.acquire()
+
+        self.assertEqual(mock_time.sleep.call_args_list, [mock.call(0.25), mock.call(0.5)])
@@ -0,0 +1,69 @@
+from django.test import TestCase
+from backend.models.operation_log_buffer import OperationLogBuffer
+from unittest import mock
+
+
+class OperationLogBufferTestCase(TestCase):
+
+    @staticmethod
+    @mock.patch('backend.models.operation_log_buffer.atexit')
+    def _create_buffer(mock_atexit, max_size=3):
+        return OperationLogBuffer(mock.Mock(), max_size=max_size, flush_seconds=1)
+
+    # 最初の操作ログを受け付けてから一定時間後にまとめて書き込む
+    @mock.patch('backend.models.operation_log_buffer.threading.Timer')
+    def test_put(self, mock_timer):
+        buffer = self._create_buffer()
+        entries = [mock.Mock(), mock.Mock()]
+
+        for entry in entries:
+            buffer.put(entry)
+
+        mock_timer.assert_called_once_with(1, buffer._flush_in_background)
+        buffer.flush()
+        buffer.model.objects.bulk_create.assert_called_once_with(entries, batch_size=3)
+
+    # 最大件数たまった場合は待たずに書き込む
+    @mock.patch('backend.models.operation_log_buffer.threading.Timer')
+    def test_put_max_size(self, mock_timer):
+        buffer = self._create_buffer(max_size=2)
+
+        buffer.put(mock.Mock())
+        buffer.put(mock.Mock())
+
+        self.assertEqual(mock_timer.call_args_list, [mock.call(1, buffer._flush_in_background),
+                                                     mock.call(0, buffer._flush_in_background)])
+        mock_timer.return_value.cancel.assert_called_once_with()
+
+    # トランザクション中の場合はコミット時にも書き込む
+    @mock.patch('backend.models.operation_log_buffer.transaction')
+    @mock.patch('backend.models.operation_log_buffer.threading.Timer')
+    def test_put_in_transaction(self, mock_timer, mock_transaction):
+        buffer = self._create_buffer()
+
+        buffer.put(mock.Mock())
+
+        mock_transaction.on_commit.assert_called_once_with(buffer.flush_soon)
+
+    # まとめて書き込めない場合は1件ずつ書き込む
+    @mock.patch('backend.models.operation_log_buffer.threading.Timer')
+    def test_flush_fallback(self, mock_timer):
+        buffer = self._create_buffer()
+        buffer.model.objects.bulk_create.side_effect = Exception("error")
+        entries = [mock.Mock(), mock.Mock()]
+        entries[0].save.side_effect = Exception("error")
+
+        for entry in entries:
+            buffer.put(entry)
+        buffer.flush()
+
+        entries[0].save.assert_called_once_with()
+        entries[1].save.assert_called_once_with()
+
+    # 書き込み待ちの操作ログがなければ何もしない
+    def test_flush_empty(self):
+        buffer = self._create_buffer()
+
+        buffer.flush()
+
+        buffer.model.objects.bulk_create.assert_not_called()
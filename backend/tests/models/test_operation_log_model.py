@@ -1,5 +1,7 @@
+from django.core.exceptions import PermissionDenied
 from django.test import TestCase
 from backend.models import OperationLogModel, TenantModel, UserModel, RoleModel
+from backend.models.operation_log import OPERATION_LOG_BUFFER
 from datetime import datetime
 from unittest import mock
 
@@ -256,8 +258,171 @@ class OperationLogModelTests(TestCase):
         mock_target = mock.Mock()
         mock_target.param = "TEST_PARAM"
         res = test_func(user_model, mock_target)
+        OPERATION_LOG_BUFFER.flush()
 
         self.assertEqual(res, "TEST_FUNC")
         operation_log_model = OperationLogModel.objects.all()[0]
 
         self.assertEqual(operation_log_model.operation, "test_func: test_user_TEST_PARAM")
+        self.assertEqual(operation_log_model.result, "succeeded")
+
+    # 失敗した操作も操作ログに書き込む
+    def test_operation_log_failed(self):
+        now = datetime.now()
+        role_model = RoleModel.objects.create(
+            id=RoleModel.MASTER_ID,
+            role_name="test_role",
+            created_at=now,
+            updated_at=now
+        )
+
+        tenant_model = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+
+        user_model = UserModel.objects.create(
+            name="test_user",
+            email="test@test.com",
+            role=role_model,
+            tenant=tenant_model,
+            created_at=now,
+            updated_at=now
+        )
+
+        @OperationLogModel.operation_log(executor_index=0)
+        def test_func(request_user):
+            raise ValueError("TEST_ERROR")
+
+        with self.assertRaises(ValueError):
+            test_func(user_model)
+        OPERATION_LOG_BUFFER.flush()
+
+        operation_log_model = OperationLogModel.objects.all()[0]
+        self.assertEqual(operation_log_model.operation, "test_func")
+        self.assertEqual(operation_log_model.result, "failed")
+
+    # 操作対象の取得に失敗しても元の例外を返す
+    def test_operation_log_target_failed(self):
+        now = datetime.now()
+        role_model = RoleModel.objects.create(
+            id=RoleModel.MASTER_ID,
+            role_name="test_role",
+            created_at=now,
+            updated_at=now
+        )
+
+        tenant_model = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+
+        user_model = UserModel.objects.create(
+            name="test_user",
+            email="test@test.com",
+            role=role_model,
+            tenant=tenant_model,
+            created_at=now,
+            updated_at=now
+        )
+
+        @staticmethod
+        def target_info(target):
+            raise KeyError(target)
+
+        @OperationLogModel.operation_log(executor_index=0, target_method=target_info, target_arg_index_list=[1])
+        def test_func(request_user, target):
+            raise PermissionDenied
+
+        with self.assertRaises(PermissionDenied):
+            test_func(user_model, "target")
+        OPERATION_LOG_BUFFER.flush()
+
+        operation_log_model = OperationLogModel.objects.all()[0]
+        self.assertEqual(operation_log_model.operation, "test_func")
+        self.assertEqual(operation_log_model.result, "failed")
+
+    # 操作対象のリストは操作対象ごとに1行ずつ、それぞれの結果で書き込む
+    def test_operation_log_targets(self):
+        now = datetime.now()
+        role_model = RoleModel.objects.create(
+            id=RoleModel.MASTER_ID,
+            role_name="test_role",
+            created_at=now,
+            updated_at=now
+        )
+
+        tenant_model = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+
+        user_model = UserModel.objects.create(
+            name="test_user",
+            email="test@test.com",
+            role=role_model,
+            tenant=tenant_model,
+            created_at=now,
+            updated_at=now
+        )
+
+        @staticmethod
+        def target_info(targets):
+            return ["target_{}".format(target) for target in targets]
+
+        @OperationLogModel.operation_log(executor_index=0, target_method=target_info, target_arg_index_list=[1])
+        def test_func(request_user, targets):
+            return [dict(result="succeeded"), dict(result="failed")]
+
+        test_func(user_model, ["1", "2"])
+        OPERATION_LOG_BUFFER.flush()
+
+        self.assertEqual(list(OperationLogModel.objects.order_by("id").values_list("operation", "result")), [
+            ("test_func: target_1", "succeeded"),
+            ("test_func: target_2", "failed")
+        ])
+
+    # 操作全体が失敗した場合は操作対象すべてを失敗として書き込む
+    def test_operation_log_targets_failed(self):
+        now = datetime.now()
+        role_model = RoleModel.objects.create(
+            id=RoleModel.MASTER_ID,
+            role_name="test_role",
+            created_at=now,
+            updated_at=now
+        )
+
+        tenant_model = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+
+        user_model = UserModel.objects.create(
+            name="test_user",
+            email="test@test.com",
+            role=role_model,
+            tenant=tenant_model,
+            created_at=now,
+            updated_at=now
+        )
+
+        @staticmethod
+        def target_info(targets):
+            return ["target_{}".format(target) for target in targets]
+
+        @OperationLogModel.operation_log(executor_index=0, target_method=target_info, target_arg_index_list=[1])
+        def test_func(request_user, targets):
+            raise PermissionDenied
+
+        with self.assertRaises(PermissionDenied):
+            test_func(user_model, ["1", "2"])
+        OPERATION_LOG_BUFFER.flush()
+
+        self.assertEqual(list(OperationLogModel.objects.order_by("id").values_list("operation", "result")), [
+            ("test_func: target_1", "failed"),
+            ("test_func: target_2", "failed")
+        ])
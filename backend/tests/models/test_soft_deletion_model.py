@@ -0,0 +1,78 @@
+from django.test import TestCase, override_settings
+from backend.models import UserModel, TenantModel, AwsEnvironmentModel, RoleModel, OperationLogModel
+from backend.models.eventmodel import ScheduleModel
+from django.db import connection
+from django.db.models.deletion import ProtectedError
+from django.test.utils import CaptureQueriesContext
+
+
+class SoftDeletionModelTests(TestCase):
+
+    @staticmethod
+    def _create_tenant(size: int):
+        role = RoleModel.objects.get_or_create(id=RoleModel.ADMIN_ID, defaults=dict(role_name="test_role"))[0]
+        tenant = TenantModel.objects.create(tenant_name="test_tenant")
+        for i in range(size):
+            user = UserModel.objects.create(email="{}-{}@test.com".format(tenant.id, i), name="test_user",
+                                            role=role, tenant=tenant)
+            aws = AwsEnvironmentModel.objects.create(name="test_aws", aws_account_id="{}-{}".format(tenant.id, i),
+                                                     aws_role="test_role", aws_external_id="test_id", tenant=tenant)
+            ScheduleModel.objects.create(name="test_schedule", action="start", notification=False,
+                                         aws_environment=aws, resource_id="i-{}".format(i), service="ec2",
+                                         region="ap-northeast-1")
+            OperationLogModel.objects.create(tenant=tenant, executor=user, operation="operation")
+        return tenant
+
+    # テナントを削除したとき紐づく行がまとめて削除され、件数によらず発行するクエリ数が変わらないことを確認する
+    def test_delete_cascade_tenant(self):
+        small = self._create_tenant(1)
+        large = self._create_tenant(5)
+
+        with CaptureQueriesContext(connection) as small_queries:
+            small.delete()
+        with CaptureQueriesContext(connection) as large_queries:
+            large.delete()
+
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertEqual(large.deleted, large.id)
+        self.assertEqual(TenantModel.objects.count(), 0)
+        self.assertEqual(UserModel.objects.count(), 0)
+        self.assertEqual(AwsEnvironmentModel.objects.count(), 0)
+        self.assertEqual(ScheduleModel.objects.filter(deleted=0).count(), 0)
+        self.assertEqual(OperationLogModel.objects.count(), 0)
+        for aws in AwsEnvironmentModel.all_objects.all():
+            self.assertEqual(aws.deleted, aws.id)
+
+    # 件数が1回にUPDATEする件数を超える場合は分けて削除することを確認する
+    @override_settings(SOFT_DELETE_BATCH_SIZE=2)
+    def test_delete_batch(self):
+        tenant = self._create_tenant(5)
+
+        self.assertEqual(AwsEnvironmentModel.objects.filter(tenant=tenant).delete(), 5)
+
+        self.assertEqual(AwsEnvironmentModel.objects.count(), 0)
+        self.assertEqual(ScheduleModel.objects.filter(deleted=0).count(), 0)
+        self.assertEqual(UserModel.objects.count(), 5)
+
+    # ユーザーを削除したとき操作ログの実行者が空になることを確認する
+    def test_delete_set_null_user(self):
+        tenant = self._create_tenant(2)
+        user = UserModel.objects.filter(tenant=tenant).first()
+
+        user.delete()
+
+        self.assertEqual(user.deleted, user.id)
+        self.assertEqual(UserModel.objects.count(), 1)
+        self.assertEqual(OperationLogModel.objects.count(), 2)
+        self.assertEqual(OperationLogModel.objects.filter(executor__isnull=True).count(), 1)
+
+    # 削除できない行がある場合はすべての削除を取り消すことを確認する
+    def test_delete_protect_rollback(self):
+        tenant = self._create_tenant(1)
+        role = RoleModel.objects.get(id=RoleModel.ADMIN_ID)
+
+        with self.assertRaises(ProtectedError):
+            RoleModel.objects.all().delete()
+
+        self.assertEqual(RoleModel.objects.get(id=role.id).deleted, 0)
+        self.assertEqual(UserModel.objects.filter(tenant=tenant).count(), 1)
@@ -1,7 +1,9 @@
 from django.test import TestCase
 from backend.models import UserModel, TenantModel, AwsEnvironmentModel, RoleModel
 from datetime import datetime
+from django.db import connection
 from django.db.models.deletion import ProtectedError
+from django.test.utils import CaptureQueriesContext
 
 
 class UserModelTests(TestCase):
@@ -174,3 +176,113 @@ class UserModelTests(TestCase):
             role_model.delete()
         model_objects_all = UserModel.objects.all()
         self.assertEqual(model_objects_all.count(), 1)
+
+    # 利用できるAWS環境はリクエスト中に1度だけ取得し、ロールの確認では問い合わせないことを確認する
+    def test_has_aws_env(self):
+        now = datetime.now()
+        role_model = RoleModel.objects.create(
+            id=RoleModel.ADMIN_ID,
+            role_name="test_role",
+            created_at=now,
+            updated_at=now
+        )
+        tenant_model = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+        aws_env1 = AwsEnvironmentModel.objects.create(
+            name="test_name1", aws_account_id="test_aws1", aws_role="test_role",
+            aws_external_id="test_external_id", tenant=tenant_model)
+        aws_env2 = AwsEnvironmentModel.objects.create(
+            name="test_name2", aws_account_id="test_aws2", aws_role="test_role",
+            aws_external_id="test_external_id", tenant=tenant_model)
+        user_model = UserModel.objects.create(
+            email="test_email",
+            name="test_name",
+            password="test_password",
+            tenant=tenant_model,
+            role=role_model
+        )
+        user_model.aws_environments.add(aws_env1)
+
+        user_model = UserModel.objects.get(id=user_model.id)
+        with self.assertNumQueries(1):
+            self.assertTrue(user_model.has_aws_env(aws_env1))
+            self.assertFalse(user_model.has_aws_env(aws_env2))
+            self.assertTrue(user_model.can_control_aws())
+            self.assertTrue(user_model.is_belong_to_tenant(tenant_model))
+
+        # AWS環境を洗い替えた場合は取得し直す
+        self.assertTrue(user_model.realignment_aws_environments(
+            user_model, AwsEnvironmentModel.objects.filter(id=aws_env2.id)))
+        self.assertFalse(user_model.has_aws_env(aws_env1))
+        self.assertTrue(user_model.has_aws_env(aws_env2))
+
+    @staticmethod
+    def _create_realignment_models(role_id, count):
+        now = datetime.now()
+        role_model = RoleModel.objects.create(
+            id=role_id,
+            role_name="test_role",
+            created_at=now,
+            updated_at=now
+        )
+        tenant_model = TenantModel.objects.create(
+            tenant_name="test_tenant",
+            created_at=now,
+            updated_at=now
+        )
+        aws_envs = [AwsEnvironmentModel.objects.create(
+            name="test_name{}".format(i), aws_account_id="test_aws{}".format(i), aws_role="test_role",
+            aws_external_id="test_external_id", tenant=tenant_model) for i in range(count)]
+        user_model = UserModel.objects.create(
+            email="test_email",
+            name="test_name",
+            password="test_password",
+            tenant=tenant_model,
+            role=role_model
+        )
+        return user_model, aws_envs
+
+    # AWS環境の洗い替えは差分だけを反映し、件数によらず問い合わせ回数が変わらないことを確認する
+    def test_realignment_aws_environments(self):
+        user_model, aws_envs = self._create_realignment_models(RoleModel.ADMIN_ID, 20)
+        user_model.aws_environments.add(*aws_envs[:2])
+
+        with CaptureQueriesContext(connection) as few:
+            self.assertTrue(user_model.realignment_aws_environments(
+                user_model, AwsEnvironmentModel.objects.filter(id__in=[aws_envs[1].id, aws_envs[2].id])))
+        self.assertEqual(set(user_model.aws_environments.values_list("id", flat=True)),
+                         {aws_envs[1].id, aws_envs[2].id})
+
+        with CaptureQueriesContext(connection) as many:
+            self.assertTrue(user_model.realignment_aws_environments(
+                user_model, AwsEnvironmentModel.objects.filter(id__in=[aws.id for aws in aws_envs[3:]])))
+        self.assertEqual(set(user_model.aws_environments.values_list("id", flat=True)),
+                         {aws.id for aws in aws_envs[3:]})
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    # 他のテナントのAWS環境が含まれる場合は何も変更しないことを確認する
+    def test_realignment_aws_environments_other_tenant(self):
+        user_model, aws_envs = self._create_realignment_models(RoleModel.ADMIN_ID, 1)
+        other_tenant = TenantModel.objects.create(tenant_name="other_tenant")
+        other_aws = AwsEnvironmentModel.objects.create(
+            name="other", aws_account_id="other_aws", aws_role="test_role",
+            aws_external_id="test_external_id", tenant=other_tenant)
+        user_model.aws_environments.add(aws_envs[0])
+
+        self.assertFalse(user_model.realignment_aws_environments(
+            user_model, AwsEnvironmentModel.objects.filter(id__in=[other_aws.id])))
+        self.assertEqual(list(user_model.aws_environments.values_list("id", flat=True)), [aws_envs[0].id])
+
+    # USER権限の場合はAWS環境を変更できないことを確認する
+    def test_realignment_aws_environments_user_role(self):
+        user_model, aws_envs = self._create_realignment_models(RoleModel.USER_ID, 2)
+        user_model.aws_environments.add(aws_envs[0])
+
+        self.assertTrue(user_model.realignment_aws_environments(
+            user_model, AwsEnvironmentModel.objects.filter(id__in=[aws_envs[0].id])))
+        self.assertFalse(user_model.realignment_aws_environments(
+            user_model, AwsEnvironmentModel.objects.filter(id__in=[aws_envs[1].id])))
+        self.assertEqual(list(user_model.aws_environments.values_list("id", flat=True)), [aws_envs[0].id])
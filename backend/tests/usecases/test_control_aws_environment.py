@@ -22,7 +22,24 @@ class ControlAwsEnvironmentTestCase(TestCase):
         mock_user.is_belong_to_tenant.assert_called_once()
         mock_user.can_control_aws.assert_called_once()
         objects_filter.assert_called_once_with(tenant_id=mock_tenant.id)
-        self.assertEqual(res, objects_filter.return_value)
+        objects_filter.return_value.select_related.assert_called_once_with("tenant")
+        self.assertEqual(res, objects_filter.return_value.select_related.return_value)
+
+    # AWS取得：AWS環境の数によらず発行するクエリ数が変わらないこと
+    def test_fetch_aws_environments_query_count(self):
+        from backend.models import TenantModel, AwsEnvironmentModel
+        from backend.serializers.aws_environment_model_serializer import AwsEnvironmentModelGetDetailSerializer
+        tenant = TenantModel.objects.create(tenant_name="test_tenant")
+        for i in range(5):
+            AwsEnvironmentModel.objects.create(name="aws", aws_account_id=str(i), aws_role="role",
+                                               aws_external_id="id", tenant=tenant)
+
+        with self.assertNumQueries(1):
+            aws_environments = ControlAwsEnvironment(Mock()).fetch_aws_environments(Mock(), tenant)
+            data = [AwsEnvironmentModelGetDetailSerializer(aws).data for aws in aws_environments]
+
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data[0]["tenant"]["id"], tenant.id)
 
     # AWS取得：テナントに属していない場合
     @patch('backend.usecases.control_aws_environment.AwsEnvironmentModel')
@@ -278,6 +295,32 @@ class ControlAwsEnvironmentTestCase(TestCase):
         self.assertEqual(res, result)
 
 
+    # 請求情報取得：点数を指定した場合は間引く
+    @mock.patch('backend.usecases.control_aws_environment.CloudWatch')
+    def test_billing_graph_max_points(self, mock_cloudwatch: Mock):
+        # mock準備
+        mock_user = Mock()
+        mock_user.can_fetch_billing.return_value = True
+        mock_user.has_aws_env.return_value = True
+        timestamps = [datetime.datetime(2019, 4, 29, i, 0) for i in range(4)]
+        mock_cloudwatch.return_value.get_multi_charts.return_value = [{
+            'timestamps': timestamps,
+            'values': [1.0, 3.0, 2.0, 4.0],
+            'config': {
+                'metric_name': 'EstimatedCharges',
+                'dimensions': [{'Name': 'Currency', 'Value': 'USD'}]
+            }
+        }]
+
+        res = ControlAwsEnvironment(Mock()).billing_graph(mock_user, Mock(), Mock(), Mock(), Mock(), Mock(),
+                                                          max_points=2, aggregation="max")
+
+        self.assertEqual(res, [{
+            'service': 'Total',
+            'timestamps': [timestamps[1], timestamps[3]],
+            'values': [3.0, 4.0]
+        }])
+
     # 請求情報取得：使用できないAWSアカウントの場合
     def test_billing_graph_cant_use_aws(self):
         mock_user = Mock()
@@ -1,9 +1,11 @@
+from django.core.exceptions import PermissionDenied
 from django.test import TestCase
 from backend.exceptions import InvalidNotificationException
+from backend.models.resource.ec2 import Ec2
 from unittest import mock
 # デコレーターをmock化
 with mock.patch('backend.models.OperationLogModel.operation_log', lambda executor_index=None, target_method=None, target_arg_index_list=None: lambda func: func):
-    from backend.usecases.control_event import ControlEventUseCase
+    from backend.usecases.control_event import ControlEventUseCase, ScheduleQueue
 
 
 class ControlEventTestCase(TestCase):
@@ -45,11 +47,135 @@ class ControlEventTestCase(TestCase):
 
         mock_sns.verify_notification.assert_called_with(data)
 
-    # スケジュール実行：正常系
-    def test_execute(self):
+    # スケジュール実行：実行キューに入れる
+    @mock.patch('backend.usecases.control_event.ControlEventUseCase.execute_schedules')
+    @mock.patch('backend.usecases.control_event.SCHEDULE_QUEUE')
+    def test_execute(self, mock_queue, mock_execute_schedules):
+        mock_queue.window_seconds = 2
         mock_event = mock.Mock()
-        ControlEventUseCase(mock.Mock()).execute(
+        mock_log = mock.Mock()
+        ControlEventUseCase(mock_log).execute(
             mock_event
         )
-        mock_event.execute.assert_called_once()
+        mock_queue.put.assert_called_once_with(mock_event, mock_log)
+        mock_execute_schedules.assert_not_called()
 
+    # スケジュール実行：まとめる秒数が0の場合は応答する前に実行する
+    @mock.patch('backend.usecases.control_event.ControlEventUseCase.execute_schedules')
+    @mock.patch('backend.usecases.control_event.SCHEDULE_QUEUE', mock.Mock(window_seconds=0))
+    def test_execute_immediately(self, mock_execute_schedules):
+        mock_event = mock.Mock()
+        ControlEventUseCase(mock.Mock()).execute(mock_event)
+
+        mock_execute_schedules.assert_called_once_with([mock_event])
+
+    @staticmethod
+    def _schedule(schedule_id, action, resource_id, aws_id=1, region="ap-northeast-1", params=None):
+        schedule = mock.Mock()
+        schedule.event_model.id = schedule_id
+        schedule.event_model.aws_environment_id = aws_id
+        schedule.event_model.region = region
+        schedule.event_model.action = action
+        schedule.get_resource.return_value = Ec2(region, resource_id)
+        schedule.get_params.return_value = params if params else dict()
+        return schedule
+
+    # まとめて実行：AWS環境・リージョン・アクションごとに一括操作する
+    @mock.patch('backend.usecases.control_event.ControlResourceUseCase')
+    def test_execute_schedules(self, mock_use_case):
+        power_resources = mock_use_case.return_value.power_resources
+        power_resources.side_effect = lambda user, aws, action, resources: [
+            dict(resource_id=resource.resource_id, result="failed" if resource.resource_id == "i-2" else "succeeded",
+                 message="error" if resource.resource_id == "i-2" else None)
+            for resource in resources]
+        schedules = [
+            self._schedule(1, "START", "i-1"),
+            self._schedule(2, "START", "i-2"),
+            self._schedule(3, "STOP", "i-3"),
+            # SNSから重複して届いたもの
+            self._schedule(1, "START", "i-1"),
+        ]
+
+        ControlEventUseCase(mock.Mock()).execute_schedules(schedules)
+
+        self.assertEqual(power_resources.call_count, 2)
+        start_call, stop_call = power_resources.call_args_list
+        self.assertEqual(start_call[0][2], "start")
+        self.assertEqual([resource.resource_id for resource in start_call[0][3]], ["i-1", "i-2"])
+        self.assertEqual(stop_call[0][2], "stop")
+        schedules[0].record_result.assert_called_once_with(True, None)
+        schedules[1].record_result.assert_called_once_with(False, "error")
+        schedules[2].record_result.assert_called_once_with(True, None)
+        schedules[3].record_result.assert_not_called()
+
+    # まとめて実行：バックアップはリソースごとに実行する
+    @mock.patch('backend.usecases.control_event.ControlResourceUseCase')
+    def test_execute_schedules_backup(self, mock_use_case):
+        create_backup = mock_use_case.return_value.create_backup
+        create_backup.side_effect = ["ami-1", Exception("error")]
+        schedules = [
+            self._schedule(1, "BACKUP", "i-1", params=dict(no_reboot=False)),
+            self._schedule(2, "BACKUP", "i-2"),
+        ]
+
+        ControlEventUseCase(mock.Mock()).execute_schedules(schedules)
+
+        self.assertEqual(create_backup.call_args_list[0][0][3], False)
+        self.assertEqual(create_backup.call_args_list[1][0][3], True)
+        schedules[0].record_result.assert_called_once_with(True, "ami-1")
+        schedules[1].record_result.assert_called_once_with(False, "error")
+
+    # まとめて実行：実行できなかった場合は全て失敗として保存する
+    @mock.patch('backend.usecases.control_event.ControlResourceUseCase')
+    def test_execute_schedules_failed(self, mock_use_case):
+        mock_use_case.return_value.power_resources.side_effect = PermissionDenied("denied")
+        schedules = [
+            self._schedule(1, "START", "i-1"),
+            self._schedule(2, "INVALID", "i-2"),
+        ]
+
+        ControlEventUseCase(mock.Mock()).execute_schedules(schedules)
+
+        schedules[0].record_result.assert_called_once_with(False, "denied")
+        schedules[1].record_result.assert_called_once_with(False, "invalid action: INVALID")
+
+    # 実行キュー：受け付けたスケジュールをまとめて実行する
+    @mock.patch('backend.usecases.control_event.connection')
+    @mock.patch('backend.usecases.control_event.threading.Timer')
+    @mock.patch('backend.usecases.control_event.ControlEventUseCase.execute_schedules')
+    def test_schedule_queue(self, mock_execute_schedules, mock_timer, mock_connection):
+        queue = ScheduleQueue(2)
+        mock_log = mock.Mock()
+        queue.put("event1", mock_log)
+        queue.put("event2", mock.Mock())
+
+        # タイマーは最初の1件を受け付けたときだけ開始する
+        mock_timer.assert_called_once_with(2, queue.flush)
+        mock_timer.return_value.start.assert_called_once()
+
+        queue.flush()
+        mock_execute_schedules.assert_called_once_with(["event1", "event2"])
+        mock_connection.close.assert_called_once()
+
+        # 実行後は新しく受け付けたものだけを実行する
+        queue.put("event3", mock_log)
+        self.assertEqual(mock_timer.call_count, 2)
+        queue.flush()
+        mock_execute_schedules.assert_called_with(["event3"])
+
+    # 実行キュー：まとめて実行できなかった場合は失敗として記録する
+    @mock.patch('backend.usecases.control_event.connection')
+    @mock.patch('backend.usecases.control_event.threading.Timer')
+    @mock.patch('backend.usecases.control_event.ControlEventUseCase.execute_schedules')
+    def test_schedule_queue_failed(self, mock_execute_schedules, mock_timer, mock_connection):
+        mock_execute_schedules.side_effect = Exception("error")
+        queue = ScheduleQueue(2)
+        events = [mock.Mock(), mock.Mock()]
+        for event in events:
+            queue.put(event, mock.Mock())
+
+        queue.flush()
+
+        for event in events:
+            event.record_result.assert_called_once_with(False, "error")
+        mock_connection.close.assert_called_once()
@@ -42,6 +42,84 @@ class ControlMonitorTestCase(TestCase):
         mock_sns.return_value.add_permission.assert_not_called()
         mock_cloudwatch.return_value.put_metric_alarms.assert_not_called()
 
+    # 監視設定一括保存：正常系
+    @mock.patch('backend.usecases.control_monitor.connection')
+    @mock.patch('backend.usecases.control_monitor.CloudWatch')
+    @mock.patch('backend.usecases.control_monitor.Sns')
+    def test_save_monitors(self, mock_sns: mock.Mock, mock_cloudwatch: mock.Mock, mock_connection: mock.Mock):
+        # mock準備
+        mock_user = mock.Mock()
+        mock_aws = mock.Mock()
+        monitors = []
+        for region, resource_id, metric_name in [("ap-northeast-1", "i-1", "CPUUtilization"),
+                                                 ("us-east-1", "i-2", "CPUUtilization"),
+                                                 ("ap-northeast-1", "i-3", "Invalid")]:
+            mock_resource = mock.Mock(region=region, resource_id=resource_id)
+            mock_resource.get_service_name.return_value = "EC2"
+            mock_resource.get_metrics.return_value = ["CPUUtilization"]
+            mock_monitor = mock.Mock()
+            mock_monitor.metric.name = metric_name
+            monitors.append((mock_resource, mock_monitor))
+        put_monitor_alarms = mock_cloudwatch.return_value.put_monitor_alarms
+        put_monitor_alarms.side_effect = [None, Exception("throttled")]
+
+        res = ControlMonitorUseCase(mock.Mock()).save_monitors(mock_user, mock_aws, monitors)
+
+        mock_user.has_aws_env.assert_called()
+        # SNS連携許可はリージョンごとに1度だけ
+        self.assertEqual(mock_sns.return_value.add_permission.call_count, 2)
+        self.assertEqual(put_monitor_alarms.call_count, 2)
+        self.assertEqual([(r["resource_id"], r["result"]) for r in res],
+                         [("i-1", "succeeded"), ("i-2", "failed"), ("i-3", "failed")])
+        self.assertEqual(res[1]["message"], "throttled")
+
+    # 監視設定一括保存：リクエストユーザーがAWSアカウントを利用できない場合
+    @mock.patch('backend.usecases.control_monitor.CloudWatch')
+    @mock.patch('backend.usecases.control_monitor.Sns')
+    def test_save_monitors_no_aws(self, mock_sns: mock.Mock, mock_cloudwatch: mock.Mock):
+        # mock準備
+        mock_user = mock.Mock()
+        mock_user.has_aws_env.return_value = False
+
+        with self.assertRaises(PermissionDenied):
+            ControlMonitorUseCase(mock.Mock()).save_monitors(mock_user, mock.Mock(), [(mock.Mock(), mock.Mock())])
+
+        mock_sns.return_value.add_permission.assert_not_called()
+        mock_cloudwatch.return_value.put_monitor_alarms.assert_not_called()
+
+    # 監視設定一括削除：正常系
+    @mock.patch('backend.usecases.control_monitor.CloudWatch')
+    def test_delete_monitors(self, mock_cloudwatch: mock.Mock):
+        # mock準備
+        mock_user = mock.Mock()
+        mock_aws = mock.Mock()
+        monitors = [(mock.Mock(region="ap-northeast-1", resource_id="i-1"), "CPUUtilization"),
+                    (mock.Mock(region="us-east-1", resource_id="i-2"), "CPUUtilization")]
+        delete_monitor_alarms = mock_cloudwatch.return_value.delete_monitor_alarms
+        delete_monitor_alarms.side_effect = [[None], [Exception("error")]]
+
+        res = ControlMonitorUseCase(mock.Mock()).delete_monitors(mock_user, mock_aws, monitors)
+
+        mock_user.has_aws_env.assert_called()
+        delete_monitor_alarms.assert_any_call([monitors[0]])
+        delete_monitor_alarms.assert_any_call([monitors[1]])
+        self.assertEqual([(r["resource_id"], r["result"]) for r in res], [("i-1", "succeeded"), ("i-2", "failed")])
+
+    # 監視設定一括保存・削除：操作ログには監視設定ごとの操作対象を記録する
+    def test_target_bulk_info(self):
+        mock_aws = mock.Mock()
+        mock_aws.name = "aws"
+        mock_aws.aws_account_id = "123456789012"
+        mock_resource = mock.Mock(region="ap-northeast-1", resource_id="i-1")
+        mock_resource.get_service_name.return_value = "EC2"
+        mock_monitor = mock.Mock()
+        mock_monitor.metric.name = "CPUUtilization"
+
+        self.assertEqual(ControlMonitorUseCase.target_bulk_info(mock_aws, [(mock_resource, mock_monitor)]),
+                         ["aws_123456789012_ap-northeast-1_EC2_i-1_CPUUtilization"])
+        self.assertEqual(ControlMonitorUseCase.target_bulk_delete_info(mock_aws, [(mock_resource, "StatusCheckFailed")]),
+                         ["aws_123456789012_ap-northeast-1_EC2_i-1_StatusCheckFailed"])
+
     # 監視設定取得：正常系
     @mock.patch('backend.usecases.control_monitor.CloudWatch')
     def test_fetch_monitors(self, mock_cloudwatch: mock.Mock):
@@ -71,6 +149,35 @@ class ControlMonitorTestCase(TestCase):
         mock_user.has_aws_env.assert_called()
         mock_cloudwatch.return_value.describe_resource_monitors.assert_not_called()
 
+    # 複数リソースの監視設定取得：正常系
+    @mock.patch('backend.usecases.control_monitor.CloudWatch')
+    def test_fetch_resources_monitors(self, mock_cloudwatch: mock.Mock):
+        # mock準備
+        mock_user = mock.Mock()
+        mock_aws = mock.Mock()
+        mock_resources = [mock.Mock(), mock.Mock()]
+
+        res = ControlMonitorUseCase(mock.Mock()).fetch_resources_monitors(
+            mock_user, mock_aws, "ap-northeast-1", mock_resources)
+
+        describe_resources_monitors = mock_cloudwatch.return_value.describe_resources_monitors
+        self.assertEqual(res, describe_resources_monitors.return_value)
+        mock_cloudwatch.assert_called_with(mock_aws, "ap-northeast-1")
+        describe_resources_monitors.assert_called_with(mock_resources)
+
+    # 複数リソースの監視設定取得：リクエストユーザーがAWS環境を利用できない場合
+    @mock.patch('backend.usecases.control_monitor.CloudWatch')
+    def test_fetch_resources_monitors_no_aws(self, mock_cloudwatch: mock.Mock):
+        # mock準備
+        mock_user = mock.Mock()
+        mock_user.has_aws_env.return_value = False
+
+        with self.assertRaises(PermissionDenied):
+            ControlMonitorUseCase(mock.Mock()).fetch_resources_monitors(
+                mock_user, mock.Mock(), "ap-northeast-1", [mock.Mock()])
+
+        mock_cloudwatch.return_value.describe_resources_monitors.assert_not_called()
+
     # グラフデータ取得：正常系
     @mock.patch('backend.usecases.control_monitor.CloudWatch')
     def test_graph(self, mock_cloudwatch: mock.Mock):
@@ -131,3 +238,38 @@ class ControlMonitorTestCase(TestCase):
         mock_user.has_aws_env.assert_called()
         mock_resource.get_metrics.assert_called()
         get_chart.assert_not_called()
+
+    # 複数グラフデータ取得：正常系
+    @mock.patch('backend.usecases.control_monitor.CloudWatch')
+    def test_graphs(self, mock_cloudwatch: mock.Mock):
+        # mock準備
+        mock_user = mock.Mock()
+        mock_aws = mock.Mock()
+        mock_resource = mock.Mock(resource_id="i-1")
+        mock_resource.get_metrics.return_value = ["Valid1", "Valid2"]
+        mock_graph1 = mock.Mock(metric_name="Valid1", dimensions=[])
+        mock_graph2 = mock.Mock(metric_name="Valid2", dimensions=[])
+        get_charts = mock_cloudwatch.return_value.get_charts
+
+        res = ControlMonitorUseCase(mock.Mock()).graphs(
+            mock_user, mock_aws, "ap-northeast-1", [(mock_resource, mock_graph1), (mock_resource, mock_graph2)])
+
+        self.assertEqual(res, get_charts.return_value)
+        mock_cloudwatch.assert_called_with(mock_aws, "ap-northeast-1")
+        get_charts.assert_called_once_with([mock_graph1, mock_graph2])
+        self.assertEqual(mock_graph1.service_name, mock_resource.get_namespace.return_value)
+        self.assertEqual(mock_graph2.dimensions, [dict(Name=mock_resource.get_id_name.return_value, Value="i-1")])
+
+    # 複数グラフデータ取得：不正なメトリクスの場合
+    @mock.patch('backend.usecases.control_monitor.CloudWatch')
+    def test_graphs_invalid_metrics(self, mock_cloudwatch: mock.Mock):
+        # mock準備
+        mock_resource = mock.Mock()
+        mock_resource.get_metrics.return_value = ["Valid"]
+        mock_graph = mock.Mock(metric_name="invalid", dimensions=[])
+
+        with self.assertRaises(ObjectDoesNotExist):
+            ControlMonitorUseCase(mock.Mock()).graphs(
+                mock.Mock(), mock.Mock(), "ap-northeast-1", [(mock_resource, mock_graph)])
+
+        mock_cloudwatch.return_value.get_charts.assert_not_called()
@@ -4,7 +4,7 @@ from backend.exceptions import InvalidNotificationException
 from unittest import mock
 # デコレーターをmock化
 with mock.patch('backend.models.OperationLogModel.operation_log', lambda executor_index=None, target_method=None, target_arg_index_list=None: lambda func: func):
-    from backend.usecases.control_notification import ControlNotificationUseCase
+    from backend.usecases.control_notification import ControlNotificationUseCase, NotificationDigestQueue
 
 
 class ControlNotificationTestCase(TestCase):
@@ -28,6 +28,26 @@ class ControlNotificationTestCase(TestCase):
         value_filter.assert_called_once_with(tenant=mock_tenant)
         self.assertEqual(response, expected_value)
 
+    # 通知先取得：通知先の数によらず発行するクエリ数が変わらないこと
+    def test_fetch_destinations_query_count(self):
+        from backend.models import TenantModel, EmailDestination, TelephoneDestination
+        from backend.serializers.notification_destination_serializer import serialize_destinations_detail
+        tenant = TenantModel.objects.create(tenant_name="test_tenant")
+        for i in range(5):
+            EmailDestination.objects.create(name="email", address="test@test.com", tenant=tenant)
+            TelephoneDestination.objects.create(name="telephone", phone_number="080-1234-5678", country_code=81,
+                                                tenant=tenant)
+        mock_user = mock.Mock()
+        mock_user.can_control_notification.return_value = True
+
+        # 通知先、メール通知先、電話通知先
+        with self.assertNumQueries(3):
+            destinations = ControlNotificationUseCase(mock.Mock()).fetch_destinations(mock_user, tenant)
+            data = serialize_destinations_detail(destinations)
+
+        self.assertEqual(len(data), 10)
+        self.assertEqual(data[1]["type"], "telephone")
+
     # 通知先取得：リクエストユーザーが指定されたテナントに属していない場合
     @mock.patch('backend.usecases.control_notification.NotificationDestinationModel')
     def test_fetch_destinations_not_belong_to_tenant(self, mock_dest):
@@ -133,14 +153,45 @@ class ControlNotificationTestCase(TestCase):
         mock_group2 = mock.Mock()
         mock_group3 = mock.Mock()
         expected_value = [mock_group1, mock_group2, mock_group3]
+        mock_group.ALIVE_DESTINATIONS = "alive_destinations"
         objects_filter = mock_group.objects.filter
-        objects_filter.return_value = expected_value
+        objects_filter.return_value.select_related.return_value.prefetch_related.return_value = expected_value
 
         res = ControlNotificationUseCase(mock.Mock()).fetch_groups(mock_user, mock_tenant)
 
         objects_filter.assert_called_once_with(tenant=mock_tenant)
+        objects_filter.return_value.select_related.assert_called_once_with("tenant")
         self.assertEqual(res, expected_value)
 
+    # 通知グループ取得：グループの数によらず発行するクエリ数が変わらないこと
+    def test_fetch_groups_query_count(self):
+        from backend.models import TenantModel, AwsEnvironmentModel, NotificationGroupModel, EmailDestination, \
+            TelephoneDestination
+        from backend.serializers.notification_group_serializer import NotificationGroupModelDetailSerializer
+        tenant = TenantModel.objects.create(tenant_name="test_tenant")
+        for i in range(5):
+            group = NotificationGroupModel.objects.create(name="group{}".format(i), tenant=tenant)
+            email = EmailDestination.objects.create(name="email", address="test@test.com", tenant=tenant)
+            telephone = TelephoneDestination.objects.create(name="telephone", phone_number="080-1234-5678",
+                                                            country_code=81, tenant=tenant)
+            deleted = EmailDestination.objects.create(name="deleted", address="test@test.com", tenant=tenant)
+            group.destinations.add(email, telephone, deleted)
+            deleted.delete()
+            group.aws_environments.add(AwsEnvironmentModel.objects.create(
+                name="aws", aws_account_id=str(i), aws_role="role", aws_external_id="id", tenant=tenant))
+        mock_user = mock.Mock()
+        mock_user.can_control_notification.return_value = True
+
+        # グループとテナント、通知先、メール通知先、電話通知先、AWS環境
+        with self.assertNumQueries(5):
+            groups = ControlNotificationUseCase(mock.Mock()).fetch_groups(mock_user, tenant)
+            data = [NotificationGroupModelDetailSerializer(group).data for group in groups]
+
+        self.assertEqual(len(data), 5)
+        self.assertEqual([dest["type"] for dest in data[0]["destinations"]], ["email", "telephone"])
+        self.assertEqual(data[0]["tenant"]["id"], tenant.id)
+        self.assertEqual(len(data[0]["aws_environments"]), 1)
+
     # 通知グループ取得：リクエストユーザーがUSER権限の場合
     @mock.patch('backend.usecases.control_notification.NotificationGroupModel')
     def test_fetch_groups_user_role(self, mock_group):
@@ -266,14 +317,111 @@ class ControlNotificationTestCase(TestCase):
 
         mock_sns.verify_notification.assert_called_with(data)
 
+    # アラーム状態更新：正常系
+    @mock.patch('backend.usecases.control_notification.AlarmIndexModel')
+    def test_update_alarm_status(self, mock_index):
+        data = dict(AlarmName="NARUKO-EC2-i-1-CPUUtilization-DANGER")
+        ControlNotificationUseCase(mock.Mock()).update_alarm_status(data)
+
+        mock_index.apply_alarm_message.assert_called_once_with(data)
+
     # 通知：正常系
-    def test_notify(self):
+    @mock.patch('backend.usecases.control_notification.NOTIFICATION_DIGEST_QUEUE', mock.Mock(window_seconds=0))
+    @mock.patch('backend.usecases.control_notification.NotificationDestinationModel')
+    def test_notify(self, mock_destination_model):
         mock_message = mock.Mock()
-        mock_group = mock.Mock()
         mock_dest = mock.Mock()
-        mock_group.destinations.filter.return_value = [mock_dest]
-        mock_message.aws.notification_groups.filter.return_value = [mock_group]
+        mock_destination_model.destinations_for.return_value = [mock_dest]
+        mock_destination_model.notify_all.return_value = ["SUCCESS."]
 
         ControlNotificationUseCase(mock.Mock()).notify(
             mock_message
         )
+
+        mock_destination_model.destinations_for.assert_called_once_with(mock_message.aws)
+        mock_destination_model.notify_all.assert_called_once_with([mock_dest], mock_message)
+
+    # 通知：まとめて通知する場合はキューに入れる
+    @mock.patch('backend.usecases.control_notification.NOTIFICATION_DIGEST_QUEUE')
+    @mock.patch('backend.usecases.control_notification.NotificationDestinationModel')
+    def test_notify_queue(self, mock_destination_model, mock_queue):
+        mock_queue.window_seconds = 60
+        mock_message = mock.Mock()
+        mock_dest = mock.Mock()
+        mock_destination_model.destinations_for.return_value = [mock_dest]
+        mock_logger = mock.Mock()
+
+        ControlNotificationUseCase(mock_logger).notify(mock_message)
+
+        mock_queue.put.assert_called_once_with([mock_dest], mock_message, mock_logger)
+        mock_destination_model.notify_all.assert_not_called()
+
+    # まとめ通知：同じ状態変化をためた通知先ごとに送信する
+    @mock.patch('backend.usecases.control_notification.NotificationDestinationModel')
+    def test_notify_digest(self, mock_destination_model):
+        message1 = mock.Mock()
+        message2 = mock.Mock()
+        dest1 = mock.Mock()
+        dest2 = mock.Mock()
+        dest3 = mock.Mock()
+        mock_destination_model.notify_digest_all.return_value = ["SUCCESS.", "SUCCESS."]
+        mock_destination_model.notify_all.return_value = ["SUCCESS."]
+
+        ControlNotificationUseCase(mock.Mock()).notify_digest([
+            (dest1, [message1, message2]),
+            (dest2, [message2]),
+            (dest3, [message1, message2]),
+        ])
+
+        mock_destination_model.notify_digest_all.assert_called_once_with([dest1, dest3], [message1, message2])
+        mock_destination_model.notify_all.assert_called_once_with([dest2], message2)
+
+
+class NotificationDigestQueueTestCase(TestCase):
+
+    @staticmethod
+    def _message(danger=False):
+        message = mock.Mock()
+        message.is_danger.return_value = danger
+        return message
+
+    # 通知先ごとに状態変化をため、最初の状態変化から一定時間後にまとめて通知する
+    @mock.patch('backend.usecases.control_notification.threading.Timer')
+    def test_put(self, mock_timer):
+        queue = NotificationDigestQueue(60, True)
+        dest1 = mock.Mock(tenant_id=1, id=1)
+        dest2 = mock.Mock(tenant_id=1, id=2)
+        message1 = self._message()
+        message2 = self._message()
+
+        queue.put([dest1, dest2], message1, mock.Mock())
+        queue.put([dest1], message2, mock.Mock())
+
+        mock_timer.assert_called_once_with(60, queue.flush)
+        with mock.patch('backend.usecases.control_notification.ControlNotificationUseCase') as mock_use_case:
+            queue.flush()
+        mock_use_case.return_value.notify_digest.assert_called_once_with([
+            (dest1, [message1, message2]),
+            (dest2, [message1])
+        ])
+
+    # 危険レベルの状態変化を受け付けた場合は待たずに通知する
+    @mock.patch('backend.usecases.control_notification.threading.Timer')
+    def test_put_escalate(self, mock_timer):
+        queue = NotificationDigestQueue(60, True)
+        dest = mock.Mock(tenant_id=1, id=1)
+
+        queue.put([dest], self._message(), mock.Mock())
+        queue.put([dest], self._message(danger=True), mock.Mock())
+
+        mock_timer.return_value.cancel.assert_called_once_with()
+        self.assertEqual(mock_timer.call_args_list, [mock.call(60, queue.flush), mock.call(0, queue.flush)])
+
+    # 通知先がない場合は何もしない
+    @mock.patch('backend.usecases.control_notification.threading.Timer')
+    def test_put_no_destinations(self, mock_timer):
+        queue = NotificationDigestQueue(60, True)
+
+        queue.put([], self._message(), mock.Mock())
+
+        mock_timer.assert_not_called()
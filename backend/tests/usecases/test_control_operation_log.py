@@ -1,6 +1,7 @@
 from django.core.exceptions import PermissionDenied
 from django.test import TestCase
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, patch, call
+from datetime import datetime
 from backend.usecases.control_operation_log import ControlOperationLog
 
 
@@ -18,7 +19,8 @@ class ControlOperationLogTestCase(TestCase):
         mock_user.is_belong_to_tenant.assert_called_once()
         mock_user.can_control_other_user.assert_called_once()
         objects_filter.assert_called_once_with(tenant=mock_tenant)
-        self.assertEqual(res, objects_filter.return_value)
+        objects_filter.return_value.select_related.assert_called_once_with("tenant", "executor")
+        self.assertEqual(res, objects_filter.return_value.select_related.return_value.order_by.return_value)
 
     # 正常系 他のユーザーを管理できない場合
     @patch('backend.usecases.control_operation_log.OperationLogModel')
@@ -33,7 +35,28 @@ class ControlOperationLogTestCase(TestCase):
         mock_user.is_belong_to_tenant.assert_called_once()
         mock_user.can_control_other_user.assert_called_once()
         objects_filter.assert_called_once_with(tenant=mock_tenant, executor=mock_user)
-        self.assertEqual(res, objects_filter.return_value)
+        self.assertEqual(res, objects_filter.return_value.select_related.return_value.order_by.return_value)
+
+    # 正常系 絞り込み条件を指定した場合
+    @patch('backend.usecases.control_operation_log.OperationLogModel')
+    def test_fetch_logs_filter(self, mock_log_model):
+        mock_user = Mock()
+        mock_tenant = Mock()
+        logs = mock_log_model.objects.filter.return_value
+        logs.filter.return_value = logs
+        since = datetime(2019, 1, 1)
+        until = datetime(2019, 2, 1)
+
+        ControlOperationLog(Mock()).fetch_logs(mock_user, mock_tenant, executor_id=1, operation="create_user",
+                                               since=since, until=until)
+
+        self.assertEqual(logs.filter.call_args_list, [
+            call(executor_id=1),
+            call(operation__startswith="create_user"),
+            call(created_at__gte=since),
+            call(created_at__lt=until)
+        ])
+        logs.select_related.return_value.order_by.assert_called_once_with("-created_at", "-id")
 
     # テナントに属していない場合
     @patch('backend.usecases.control_operation_log.OperationLogModel')
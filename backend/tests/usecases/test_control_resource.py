@@ -1,7 +1,15 @@
 from django.core.exceptions import PermissionDenied
 from django.test import TestCase
+from django.utils import timezone
 from backend.models import UserModel, AwsEnvironmentModel
+from backend.models.resource.command import Document
+from backend.models.resource.ec2 import Ec2
+from backend.models.resource.elb import Elb
+from backend.models.resource.rds import Rds
+from botocore.exceptions import ClientError
+from datetime import timedelta
 from unittest import mock
+import time
 # デコレーターをmock化
 with mock.patch('backend.models.OperationLogModel.operation_log', lambda executor_index=None, target_method=None, target_arg_index_list=None: lambda func: func):
     from backend.usecases.control_resource import ControlResourceUseCase
@@ -10,9 +18,10 @@ with mock.patch('backend.models.OperationLogModel.operation_log', lambda executo
 class ControlResourceTestCase(TestCase):
 
     # 正常系
+    @mock.patch('backend.usecases.control_resource.Ssm')
     @mock.patch('backend.usecases.control_resource.CloudWatch')
     @mock.patch('backend.usecases.control_resource.ResourceGroupTagging')
-    def test_fetch_resources(self, mock_tag: mock.Mock, mock_cloudwatch: mock.Mock):
+    def test_fetch_resources(self, mock_tag: mock.Mock, mock_cloudwatch: mock.Mock, mock_ssm: mock.Mock):
         mock_user = mock.Mock(spec=UserModel)
         mock_aws = mock.Mock(spec=AwsEnvironmentModel)
         region = "region"
@@ -36,6 +45,8 @@ class ControlResourceTestCase(TestCase):
         mock_resource3.resource_id = "elb"
         mock_resource4 = mock.Mock()
         mock_resource4.get_service_name.return_value = "EC2"
+        mock_resource4.resource_id = "ec2-2"
+        mock_ssm.return_value.get_managed_instance_ids.return_value = frozenset(["ec2"])
         tag_return_value.get_resources.return_value = [[
             mock_resource1, mock_resource2, mock_resource3, mock_resource4
         ], []]
@@ -58,6 +69,9 @@ class ControlResourceTestCase(TestCase):
             mock_resource3.status,
             mock_resource4.status
         ])
+        # SSMエージェントの有無はEC2インスタンスにだけ設定する
+        self.assertEqual([True, False], [mock_resource1.has_ssm_agent, mock_resource4.has_ssm_agent])
+        mock_ssm.assert_called_once_with(aws_environment=mock_aws, region=region)
 
         # 呼び出し検証
         mock_user.has_aws_env.assert_called_with(mock_aws)
@@ -73,6 +87,25 @@ class ControlResourceTestCase(TestCase):
         cloudwatch_return_value.get_resources_status.assert_called()
         tag_return_value.get_resources.assert_called()
 
+    # SSMエージェントの一覧が取得できない場合は不明のままにする
+    @mock.patch('backend.usecases.control_resource.Ssm')
+    @mock.patch('backend.usecases.control_resource.CloudWatch')
+    @mock.patch('backend.usecases.control_resource.ResourceGroupTagging')
+    def test_fetch_resources_ssm_error(self, mock_tag: mock.Mock, mock_cloudwatch: mock.Mock, mock_ssm: mock.Mock):
+        mock_resource = mock.Mock(spec=Ec2("region", "ec2"))
+        mock_resource.get_service_name.return_value = "EC2"
+        mock_resource.resource_id = "ec2"
+        mock_resource.has_ssm_agent = None
+        mock_tag.return_value.get_resources.return_value = [[mock_resource]]
+        mock_cloudwatch.return_value.get_resources_status.return_value = {"EC2": {}, "RDS": {}, "ELB": {}}
+        mock_ssm.return_value.get_managed_instance_ids.side_effect = ClientError(
+            dict(Error=dict(Code="AccessDeniedException")), "DescribeInstanceInformation")
+
+        resp = ControlResourceUseCase(mock.Mock()).fetch_resources(mock.Mock(spec=UserModel), mock.Mock(), "region")
+
+        self.assertEqual(resp, [mock_resource])
+        self.assertIsNone(mock_resource.has_ssm_agent)
+
     # ユーザーがテナントに属していない場合
     @mock.patch('backend.usecases.control_resource.CloudWatch')
     @mock.patch('backend.usecases.control_resource.ResourceGroupTagging')
@@ -121,6 +154,181 @@ class ControlResourceTestCase(TestCase):
         cloudwatch_return_value.get_resources_status.assert_not_called()
         tag_return_value.get_resources.assert_not_called()
 
+    # 全リージョン取得：正常系
+    @mock.patch('backend.usecases.control_resource.Ssm')
+    @mock.patch('backend.usecases.control_resource.CloudWatch')
+    @mock.patch('backend.usecases.control_resource.ResourceGroupTagging')
+    def test_fetch_resources_all_regions(self, mock_tag: mock.Mock, mock_cloudwatch: mock.Mock, mock_ssm: mock.Mock):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+
+        # mockの準備：リージョンごとにリソースを返す
+        def create_tagging(aws_environment, region):
+            tagging = mock.Mock()
+            resource = mock.Mock()
+            resource.get_service_name.return_value = "EC2"
+            resource.resource_id = region
+            tagging.get_resources.return_value = [[resource]]
+            return tagging
+        mock_tag.side_effect = create_tagging
+        mock_cloudwatch.return_value.get_resources_status.return_value = {
+            "EC2": {"region1": "DANGER"}, "RDS": {}, "ELB": {}
+        }
+
+        # 検証対象の実行
+        resources, errors = ControlResourceUseCase(mock.Mock()).fetch_resources_all_regions(
+            mock_user, mock_aws, ["region1", "region2"])
+
+        # 戻り値の検証
+        self.assertEqual(["region1", "region2"], [resource.resource_id for resource in resources])
+        self.assertEqual(["DANGER", "UNSET"], [resource.status for resource in resources])
+        self.assertEqual([], errors)
+
+        # 呼び出し検証
+        mock_user.has_aws_env.assert_called_with(mock_aws)
+        self.assertEqual(2, mock_tag.call_count)
+        self.assertEqual(2, mock_cloudwatch.call_count)
+
+    # 全リージョン取得：リージョン指定がない場合は全リージョンを対象とする
+    @mock.patch('backend.usecases.control_resource.CloudWatch')
+    @mock.patch('backend.usecases.control_resource.ResourceGroupTagging')
+    def test_fetch_resources_all_regions_default(self, mock_tag: mock.Mock, mock_cloudwatch: mock.Mock):
+        from backend.models import Resource
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+        mock_tag.return_value.get_resources.return_value = [[]]
+
+        # 検証対象の実行
+        resources, errors = ControlResourceUseCase(mock.Mock()).fetch_resources_all_regions(mock_user, mock_aws)
+
+        # 戻り値の検証
+        self.assertEqual([], resources)
+        self.assertEqual([], errors)
+
+        # 呼び出し検証
+        self.assertEqual(sorted(Resource.get_all_regions()),
+                         sorted(call[1]["region"] for call in mock_tag.call_args_list))
+        mock_cloudwatch.assert_not_called()
+
+    # 全リージョン取得：一部のリージョンで失敗した場合
+    @mock.patch('backend.usecases.control_resource.Ssm')
+    @mock.patch('backend.usecases.control_resource.CloudWatch')
+    @mock.patch('backend.usecases.control_resource.ResourceGroupTagging')
+    def test_fetch_resources_all_regions_partial_failure(self, mock_tag: mock.Mock, mock_cloudwatch: mock.Mock,
+                                                         mock_ssm: mock.Mock):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+
+        # mockの準備：region2のみ失敗する
+        def create_tagging(aws_environment, region):
+            if region == "region2":
+                raise Exception("error")
+            tagging = mock.Mock()
+            resource = mock.Mock()
+            resource.get_service_name.return_value = "EC2"
+            resource.resource_id = region
+            tagging.get_resources.return_value = [[resource]]
+            return tagging
+        mock_tag.side_effect = create_tagging
+        mock_cloudwatch.return_value.get_resources_status.return_value = {"EC2": {}, "RDS": {}, "ELB": {}}
+
+        # 検証対象の実行
+        resources, errors = ControlResourceUseCase(mock.Mock()).fetch_resources_all_regions(
+            mock_user, mock_aws, ["region1", "region2"])
+
+        # 戻り値の検証
+        self.assertEqual(["region1"], [resource.resource_id for resource in resources])
+        self.assertEqual([dict(region="region2", message="error")], errors)
+
+    # 全リージョン取得：タイムアウトした場合
+    @mock.patch('backend.usecases.control_resource.settings')
+    @mock.patch('backend.usecases.control_resource.CloudWatch')
+    @mock.patch('backend.usecases.control_resource.ResourceGroupTagging')
+    def test_fetch_resources_all_regions_timeout(self, mock_tag: mock.Mock, mock_cloudwatch: mock.Mock,
+                                                 mock_settings: mock.Mock):
+        import threading
+        mock_settings.RESOURCE_FETCH_MAX_WORKERS = 2
+        mock_settings.RESOURCE_FETCH_REGION_TIMEOUT = 0.1
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+        event = threading.Event()
+
+        # mockの準備：region2は応答しない
+        def create_tagging(aws_environment, region):
+            if region == "region2":
+                event.wait(5)
+            tagging = mock.Mock()
+            tagging.get_resources.return_value = [[]]
+            return tagging
+        mock_tag.side_effect = create_tagging
+
+        # 検証対象の実行
+        try:
+            resources, errors = ControlResourceUseCase(mock.Mock()).fetch_resources_all_regions(
+                mock_user, mock_aws, ["region1", "region2"])
+        finally:
+            event.set()
+
+        # 戻り値の検証
+        self.assertEqual([], resources)
+        self.assertEqual([dict(region="region2", message="timeout")], errors)
+
+    # 全リージョン取得：タイムアウトはリージョンごとに数え、後続のリージョンは取得できる
+    @mock.patch('backend.usecases.control_resource.Ssm')
+    @mock.patch('backend.usecases.control_resource.settings')
+    @mock.patch('backend.usecases.control_resource.CloudWatch')
+    @mock.patch('backend.usecases.control_resource.ResourceGroupTagging')
+    def test_fetch_resources_all_regions_timeout_per_region(self, mock_tag: mock.Mock, mock_cloudwatch: mock.Mock,
+                                                            mock_settings: mock.Mock, mock_ssm: mock.Mock):
+        import threading
+        mock_settings.RESOURCE_FETCH_MAX_WORKERS = 1
+        mock_settings.RESOURCE_FETCH_REGION_TIMEOUT = 0.1
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+        event = threading.Event()
+
+        # mockの準備：region1は応答せず、region2は期限の半分以上かかる
+        def create_tagging(aws_environment, region):
+            if region == "region1":
+                event.wait(5)
+            else:
+                time.sleep(0.06)
+            tagging = mock.Mock()
+            resource = mock.Mock()
+            resource.get_service_name.return_value = "EC2"
+            resource.resource_id = region
+            tagging.get_resources.return_value = [[resource]]
+            return tagging
+        mock_tag.side_effect = create_tagging
+        mock_cloudwatch.return_value.get_resources_status.return_value = {"EC2": {}, "RDS": {}, "ELB": {}}
+
+        # 検証対象の実行
+        try:
+            resources, errors = ControlResourceUseCase(mock.Mock()).fetch_resources_all_regions(
+                mock_user, mock_aws, ["region1", "region2"])
+        finally:
+            event.set()
+
+        # 戻り値の検証
+        self.assertEqual(["region2"], [resource.resource_id for resource in resources])
+        self.assertEqual([dict(region="region1", message="timeout")], errors)
+
+    # 全リージョン取得：ユーザーがAWS環境を利用できない場合
+    @mock.patch('backend.usecases.control_resource.CloudWatch')
+    @mock.patch('backend.usecases.control_resource.ResourceGroupTagging')
+    def test_fetch_resources_all_regions_cant_use_aws_env(self, mock_tag: mock.Mock, mock_cloudwatch: mock.Mock):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_user.has_aws_env.return_value = False
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+
+        # 検証対象の実行
+        with self.assertRaises(PermissionDenied):
+            ControlResourceUseCase(mock.Mock()).fetch_resources_all_regions(mock_user, mock_aws)
+
+        # 呼び出し検証
+        mock_tag.assert_not_called()
+        mock_cloudwatch.assert_not_called()
+
     # リソース起動
     def test_start_resource(self):
         mock_user = mock.Mock(spec=UserModel)
@@ -407,37 +615,258 @@ class ControlResourceTestCase(TestCase):
         mock_user.is_belong_to_tenant.assert_called_once()
         mock_user.has_aws_env.assert_called_once()
 
+    # 一括操作：EC2はリージョンごとにまとめて実行し、それ以外はリソースごとに実行する
+    @mock.patch("backend.models.resource.rds.Rds.start")
+    @mock.patch("backend.models.resource.ec2.Ec2.power_instances")
+    def test_power_resources(self, mock_power_instances, mock_rds_start):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+        resources = [
+            Ec2("ap-northeast-1", "i-1"),
+            Rds("ap-northeast-1", "db-1"),
+            Ec2("ap-northeast-1", "i-2"),
+            Ec2("us-east-1", "i-3"),
+        ]
+
+        # 検証対象の実行
+        res = ControlResourceUseCase(mock.Mock()).power_resources(mock_user, mock_aws, "start", resources)
+
+        mock_user.is_belong_to_tenant.assert_called_once_with(mock_aws.tenant)
+        mock_user.has_aws_env.assert_called_once_with(mock_aws)
+        self.assertEqual(mock_power_instances.call_args_list, [
+            mock.call(mock_aws, "ap-northeast-1", "start", ["i-1", "i-2"]),
+            mock.call(mock_aws, "us-east-1", "start", ["i-3"]),
+        ])
+        mock_rds_start.assert_called_once_with(mock_aws)
+        self.assertEqual([(result["resource_id"], result["result"]) for result in res],
+                         [("i-1", "succeeded"), ("db-1", "succeeded"), ("i-2", "succeeded"), ("i-3", "succeeded")])
+
+    # 一括操作：まとめて実行できなかった場合は1台ずつ実行して失敗したものを特定する
+    @mock.patch("backend.models.resource.ec2.Ec2.stop")
+    @mock.patch("backend.models.resource.ec2.Ec2.power_instances")
+    def test_power_resources_partial_failure(self, mock_power_instances, mock_ec2_stop):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+        mock_power_instances.side_effect = Exception("InvalidInstanceID")
+        mock_ec2_stop.side_effect = [None, Exception("InvalidInstanceID")]
+        resources = [Ec2("ap-northeast-1", "i-1"), Ec2("ap-northeast-1", "i-2"), Elb("ap-northeast-1", "elb")]
+
+        # 検証対象の実行
+        res = ControlResourceUseCase(mock.Mock()).power_resources(mock_user, mock_aws, "stop", resources)
+
+        mock_power_instances.assert_called_once()
+        self.assertEqual(mock_ec2_stop.call_count, 2)
+        self.assertEqual([(result["resource_id"], result["result"]) for result in res],
+                         [("i-1", "succeeded"), ("i-2", "failed"), ("elb", "failed")])
+        self.assertEqual(res[1]["message"], "InvalidInstanceID")
+
+    # 一括操作：操作ログにはリソースごとの操作対象を記録する
+    def test_target_bulk_info(self):
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+        mock_aws.name = "aws"
+        mock_aws.aws_account_id = "123456789012"
+
+        res = ControlResourceUseCase.target_bulk_info(
+            mock_aws, "start", [Ec2("ap-northeast-1", "i-1"), Rds("us-east-1", "db-1")])
+
+        self.assertEqual(res, ["aws_123456789012_start_ap-northeast-1_EC2_i-1",
+                               "aws_123456789012_start_us-east-1_RDS_db-1"])
+
+    # 一括操作：不正な操作の場合
+    @mock.patch("backend.models.resource.ec2.Ec2.power_instances")
+    def test_power_resources_invalid_action(self, mock_power_instances):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+
+        # 検証対象の実行
+        with self.assertRaises(ValueError):
+            ControlResourceUseCase(mock.Mock()).power_resources(
+                mock_user, mock_aws, "terminate", [Ec2("ap-northeast-1", "i-1")])
+
+        mock_power_instances.assert_not_called()
+
+    # 一括操作：AWSを使用できない場合
+    @mock.patch("backend.models.resource.ec2.Ec2.power_instances")
+    def test_power_resources_no_aws(self, mock_power_instances):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_user.has_aws_env.return_value = False
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+
+        # 検証対象の実行
+        with self.assertRaises(PermissionDenied):
+            ControlResourceUseCase(mock.Mock()).power_resources(
+                mock_user, mock_aws, "start", [Ec2("ap-northeast-1", "i-1")])
+
+        mock_power_instances.assert_not_called()
+
     # コマンド実行：正常系
-    def test_run_command(self):
+    @mock.patch("backend.usecases.control_resource.COMMAND_POLLER")
+    @mock.patch("backend.usecases.control_resource.CommandJobModel")
+    def test_run_command(self, mock_job_model, mock_poller):
         mock_user = mock.Mock(spec=UserModel)
         mock_aws = mock.Mock(spec=AwsEnvironmentModel)
         mock_command = mock.Mock()
 
         # 検証対象の実行
-        res = ControlResourceUseCase(mock.Mock()).run_command(mock_user, mock_aws, mock_command)
+        use_case = ControlResourceUseCase(mock.Mock())
+        res = use_case.run_command(mock_user, mock_aws, mock_command)
 
         mock_user.is_belong_to_tenant.assert_called_once_with(mock_aws.tenant)
         mock_user.has_aws_env.assert_called_once_with(mock_aws)
         mock_command.run.assert_called_once_with(mock_aws)
+        mock_job_model.create_job.assert_called_once_with(mock_aws, mock_command)
+        # 実行状況の確認はバックグラウンドで行う
+        mock_poller.submit.assert_called_once_with(
+            use_case._poll_command_job, mock_aws, mock_job_model.create_job.return_value.id)
         self.assertEqual(res, mock_command)
 
+    # コマンド実行：AWSを使用できない場合
+    @mock.patch("backend.usecases.control_resource.COMMAND_POLLER")
+    @mock.patch("backend.usecases.control_resource.CommandJobModel")
+    def test_run_command_no_aws(self, mock_job_model, mock_poller):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_user.has_aws_env.return_value = False
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+        mock_command = mock.Mock()
+
+        # 検証対象の実行
+        with self.assertRaises(PermissionDenied):
+            ControlResourceUseCase(mock.Mock()).run_command(mock_user, mock_aws, mock_command)
+
+        mock_command.run.assert_not_called()
+        mock_job_model.create_job.assert_not_called()
+        mock_poller.submit.assert_not_called()
+
+    # コマンドの実行状況の確認：終了するまで間隔を倍にしながら確認する
+    @mock.patch("backend.usecases.control_resource.connection")
+    @mock.patch("backend.usecases.control_resource.time")
+    @mock.patch("backend.usecases.control_resource.Ssm")
+    @mock.patch("backend.usecases.control_resource.CommandJobModel")
+    def test_poll_command_job(self, mock_job_model, mock_ssm, mock_time, mock_connection):
+        mock_time.time.return_value = 0
+        mock_job = mock_job_model.objects.get.return_value
+        mock_job.is_finished.side_effect = [False, False, True]
+
+        # 検証対象の実行
+        with self.settings(SSM_COMMAND_POLL_INITIAL_SECONDS=1, SSM_COMMAND_POLL_MAX_SECONDS=3,
+                           SSM_COMMAND_POLL_TIMEOUT_SECONDS=3600):
+            ControlResourceUseCase(mock.Mock())._poll_command_job(mock.Mock(), 1)
+
+        self.assertEqual(mock_time.sleep.call_args_list, [mock.call(1), mock.call(2), mock.call(3)])
+        self.assertEqual(mock_job.update_invocations.call_count, 3)
+        mock_ssm.return_value.list_command_invocations.assert_called_with(mock_job.command_id)
+        mock_connection.close.assert_called_once()
+
+    # コマンドの実行状況の確認：設定された時間を超えたら確認をやめる
+    @mock.patch("backend.usecases.control_resource.connection")
+    @mock.patch("backend.usecases.control_resource.time")
+    @mock.patch("backend.usecases.control_resource.Ssm")
+    @mock.patch("backend.usecases.control_resource.CommandJobModel")
+    def test_poll_command_job_timeout(self, mock_job_model, mock_ssm, mock_time, mock_connection):
+        mock_time.time.side_effect = [0, 10, 3600]
+        mock_job = mock_job_model.objects.get.return_value
+        mock_job.is_finished.return_value = False
+        # 確認に失敗しても確認を続ける
+        mock_ssm.return_value.list_command_invocations.side_effect = [Exception(), []]
+
+        # 検証対象の実行
+        with self.settings(SSM_COMMAND_POLL_INITIAL_SECONDS=1, SSM_COMMAND_POLL_MAX_SECONDS=30,
+                           SSM_COMMAND_POLL_TIMEOUT_SECONDS=3600):
+            ControlResourceUseCase(mock.Mock())._poll_command_job(mock.Mock(), 1)
+
+        self.assertEqual(mock_time.sleep.call_count, 2)
+        mock_job.update_invocations.assert_called_once_with([])
+        mock_connection.close.assert_called_once()
+
+    # コマンドの実行状況取得：確認が止まっている場合はSSMから取得する
+    @mock.patch("backend.usecases.control_resource.Ssm")
+    @mock.patch("backend.usecases.control_resource.CommandJobModel")
+    def test_fetch_command_job_stale(self, mock_job_model, mock_ssm):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+        mock_job = mock_job_model.objects.get.return_value
+        mock_job.is_finished.return_value = False
+        mock_job.polled_at = timezone.now() - timedelta(minutes=5)
+
+        # 検証対象の実行
+        res = ControlResourceUseCase(mock.Mock()).fetch_command_job(mock_user, mock_aws, "region", "command_id")
+
+        mock_job_model.objects.get.assert_called_once_with(aws_environment=mock_aws, region="region",
+                                                           command_id="command_id")
+        mock_job.update_invocations.assert_called_once_with(
+            mock_ssm.return_value.list_command_invocations.return_value)
+        self.assertEqual(res, mock_job)
+
+    # コマンドの実行状況取得：バックグラウンドで確認中の場合はDBの内容を返す
+    @mock.patch("backend.usecases.control_resource.Ssm")
+    @mock.patch("backend.usecases.control_resource.CommandJobModel")
+    def test_fetch_command_job(self, mock_job_model, mock_ssm):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+        mock_job = mock_job_model.objects.get.return_value
+        mock_job.is_finished.return_value = False
+        mock_job.polled_at = timezone.now()
+
+        # 検証対象の実行
+        res = ControlResourceUseCase(mock.Mock()).fetch_command_job(mock_user, mock_aws, "region", "command_id")
+
+        mock_job.update_invocations.assert_not_called()
+        mock_ssm.assert_not_called()
+        self.assertEqual(res, mock_job)
+
+    # コマンドの実行状況取得：テナントに属していない場合
+    @mock.patch("backend.usecases.control_resource.CommandJobModel")
+    def test_fetch_command_job_not_belong_to_tenant(self, mock_job_model):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_user.is_belong_to_tenant.return_value = False
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+
+        # 検証対象の実行
+        with self.assertRaises(PermissionDenied):
+            ControlResourceUseCase(mock.Mock()).fetch_command_job(mock_user, mock_aws, "region", "command_id")
+
+        mock_user.has_aws_env.assert_not_called()
+        mock_job_model.objects.get.assert_not_called()
+
     # ドキュメント一覧取得
     @mock.patch("backend.usecases.control_resource.Ssm")
     def test_fetch_documents(self, mock_ssm):
         mock_user = mock.Mock(spec=UserModel)
         mock_aws = mock.Mock(spec=AwsEnvironmentModel)
 
-        list_documents = mock_ssm.return_value.list_documents
-        list_documents.return_value = [[1, 2, 3], [4, 5, 6]]
+        get_document_catalog = mock_ssm.return_value.get_document_catalog
+        get_document_catalog.return_value = [1, 2, 3, 4, 5, 6]
 
         # 検証対象の実行
         res = ControlResourceUseCase(mock.Mock()).fetch_documents(mock_user, mock_aws, "region")
 
         mock_user.is_belong_to_tenant.assert_called_once_with(mock_aws.tenant)
         mock_user.has_aws_env.assert_called_once_with(mock_aws)
-        list_documents.assert_called()
+        get_document_catalog.assert_called()
         self.assertEqual(res, [1, 2, 3, 4, 5, 6])
 
+    # ドキュメント一覧取得：絞り込み
+    @mock.patch("backend.usecases.control_resource.Ssm")
+    def test_fetch_documents_filter(self, mock_ssm):
+        mock_user = mock.Mock(spec=UserModel)
+        mock_aws = mock.Mock(spec=AwsEnvironmentModel)
+        mock_aws.aws_account_id = "123456789012"
+
+        documents = [
+            Document("AWS-RunShellScript", owner="Amazon", platform_types=["Linux", "MacOS"]),
+            Document("AWS-RunPowerShellScript", owner="Amazon", platform_types=["Windows", "Linux"]),
+            Document("Custom-RunShellScript", owner="123456789012", platform_types=["Linux"]),
+        ]
+        mock_ssm.return_value.get_document_catalog.return_value = documents
+
+        # 検証対象の実行
+        use_case = ControlResourceUseCase(mock.Mock())
+        self.assertEqual(use_case.fetch_documents(mock_user, mock_aws, "region", owner="Self"), [documents[2]])
+        self.assertEqual(use_case.fetch_documents(mock_user, mock_aws, "region", owner="Amazon", platform="Linux"),
+                         documents[:2])
+        self.assertEqual(use_case.fetch_documents(mock_user, mock_aws, "region", name_prefix="AWS-RunShell"),
+                         [documents[0]])
+
     # ドキュメント一覧取得：リクエストユーザーがテナントに属していない場合
     @mock.patch("backend.usecases.control_resource.Ssm")
     def test_fetch_documents_not_belong_to_tenant(self, mock_ssm):
@@ -445,8 +874,8 @@ class ControlResourceTestCase(TestCase):
         mock_user.is_belong_to_tenant.return_value = False
         mock_aws = mock.Mock(spec=AwsEnvironmentModel)
 
-        list_documents = mock_ssm.return_value.list_documents
-        list_documents.return_value = [[1, 2, 3], [4, 5, 6]]
+        get_document_catalog = mock_ssm.return_value.get_document_catalog
+        get_document_catalog.return_value = [1, 2, 3, 4, 5, 6]
 
         # 検証対象の実行
         with self.assertRaises(PermissionDenied):
@@ -454,7 +883,7 @@ class ControlResourceTestCase(TestCase):
 
         mock_user.is_belong_to_tenant.assert_called_once_with(mock_aws.tenant)
         mock_user.has_aws_env.assert_not_called()
-        list_documents.assert_not_called()
+        get_document_catalog.assert_not_called()
 
     # ドキュメント一覧取得：AWS環境が使用できない場合
     @mock.patch("backend.usecases.control_resource.Ssm")
@@ -463,8 +892,8 @@ class ControlResourceTestCase(TestCase):
         mock_user.has_aws_env.return_value = False
         mock_aws = mock.Mock(spec=AwsEnvironmentModel)
 
-        list_documents = mock_ssm.return_value.list_documents
-        list_documents.return_value = [[1, 2, 3], [4, 5, 6]]
+        get_document_catalog = mock_ssm.return_value.get_document_catalog
+        get_document_catalog.return_value = [1, 2, 3, 4, 5, 6]
 
         # 検証対象の実行
         with self.assertRaises(PermissionDenied):
@@ -472,7 +901,7 @@ class ControlResourceTestCase(TestCase):
 
         mock_user.is_belong_to_tenant.assert_called_once_with(mock_aws.tenant)
         mock_user.has_aws_env.assert_called_once_with(mock_aws)
-        list_documents.assert_not_called()
+        get_document_catalog.assert_not_called()
 
     # ドキュメント詳細取得
     @mock.patch("backend.usecases.control_resource.Ssm")
@@ -16,7 +16,7 @@ class ControlTenantTestCase(TestCase):
         mock_tenant2 = mock.Mock(spec=TenantModel)
         mock_tenant3 = mock.Mock(spec=TenantModel)
         expected_response = [mock_tenant1, mock_tenant2, mock_tenant3]
-        mock_tenant.objects.all.return_value = expected_response
+        mock_tenant.objects.prefetch_related.return_value = expected_response
         response = ControlTenantUseCase(mock.Mock()).fetch_tenants(mock_user)
 
         mock_user.can_control_tenant.assert_called_once()
@@ -130,6 +130,31 @@ class DocumentViewSetTestCase(TestCase):
         fetch_documents.assert_called_once()
         self.assertEqual(response.status_code, 200)
 
+    # 絞り込みとページング
+    def test_list_documents_paging(self, use_case: mock.Mock):
+        client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        client.force_authenticate(user=user_model)
+
+        # Company1のIDを取得
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+        # AWS環境のIDを取得
+        aws_id = AwsEnvironmentModel.objects.get(aws_account_id="test_aws1").id
+
+        fetch_documents = use_case.return_value.fetch_documents
+        fetch_documents.return_value = [Document(name="document{}".format(i)) for i in range(5)]
+
+        # 検証対象の実行
+        response = client.get(
+            path=self.api_path.format(tenant_id, aws_id, ""),
+            data=dict(owner="Amazon", name_prefix="AWS-", platform="Linux", limit=2, offset=2),
+            format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(fetch_documents.call_args[1], dict(owner="Amazon", name_prefix="AWS-", platform="Linux"))
+        self.assertEqual(response.data["count"], 5)
+        self.assertEqual([document["name"] for document in response.data["results"]], ["document2", "document3"])
+
     # AWS環境が存在しない場合
     def test_list_documents_no_aws_env(self, use_case: mock.Mock):
         client = APIClient()
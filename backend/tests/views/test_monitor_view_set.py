@@ -399,3 +399,197 @@ class MonitorViewSetTestCase(TestCase):
         use_case.assert_not_called()
         graph.assert_not_called()
         self.assertEqual(response.status_code, 400)
+
+    # グラフデータ取得：集計方法が不正の場合
+    def test_graph_invalid_aggregation(self, use_case: mock.Mock):
+        client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        client.force_authenticate(user=user_model)
+
+        # Company1のIDを取得
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+        # AWS環境のIDを取得
+        aws_id = AwsEnvironmentModel.objects.get(aws_account_id="test_aws1").id
+
+        # 検証対象の実行
+        response = client.post(
+            path=self.api_path.format(tenant_id, aws_id) + "NetworkOut/graph/",
+            data={
+                "start_time": "2018-12-01 00:00:00",
+                "end_time": "2018-12-02 00:00:00",
+                "period": 300,
+                "stat": "Average",
+                "max_points": 100,
+                "aggregation": "invalid"
+            },
+            format='json')
+
+        use_case.return_value.graph.assert_not_called()
+        self.assertEqual(response.status_code, 400)
+
+
+@mock.patch("backend.views.monitor_view_set.ControlMonitorUseCase")
+class BulkMonitorViewSetTestCase(TestCase):
+
+    api_path = '/api/tenants/{}/aws-environments/{}/monitors/'
+
+    @classmethod
+    def setUpClass(cls):
+        super(BulkMonitorViewSetTestCase, cls).setUpClass()
+        role_model = MonitorViewSetTestCase._create_role_model(2, "test_role")
+        tenant_model = MonitorViewSetTestCase._create_tenant_model("test_tenant_users_in_tenant_1")
+        aws = MonitorViewSetTestCase._create_aws_env_model("test_name1", "test_aws1", tenant_model)
+        user = MonitorViewSetTestCase._create_user_model(
+            email="test_email",
+            name="test_name",
+            password="test_password",
+            tenant=tenant_model,
+            role=role_model,
+        )
+        user.aws_environments.add(aws)
+
+    def _login(self):
+        client = APIClient()
+        client.force_authenticate(user=UserModel.objects.get(email="test_email"))
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+        aws_id = AwsEnvironmentModel.objects.get(aws_account_id="test_aws1").id
+        return client, self.api_path.format(tenant_id, aws_id)
+
+    # 監視設定一括作成
+    def test_create_monitors(self, use_case: mock.Mock):
+        client, path = self._login()
+        save_monitors = use_case.return_value.save_monitors
+        save_monitors.return_value = [dict(region="ap-northeast-1", service="EC2", resource_id="i-1",
+                                           metric_name="CPUUtilization", result="succeeded", message=None)]
+
+        # 検証対象の実行
+        response = client.post(
+            path=path,
+            data={"monitors": [{
+                "region": "ap-northeast-1",
+                "service": "ec2",
+                "resource_id": "i-1",
+                "metric_name": "CPUUtilization",
+                "values": {
+                    "caution": 60,
+                    "danger": 90
+                },
+                "enabled": True,
+                "period": 300,
+                "evaluation_period": 1,
+                "statistic": 'Average'
+            }]},
+            format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, save_monitors.return_value)
+        monitors = save_monitors.call_args[0][2]
+        self.assertEqual(len(monitors), 1)
+        self.assertEqual(monitors[0][0].resource_id, "i-1")
+        self.assertEqual(monitors[0][1].metric.name, "CPUUtilization")
+
+    # 監視設定一括削除
+    def test_delete_monitors(self, use_case: mock.Mock):
+        client, path = self._login()
+        delete_monitors = use_case.return_value.delete_monitors
+        delete_monitors.return_value = []
+
+        # 検証対象の実行
+        response = client.post(
+            path=path + "delete/",
+            data={"monitors": [{
+                "region": "ap-northeast-1",
+                "service": "ec2",
+                "resource_id": "i-1",
+                "metric_name": "CPUUtilization"
+            }]},
+            format='json')
+
+        self.assertEqual(response.status_code, 200)
+        monitors = delete_monitors.call_args[0][2]
+        self.assertEqual([(resource.resource_id, metric_name) for resource, metric_name in monitors],
+                         [("i-1", "CPUUtilization")])
+
+
+@mock.patch("backend.views.monitor_view_set.ControlMonitorUseCase")
+class ServiceMonitorViewSetTestCase(TestCase):
+
+    api_path = '/api/tenants/{}/aws-environments/{}/regions/ap-northeast-1/services/ec2/monitors/'
+
+    @classmethod
+    def setUpClass(cls):
+        super(ServiceMonitorViewSetTestCase, cls).setUpClass()
+        role_model = MonitorViewSetTestCase._create_role_model(2, "test_role")
+        tenant_model = MonitorViewSetTestCase._create_tenant_model("test_tenant_users_in_tenant_1")
+        aws = MonitorViewSetTestCase._create_aws_env_model("test_name1", "test_aws1", tenant_model)
+        user = MonitorViewSetTestCase._create_user_model(
+            email="test_email",
+            name="test_name",
+            password="test_password",
+            tenant=tenant_model,
+            role=role_model,
+        )
+        user.aws_environments.add(aws)
+
+    # 複数リソースの監視設定取得
+    def test_list_monitors(self, use_case: mock.Mock):
+        client = APIClient()
+        client.force_authenticate(user=UserModel.objects.get(email="test_email"))
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+        aws_id = AwsEnvironmentModel.objects.get(aws_account_id="test_aws1").id
+
+        # mock準備
+        monitor = Monitor("CPUUtilization", {"caution": 60, "danger": 90}, True, 300, 1, 'Average')
+        fetch_resources_monitors = use_case.return_value.fetch_resources_monitors
+        fetch_resources_monitors.return_value = {("EC2", "i-1"): [monitor], ("EC2", "i-2"): []}
+
+        # 検証対象の実行
+        response = client.get(self.api_path.format(tenant_id, aws_id), {"resource_ids": "i-1,i-2"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [
+            {"resource_id": "i-1", "monitors": [monitor.serialize()]},
+            {"resource_id": "i-2", "monitors": []}
+        ])
+        resources = fetch_resources_monitors.call_args[0][3]
+        self.assertEqual([resource.resource_id for resource in resources], ["i-1", "i-2"])
+
+    # 複数リソースの監視設定取得：リソースIDの指定がない場合
+    def test_list_monitors_no_resource_ids(self, use_case: mock.Mock):
+        client = APIClient()
+        client.force_authenticate(user=UserModel.objects.get(email="test_email"))
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+        aws_id = AwsEnvironmentModel.objects.get(aws_account_id="test_aws1").id
+
+        response = client.get(self.api_path.format(tenant_id, aws_id))
+
+        self.assertEqual(response.status_code, 400)
+        use_case.return_value.fetch_resources_monitors.assert_not_called()
+
+    # 複数リソース・メトリクスのグラフデータ取得
+    def test_graph(self, use_case: mock.Mock):
+        client = APIClient()
+        client.force_authenticate(user=UserModel.objects.get(email="test_email"))
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+        aws_id = AwsEnvironmentModel.objects.get(aws_account_id="test_aws1").id
+
+        # 検証対象の実行
+        response = client.post(
+            path=self.api_path.format(tenant_id, aws_id) + "graph/",
+            data={
+                "resource_ids": ["i-1", "i-2"],
+                "metric_names": ["CPUUtilization", "NetworkIn"],
+                "start_time": "2019-01-01T00:00:00Z",
+                "end_time": "2019-01-01T01:00:00Z",
+                "period": 300,
+                "stat": "Average"
+            },
+            format='json')
+
+        self.assertEqual(response.status_code, 200)
+        monitor_graphs = use_case.return_value.graphs.call_args[0][3]
+        self.assertEqual([(resource.resource_id, graph.metric_name) for resource, graph in monitor_graphs],
+                         [("i-1", "CPUUtilization"), ("i-1", "NetworkIn"),
+                          ("i-2", "CPUUtilization"), ("i-2", "NetworkIn")])
+        self.assertEqual(response.data[0], dict(resource_id="i-1", metric_name="CPUUtilization",
+                                                timestamps=[], values=[]))
@@ -1,6 +1,10 @@
 from django.test import TestCase
 from rest_framework.test import APIClient
+from django.utils import timezone
+from backend.models import TenantModel, AwsEnvironmentModel, AlarmIndexModel
+from datetime import datetime, timedelta
 from unittest import mock
+import json
 
 
 @mock.patch('backend.views.notify_view.NotificationDestinationModel.NotificationMessage')
@@ -25,6 +29,7 @@ class NotifyViewTestCase(TestCase):
 
         message_mock.assert_called_with(dict(TEST="test"))
         use_case.return_value.verify_sns_notification.assert_called_with(data)
+        use_case.return_value.update_alarm_status.assert_called_once_with(dict(TEST="test"))
         use_case.return_value.notify.assert_called_once()
         self.assertEqual(response.status_code, 200)
 
@@ -83,3 +88,60 @@ class NotifyViewTestCase(TestCase):
         use_case.return_value.verify_sns_notification.assert_called_with(data)
         use_case.return_value.notify.assert_not_called()
         self.assertEqual(response.status_code, 400)
+
+
+@mock.patch('backend.usecases.control_notification.NotificationDestinationModel.destinations_for')
+@mock.patch('backend.usecases.control_notification.Sns')
+class NotifyViewAlarmIndexTestCase(TestCase):
+
+    api_path = "/api/notify/"
+
+    def setUp(self):
+        now = datetime.now()
+        tenant = TenantModel.objects.create(tenant_name="test_tenant", created_at=now, updated_at=now)
+        self.aws = AwsEnvironmentModel.objects.create(
+            name="test_name",
+            aws_account_id="123456789012",
+            aws_role="test_aws_role",
+            aws_external_id="test_aws_external_id",
+            tenant=tenant,
+            created_at=now,
+            updated_at=now
+        )
+
+    # 危険のアラームが発生しているインスタンスが、復旧の通知で正常に戻ることを確認する
+    def test_notify_danger_to_ok(self, mock_sns, destinations_for):
+        destinations_for.return_value = []
+        index = AlarmIndexModel.get_index(self.aws, "ap-northeast-1")
+        index.reconcile([dict(
+            alarm_name="NARUKO-EC2-i-1-CPUUtilization-{}".format(level),
+            service="EC2",
+            resource_id="i-1",
+            level=level,
+            state="ALARM",
+            state_updated_at=timezone.now()
+        ) for level in ["CAUTION", "DANGER"]])
+        self.assertEqual(index.resources_status()["EC2"], {"i-1": "DANGER"})
+
+        # 復旧の通知は警告のアラームからのみ送られる
+        message = {
+            "AlarmName": "NARUKO-EC2-i-1-CPUUtilization-CAUTION",
+            "AWSAccountId": "123456789012",
+            "NewStateValue": "OK",
+            "StateChangeTime": (datetime.utcnow() + timedelta(minutes=1)).strftime('%Y-%m-%dT%H:%M:%S.%f+0000'),
+            "Region": "Asia Pacific (Tokyo)",
+            "AlarmArn": "arn:aws:cloudwatch:ap-northeast-1:123456789012:alarm:NARUKO-EC2-i-1-CPUUtilization-CAUTION",
+            "Trigger": {
+                "MetricName": "CPUUtilization",
+                "Namespace": "AWS/EC2",
+                "Dimensions": [{"value": "i-1", "name": "InstanceId"}]
+            }
+        }
+        response = APIClient().post(
+            path=self.api_path,
+            data=dict(Type="Notification", Message=json.dumps(message)),
+            format="json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(index.resources_status()["EC2"], {"i-1": "OK"})
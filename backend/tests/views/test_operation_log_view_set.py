@@ -3,6 +3,7 @@ from rest_framework.test import APIClient
 from backend.models import OperationLogModel, AwsEnvironmentModel, TenantModel, UserModel, RoleModel
 from datetime import datetime
 from unittest.mock import patch, Mock
+import json
 
 
 @patch("backend.views.operation_log_model_view_set.ControlOperationLog")
@@ -126,6 +127,90 @@ class OperationLogModelViewSetTestCase(TestCase):
 
         fetch_logs.assert_called_once()
         self.assertEqual(response.status_code, 200)
+        # limitを指定しなくてもページングした形式で返す
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertIsNone(response.data["next"])
+
+    # ページングする場合 次のページのカーソルを返す
+    def test_get_logs_page(self, use_case: Mock):
+        api_client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        api_client.force_authenticate(user=user_model)
+        for i in range(3):
+            OperationLogModel.objects.create(executor=user_model, tenant=user_model.tenant, operation="TEST{}".format(i))
+
+        fetch_logs = use_case.return_value.fetch_logs
+        fetch_logs.return_value = OperationLogModel.objects.select_related("tenant", "executor")\
+            .order_by("-created_at", "-id")
+
+        response = api_client.get(self.api_path.format(user_model.tenant.id, "?limit=2&since=2019-01-01T00:00:00"),
+                                  format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["operation"] for row in response.data["results"]], ["TEST2", "TEST1"])
+        self.assertEqual(response.data["results"][0]["executor"]["id"], user_model.id)
+        self.assertEqual(fetch_logs.call_args[1]["since"].year, 2019)
+
+        response = api_client.get(self.api_path.format(
+            user_model.tenant.id, "?limit=2&cursor={}".format(response.data["next"])), format='json')
+        self.assertEqual([row["operation"] for row in response.data["results"]], ["TEST0"])
+        self.assertIsNone(response.data["next"])
+
+    # CSVでエクスポートする
+    @patch("backend.views.operation_log_model_view_set.settings")
+    def test_export_csv(self, mock_settings, use_case: Mock):
+        mock_settings.OPERATION_LOG_EXPORT_CHUNK_SIZE = 2
+        api_client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        api_client.force_authenticate(user=user_model)
+        for i in range(3):
+            OperationLogModel.objects.create(executor=user_model, tenant=user_model.tenant, operation="TEST{}".format(i))
+        use_case.return_value.fetch_logs.return_value = OperationLogModel.objects.order_by("-created_at", "-id")
+
+        response = api_client.get(self.api_path.format(user_model.tenant.id, "export/?operation=TEST"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        lines = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[0], "id,created_at,executor_id,executor__name,executor__email,operation,result")
+        self.assertEqual([line.split(",")[5] for line in lines[1:]], ["TEST2", "TEST1", "TEST0"])
+        self.assertEqual(use_case.return_value.fetch_logs.call_args[1]["operation"], "TEST")
+
+    # NDJSONでエクスポートする
+    def test_export_ndjson(self, use_case: Mock):
+        api_client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        api_client.force_authenticate(user=user_model)
+        OperationLogModel.objects.create(executor=user_model, tenant=user_model.tenant, operation="TEST")
+        use_case.return_value.fetch_logs.return_value = OperationLogModel.objects.order_by("-created_at", "-id")
+
+        response = api_client.get(self.api_path.format(user_model.tenant.id, "export/?type=ndjson"))
+
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["operation"], "TEST")
+        self.assertEqual(rows[0]["executor__email"], "test_email")
+
+    # エクスポートの形式が不正な場合
+    def test_export_invalid_type(self, use_case: Mock):
+        api_client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        api_client.force_authenticate(user=user_model)
+
+        response = api_client.get(self.api_path.format(user_model.tenant.id, "export/?type=xml"))
+
+        self.assertEqual(response.status_code, 400)
+
+    # 日時の形式が不正な場合
+    def test_get_logs_invalid_datetime(self, use_case: Mock):
+        api_client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        api_client.force_authenticate(user=user_model)
+
+        response = api_client.get(self.api_path.format(user_model.tenant.id, "?since=yesterday"), format='json')
+
+        self.assertEqual(response.status_code, 400)
+        use_case.return_value.fetch_logs.assert_not_called()
 
     # テナントが存在しない場合
     def test_get_logs_no_tenant(self, use_case: Mock):
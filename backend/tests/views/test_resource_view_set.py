@@ -133,6 +133,35 @@ class InstanceViewSetTestCase(TestCase):
         fetch_resources.assert_called_once()
         self.assertEqual(response.status_code, 200)
 
+    # 正常系：リージョン指定がない場合は全リージョンをまとめて取得する
+    def test_get_resource_all_regions(self, use_case: mock.Mock):
+        client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        client.force_authenticate(user=user_model)
+
+        # Company1のIDを取得
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+        # AWS環境のIDを取得
+        aws_id = AwsEnvironmentModel.objects.get(aws_account_id="test_aws1").id
+
+        fetch_resources_all_regions = use_case.return_value.fetch_resources_all_regions
+        fetch_resources_all_regions.return_value = (
+            [Ec2("ap-northeast-1", "i-123456789012")],
+            [dict(region="us-east-1", message="timeout")]
+        )
+
+        # 検証対象の実行
+        response = client.get(
+            path=self.api_path_in_tenant.format(tenant_id, aws_id, "?regions=ap-northeast-1,us-east-1"),
+            format='json')
+
+        use_case.return_value.fetch_resources.assert_not_called()
+        fetch_resources_all_regions.assert_called_once_with(
+            user_model, AwsEnvironmentModel.objects.get(id=aws_id), ["ap-northeast-1", "us-east-1"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(["i-123456789012"], [resource["id"] for resource in response.data["resources"]])
+        self.assertEqual([dict(region="us-east-1", message="timeout")], response.data["errors"])
+
     # テナントが存在しない場合
     def test_no_tenant(self, use_case: mock.Mock):
         client = APIClient()
@@ -445,7 +474,7 @@ class InstanceViewSetTestCase(TestCase):
             format='json')
 
         run_command.assert_called_once()
-        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.status_code, 202)
 
     # コマンド実行：テナントが存在しない場合
     def test_run_command_no_tenant(self, use_case: mock.Mock):
@@ -530,3 +559,117 @@ class InstanceViewSetTestCase(TestCase):
 
         run_command.assert_not_called()
         self.assertEqual(response.status_code, 400)
+
+    # 複数リソースへのコマンド実行：正常系
+    def test_run_command_multi(self, use_case: mock.Mock):
+        client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        client.force_authenticate(user=user_model)
+
+        # Company1のIDを取得
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+
+        # AWS環境のIDを取得
+        aws_id = AwsEnvironmentModel.objects.get(aws_account_id="test_aws1").id
+
+        run_command = use_case.return_value.run_command
+        run_command.side_effect = lambda user, aws, command: command
+
+        # 検証対象の実行
+        response = client.post(
+            path='/api/tenants/{}/aws-environments/{}/regions/ap-northeast-1/services/ec2/run_command/'
+            .format(tenant_id, aws_id),
+            data=dict(
+                name="document_name",
+                parameters=[dict(key="param", value="value")],
+                resource_ids=["i-1", "i-2"]
+            ),
+            format='json')
+
+        run_command.assert_called_once()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual([target["id"] for target in response.data["targets"]], ["i-1", "i-2"])
+
+    # 複数リソースへのコマンド実行：指定されたサービスがEC2でない場合
+    def test_run_command_multi_not_ec2(self, use_case: mock.Mock):
+        client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        client.force_authenticate(user=user_model)
+
+        # Company1のIDを取得
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+
+        # AWS環境のIDを取得
+        aws_id = AwsEnvironmentModel.objects.get(aws_account_id="test_aws1").id
+
+        run_command = use_case.return_value.run_command
+
+        # 検証対象の実行
+        response = client.post(
+            path='/api/tenants/{}/aws-environments/{}/regions/ap-northeast-1/services/rds/run_command/'
+            .format(tenant_id, aws_id),
+            data=dict(
+                name="document_name",
+                parameters=[dict(key="param", value="value")],
+                resource_ids=["db-1"]
+            ),
+            format='json')
+
+        run_command.assert_not_called()
+        self.assertEqual(response.status_code, 400)
+
+    # 一括操作：正常系
+    def test_power(self, use_case: mock.Mock):
+        client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        client.force_authenticate(user=user_model)
+
+        # Company1のIDを取得
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+
+        # AWS環境のIDを取得
+        aws_id = AwsEnvironmentModel.objects.get(aws_account_id="test_aws1").id
+
+        power_resources = use_case.return_value.power_resources
+        power_resources.return_value = [dict(region="ap-northeast-1", service="ec2", resource_id="i-1",
+                                             result="succeeded", message=None)]
+
+        # 検証対象の実行
+        response = client.post(
+            path=self.api_path_in_tenant.format(tenant_id, aws_id, "power/"),
+            data=dict(
+                action="stop",
+                resources=[dict(region="ap-northeast-1", service="ec2", resource_id="i-1"),
+                           dict(region="ap-northeast-1", service="rds", resource_id="db-1")]
+            ),
+            format='json')
+
+        self.assertEqual(response.status_code, 200)
+        args = power_resources.call_args[0]
+        self.assertEqual(args[2], "stop")
+        self.assertEqual([(resource.get_service_name(), resource.resource_id) for resource in args[3]],
+                         [("EC2", "i-1"), ("RDS", "db-1")])
+        self.assertEqual(response.data, power_resources.return_value)
+
+    # 一括操作：AWS環境が存在しない場合
+    def test_power_no_aws(self, use_case: mock.Mock):
+        client = APIClient()
+        user_model = UserModel.objects.get(email="test_email")
+        client.force_authenticate(user=user_model)
+
+        # Company1のIDを取得
+        tenant_id = TenantModel.objects.get(tenant_name="test_tenant_users_in_tenant_1").id
+
+        power_resources = use_case.return_value.power_resources
+
+        # 検証対象の実行
+        response = client.post(
+            path=self.api_path_in_tenant.format(tenant_id, 100, "power/"),
+            data=dict(
+                action="stop",
+                resources=[dict(region="ap-northeast-1", service="ec2", resource_id="i-1")]
+            ),
+            format='json')
+
+        power_resources.assert_not_called()
+        self.assertEqual(response.status_code, 404)
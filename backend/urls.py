@@ -3,7 +3,7 @@ from django.urls import re_path
 from backend.views import views, tenant_model_view_set, user_model_view_set, aws_model_view_set, \
     resource_view_set, monitor_view_set, notification_destination_model_view_set, \
     notification_group_view_set,\
-    schedule_view_set, backup_view_set, operation_log_model_view_set, document_model_view_set
+    schedule_view_set, backup_view_set, operation_log_model_view_set, document_model_view_set, command_view_set
 from rest_framework_nested import routers
 
 router = routers.SimpleRouter()
@@ -24,14 +24,17 @@ tenant_router.register(r'logs', operation_log_model_view_set.OperationLogModelVi
 aws_router = routers.NestedSimpleRouter(tenant_router, r'aws-environments', lookup='aws_env')
 aws_router.register(r'resources', resource_view_set.ResourceViewSet, base_name='resources')
 aws_router.register(r'regions', resource_view_set.RegionViewSet, base_name='regions')
+aws_router.register(r'monitors', monitor_view_set.BulkMonitorViewSet, base_name='aws-monitors')
 
 
 region_router = routers.NestedSimpleRouter(aws_router, r'regions', lookup='region')
 region_router.register(r'services', resource_view_set.ServiceViewSet, base_name=r'services')
 region_router.register(r'documents', document_model_view_set.DocumentViewSet, base_name=r'documents')
+region_router.register(r'commands', command_view_set.CommandViewSet, base_name=r'commands')
 
 service_router = routers.NestedSimpleRouter(region_router, r'services', lookup='service')
 service_router.register(r'resources', resource_view_set.ResourceViewSet, base_name=r'resources')
+service_router.register(r'monitors', monitor_view_set.ServiceMonitorViewSet, base_name=r'service-monitors')
 
 resource_router = routers.NestedSimpleRouter(service_router, r'resources', lookup='resource')
 resource_router.register(r'monitors', monitor_view_set.MonitorViewSet, base_name='monitors')
@@ -3,6 +3,7 @@ from backend.models import UserModel, AwsEnvironmentModel, TenantModel, Operatio
 from backend.logger import NarukoLogging
 from backend.externals.iam import Iam
 from backend.externals.cloudwatch import CloudWatch
+from backend.models.downsampling import downsample
 
 
 class ControlAwsEnvironment:
@@ -23,7 +24,8 @@ class ControlAwsEnvironment:
         if not request_user.can_control_aws():
             raise PermissionDenied("request user can't fetch aws_environments. id:{}".format(request_user.id))
 
-        aws_environments = AwsEnvironmentModel.objects.filter(tenant_id=tenant.id)
+        # テナントは結合して取得する
+        aws_environments = AwsEnvironmentModel.objects.filter(tenant_id=tenant.id).select_related("tenant")
 
         self.logger.info("END: fetch_aws_environments")
         return aws_environments
@@ -67,7 +69,8 @@ class ControlAwsEnvironment:
         aws_environment.delete()
         self.logger.info("END: delete_aws_environment")
 
-    def billing_graph(self, request_user: UserModel, aws: AwsEnvironmentModel, start_time, end_time, period, stat):
+    def billing_graph(self, request_user: UserModel, aws: AwsEnvironmentModel, start_time, end_time, period, stat,
+                      max_points=None, aggregation="avg"):
         self.logger.info("START: graph")
 
         # 使用できるAWSアカウントか
@@ -110,11 +113,16 @@ class ControlAwsEnvironment:
         def pick_service_name(dimensions):
             return next((dimension['Value'] for dimension in dimensions
                          if dimension['Name'] == 'ServiceName'), 'Total')
-        result = map(lambda graph: dict(
-            service=pick_service_name(graph['config']['dimensions']),
-            timestamps=graph['timestamps'],
-            values=graph['values']
-        ), monitor_graphs)
+
+        # 点数の指定があれば間引く
+        def build_graph(graph):
+            timestamps, values = downsample(graph['timestamps'], graph['values'], max_points, aggregation)
+            return dict(
+                service=pick_service_name(graph['config']['dimensions']),
+                timestamps=timestamps,
+                values=values
+            )
+        result = map(build_graph, monitor_graphs)
 
         return list(result)
 
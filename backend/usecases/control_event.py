@@ -1,12 +1,75 @@
+from django.conf import settings
+from django.db import connection
 from backend.models import Event, OperationLogModel
 from backend.exceptions import InvalidNotificationException
 from backend.logger import NarukoLogging
 from backend.externals.sns import Sns
+from backend.usecases.control_resource import ControlResourceUseCase
+from backend.models.resource.ec2 import Ec2
+import threading
+
+
+class ScheduleQueue:
+    """
+    起動したスケジュールを一定時間ためてからまとめて実行するキュー
+
+    最初のスケジュールを受け付けてからwindow_seconds秒後に、それまでに受け付けたスケジュールを
+    まとめて実行する 同じ時刻に起動したスケジュールを1回の実行にまとめることで、
+    AWSのAPI呼び出しをアカウント・リージョン・アクションごとにまとめる
+
+    ためたスケジュールはプロセスのメモリにだけ保持する SNSには受け付けた時点で応答するため、
+    実行する前にプロセスが終了すると再送されずに失われる
+    """
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._pending = []
+        self._naruko_logger = None
+        self._timer = None
+
+    def put(self, event: Event, naruko_logger: NarukoLogging):
+        with self._lock:
+            self._pending.append(event)
+            if self._timer is None:
+                self._naruko_logger = naruko_logger
+                self._timer = threading.Timer(self.window_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            events, self._pending = self._pending, []
+            naruko_logger, self._naruko_logger = self._naruko_logger, None
+            self._timer = None
+
+        if not events:
+            return
+        try:
+            ControlEventUseCase(naruko_logger).execute_schedules(events)
+        except Exception as e:
+            naruko_logger.get_logger(__name__).exception(e)
+            # 実行できなかったスケジュールは失敗として記録する
+            for event in events:
+                try:
+                    event.record_result(False, str(e))
+                except Exception as record_error:
+                    naruko_logger.get_logger(__name__).exception(record_error)
+        finally:
+            # タイマーのスレッドに作成されたDB接続を閉じる
+            connection.close()
+
+
+SCHEDULE_QUEUE = ScheduleQueue(settings.SCHEDULE_COALESCE_SECONDS)
 
 
 class ControlEventUseCase:
 
+    # まとめて実行できるアクション
+    POWER_ACTIONS = {"START": "start", "STOP": "stop", "REBOOT": "reboot"}
+
     def __init__(self, naruko_logger: NarukoLogging):
+        self.naruko_logger = naruko_logger
         self.logger = naruko_logger.get_logger(__name__)
 
     @staticmethod
@@ -37,8 +100,74 @@ class ControlEventUseCase:
         self.logger.info("END: verify_sns_notification")
 
     def execute(self, event: Event):
+        """
+        スケジュールを実行する
+        まとめるために待つ秒数が設定されていれば実行キューに入れ、
+        同じ時刻に起動した他のスケジュールとまとめてバックグラウンドで実行する
+        """
         self.logger.info("START: execute")
 
-        event.execute()
+        if SCHEDULE_QUEUE.window_seconds > 0:
+            SCHEDULE_QUEUE.put(event, self.naruko_logger)
+        else:
+            self.execute_schedules([event])
 
         self.logger.info("END: execute")
+
+    def execute_schedules(self, schedules: list):
+        """
+        複数のスケジュールをまとめて実行する
+
+        AWS環境・リージョン・アクションごとにまとめ、起動・停止・再起動は1回の一括操作で、
+        バックアップはリソースごとに実行する 結果はスケジュールごとに保存する
+
+        :param schedules: Scheduleのリスト
+        """
+        self.logger.info("START: execute_schedules")
+
+        groups = dict()
+        for schedule in schedules:
+            model = schedule.event_model
+            group = groups.setdefault((model.aws_environment_id, model.region, model.action), dict())
+            # SNSから同じ通知が重複して届いた場合は1回だけ実行する
+            group.setdefault(model.id, schedule)
+
+        for (aws_id, region, action), group in groups.items():
+            group = list(group.values())
+            self.logger.info("execute schedules. aws: {} region: {} action: {} count: {}"
+                             .format(aws_id, region, action, len(group)))
+            try:
+                results = self._execute_group(action, group)
+            except Exception as e:
+                self.logger.warning("execute schedules failed. aws: {} region: {} action: {} error: {}"
+                                    .format(aws_id, region, action, e))
+                results = [(False, str(e))] * len(group)
+
+            for schedule, (succeeded, message) in zip(group, results):
+                schedule.record_result(succeeded, message)
+
+        self.logger.info("END: execute_schedules")
+
+    def _execute_group(self, action: str, schedules: list) -> list:
+        aws_environment = schedules[0].event_model.aws_environment
+        executor = schedules[0].get_executor()
+        use_case = ControlResourceUseCase(self.naruko_logger)
+
+        if action in self.POWER_ACTIONS:
+            results = use_case.power_resources(executor, aws_environment, self.POWER_ACTIONS[action],
+                                               [schedule.get_resource() for schedule in schedules])
+            return [(result["result"] == "succeeded", result["message"]) for result in results]
+
+        if action == "BACKUP":
+            results = []
+            for schedule in schedules:
+                resource = schedule.get_resource()
+                no_reboot = schedule.get_params().get("no_reboot", True) if isinstance(resource, Ec2) else None
+                try:
+                    backup_id = use_case.create_backup(executor, aws_environment, resource, no_reboot)
+                    results.append((True, backup_id))
+                except Exception as e:
+                    results.append((False, str(e)))
+            return results
+
+        raise ValueError("invalid action: {}".format(action))
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.db import connection
 from django.db.models.base import ObjectDoesNotExist
 from django.core.exceptions import PermissionDenied
 from backend.logger import NarukoLogging
@@ -5,6 +7,7 @@ from backend.models import AwsEnvironmentModel, UserModel, Resource, OperationLo
 from backend.models.monitor import MonitorGraph
 from backend.externals.cloudwatch import CloudWatch
 from backend.externals.sns import Sns
+from concurrent.futures import ThreadPoolExecutor
 
 
 class ControlMonitorUseCase:
@@ -18,6 +21,17 @@ class ControlMonitorUseCase:
                                           resource.get_service_name(), resource.resource_id,
                                           resource.monitors[0].metric.name)
 
+    @staticmethod
+    def target_bulk_info(aws_env: AwsEnvironmentModel, monitors: list):
+        return ControlMonitorUseCase.target_bulk_delete_info(
+            aws_env, [(resource, monitor.metric.name) for resource, monitor in monitors])
+
+    @staticmethod
+    def target_bulk_delete_info(aws_env: AwsEnvironmentModel, monitors: list):
+        return ["{}_{}_{}_{}_{}_{}".format(aws_env.name, aws_env.aws_account_id, resource.region,
+                                           resource.get_service_name(), resource.resource_id, metric_name)
+                for resource, metric_name in monitors]
+
     def fetch_monitors(self, request_user: UserModel, aws: AwsEnvironmentModel, resource: Resource):
         self.logger.info("START: fetch_monitors")
 
@@ -31,6 +45,29 @@ class ControlMonitorUseCase:
         self.logger.info("END: fetch_monitors")
         return monitors
 
+    def fetch_resources_monitors(self, request_user: UserModel, aws: AwsEnvironmentModel, region: str,
+                                 resources: list) -> dict:
+        """
+        複数のリソースの監視設定をまとめて取得する
+
+        :param request_user:
+        :param aws:
+        :param region:
+        :param resources: 同じリージョンのリソースのリスト
+        :return: {(サービス名, リソースID): [Monitor, ...], ...}
+        """
+        self.logger.info("START: fetch_resources_monitors")
+
+        # 使用できるAWSアカウントか
+        if not request_user.has_aws_env(aws):
+            raise PermissionDenied("request user can't use aws account. user_id: {}, aws_id: {}"
+                                   .format(request_user.id, aws.id))
+
+        monitors = CloudWatch(aws, region).describe_resources_monitors(resources)
+
+        self.logger.info("END: fetch_resources_monitors")
+        return monitors
+
     @OperationLogModel.operation_log(executor_index=1, target_method=target_info, target_arg_index_list=[2, 3])
     def save_monitor(self, request_user: UserModel, resource: Resource, aws: AwsEnvironmentModel) -> Resource:
         self.logger.info("START: save_monitor")
@@ -54,6 +91,116 @@ class ControlMonitorUseCase:
         self.logger.info("END: save_monitor")
         return resource
 
+    @OperationLogModel.operation_log(executor_index=1, target_method=target_bulk_info, target_arg_index_list=[2, 3])
+    def save_monitors(self, request_user: UserModel, aws: AwsEnvironmentModel, monitors: list) -> list:
+        """
+        監視設定を一括で登録する
+        リソースごとの監視設定を並列に登録し、監視設定ごとの結果を返す
+
+        :param request_user:
+        :param aws:
+        :param monitors: (リソース, 監視設定)のリスト
+        :return: 監視設定ごとの結果のリスト
+        """
+        self.logger.info("START: save_monitors")
+
+        # 使用できるAWSアカウントか
+        if not request_user.has_aws_env(aws):
+            raise PermissionDenied("request user can't use aws account. user_id: {}, aws_id: {}"
+                                   .format(request_user.id, aws.id))
+
+        errors = [None] * len(monitors)
+        executor = ThreadPoolExecutor(max_workers=settings.MONITOR_BULK_MAX_WORKERS)
+        futures = []
+        for region, indexes in self._group_by_region(monitors).items():
+            try:
+                # SNS連携許可はリージョンごとに1度だけ行う
+                self.logger.info("sns add permission... aws: {} region: {}".format(aws.id, region))
+                sns = Sns(region)
+                sns.add_permission(aws)
+                self.logger.info("sns add permission... DONE")
+                cloudwatch = CloudWatch(aws, region)
+            except Exception as e:
+                self.logger.warning("save monitors failed. region: {} error: {}".format(region, e))
+                for i in indexes:
+                    errors[i] = e
+                continue
+
+            for i in indexes:
+                resource, monitor = monitors[i]
+                futures.append((i, executor.submit(self._put_monitor_alarms, cloudwatch, resource, monitor, sns.arn)))
+
+        for i, future in futures:
+            errors[i] = future.exception()
+        executor.shutdown()
+
+        results = [self._monitor_result(resource, monitor.metric.name, error)
+                   for (resource, monitor), error in zip(monitors, errors)]
+        self.logger.info("END: save_monitors")
+        return results
+
+    @OperationLogModel.operation_log(executor_index=1, target_method=target_bulk_delete_info,
+                                     target_arg_index_list=[2, 3])
+    def delete_monitors(self, request_user: UserModel, aws: AwsEnvironmentModel, monitors: list) -> list:
+        """
+        監視設定を一括で削除する
+
+        :param request_user:
+        :param aws:
+        :param monitors: (リソース, メトリクス名)のリスト
+        :return: 監視設定ごとの結果のリスト
+        """
+        self.logger.info("START: delete_monitors")
+
+        # 使用できるAWSアカウントか
+        if not request_user.has_aws_env(aws):
+            raise PermissionDenied("request user can't use aws account. user_id: {}, aws_id: {}"
+                                   .format(request_user.id, aws.id))
+
+        errors = [None] * len(monitors)
+        for region, indexes in self._group_by_region(monitors).items():
+            try:
+                region_errors = CloudWatch(aws, region).delete_monitor_alarms([monitors[i] for i in indexes])
+            except Exception as e:
+                self.logger.warning("delete monitors failed. region: {} error: {}".format(region, e))
+                region_errors = [e] * len(indexes)
+            for i, error in zip(indexes, region_errors):
+                errors[i] = error
+
+        results = [self._monitor_result(resource, metric_name, error)
+                   for (resource, metric_name), error in zip(monitors, errors)]
+        self.logger.info("END: delete_monitors")
+        return results
+
+    @staticmethod
+    def _group_by_region(monitors: list) -> dict:
+        grouped = dict()
+        for i, (resource, _) in enumerate(monitors):
+            grouped.setdefault(resource.region, []).append(i)
+        return grouped
+
+    @staticmethod
+    def _put_monitor_alarms(cloudwatch: CloudWatch, resource: Resource, monitor, topic_arn: str):
+        try:
+            if monitor.metric.name not in resource.get_metrics():
+                raise ObjectDoesNotExist("service doesn't have metric service_type: {} metric: {}"
+                                         .format(resource.get_service_name(), monitor.metric.name))
+            cloudwatch.put_monitor_alarms(resource, monitor, topic_arn)
+        finally:
+            # アラーム状態索引の更新でワーカースレッドに作成されたDB接続を閉じる
+            connection.close()
+
+    @staticmethod
+    def _monitor_result(resource: Resource, metric_name: str, error: Exception) -> dict:
+        return dict(
+            region=resource.region,
+            service=resource.get_service_name(),
+            resource_id=resource.resource_id,
+            metric_name=metric_name,
+            result="failed" if error else "succeeded",
+            message=str(error) if error else None
+        )
+
     def graph(self, request_user: UserModel, resource: Resource, aws: AwsEnvironmentModel, monitor_graph: MonitorGraph):
         self.logger.info("START: graph")
 
@@ -77,3 +224,37 @@ class ControlMonitorUseCase:
 
         self.logger.info("END: graph")
         return monitor_graph
+
+    def graphs(self, request_user: UserModel, aws: AwsEnvironmentModel, region: str, monitor_graphs: list) -> list:
+        """
+        複数のリソース・メトリクスのグラフデータをまとめて取得する
+
+        :param request_user:
+        :param aws:
+        :param region:
+        :param monitor_graphs: (リソース, MonitorGraph)のリスト
+        :return: MonitorGraphのリスト
+        """
+        self.logger.info("START: graphs")
+
+        # 使用できるAWSアカウントか
+        if not request_user.has_aws_env(aws):
+            raise PermissionDenied("request user can't use aws account. user_id: {}, aws_id: {}"
+                                   .format(request_user.id, aws.id))
+
+        for resource, monitor_graph in monitor_graphs:
+            if monitor_graph.metric_name not in resource.get_metrics():
+                raise ObjectDoesNotExist("service doesn't have metric service_type: {} metric: {}"
+                                         .format(resource.get_service_name(), monitor_graph.metric_name))
+
+            # API引数をresourceから充足
+            monitor_graph.service_name = resource.get_namespace()
+            monitor_graph.dimensions.append(
+                dict(
+                    Name=resource.get_id_name(),
+                    Value=resource.resource_id
+                ))
+        monitor_graphs = CloudWatch(aws, region).get_charts([monitor_graph for _, monitor_graph in monitor_graphs])
+
+        self.logger.info("END: graphs")
+        return monitor_graphs
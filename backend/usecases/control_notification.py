@@ -1,13 +1,80 @@
+from collections import OrderedDict
+from django.conf import settings
 from django.core.exceptions import PermissionDenied
+from django.db import connection
+from django.db.models import Prefetch
 from backend.models import TenantModel, NotificationDestinationModel, UserModel, NotificationGroupModel, OperationLogModel
+from backend.models import AlarmIndexModel
 from backend.exceptions import InvalidNotificationException
 from backend.logger import NarukoLogging
 from backend.externals.sns import Sns
+import threading
+
+
+class NotificationDigestQueue:
+    """
+    アラームの状態変化を通知先ごとに一定時間ためてからまとめて通知するキュー
+
+    最初の状態変化を受け付けてからwindow_seconds秒後に、それまでに受け付けた状態変化を
+    通知先ごとに1通のメール・1回の電話にまとめて通知する
+    escalate_dangerがTrueの場合、危険レベルの状態変化を受け付けたら待たずにすぐ通知する
+
+    ためた状態変化はプロセスのメモリにだけ保持する SNSには受け付けた時点で応答するため、
+    通知する前にプロセスが終了すると再送されずに失われる
+    """
+
+    def __init__(self, window_seconds: float, escalate_danger: bool):
+        self.window_seconds = window_seconds
+        self.escalate_danger = escalate_danger
+        self._lock = threading.Lock()
+        # {(テナントID, 通知先ID): (通知先, [通知メッセージ, ...])}
+        self._pending = OrderedDict()
+        self._naruko_logger = None
+        self._timer = None
+
+    def put(self, destinations: list, message: NotificationDestinationModel.NotificationMessage,
+            naruko_logger: NarukoLogging):
+        escalate = self.escalate_danger and message.is_danger()
+        with self._lock:
+            for dest in destinations:
+                self._pending.setdefault((dest.tenant_id, dest.id), (dest, []))[1].append(message)
+            if not self._pending:
+                return
+
+            if escalate and self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._timer is None:
+                self._naruko_logger = naruko_logger
+                self._timer = threading.Timer(0 if escalate else self.window_seconds, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+            naruko_logger, self._naruko_logger = self._naruko_logger, None
+            self._timer = None
+
+        if not pending:
+            return
+        try:
+            ControlNotificationUseCase(naruko_logger).notify_digest(list(pending.values()))
+        except Exception as e:
+            naruko_logger.get_logger(__name__).exception(e)
+        finally:
+            # タイマーのスレッドに作成されたDB接続を閉じる
+            connection.close()
+
+
+NOTIFICATION_DIGEST_QUEUE = NotificationDigestQueue(settings.NOTIFICATION_DIGEST_SECONDS,
+                                                    settings.NOTIFICATION_DIGEST_ESCALATE_DANGER)
 
 
 class ControlNotificationUseCase:
 
     def __init__(self, naruko_logger: NarukoLogging):
+        self.naruko_logger = naruko_logger
         self.logger = naruko_logger.get_logger(__name__)
 
     @staticmethod
@@ -76,10 +143,15 @@ class ControlNotificationUseCase:
             raise PermissionDenied("request user doesn't belong to tenant. user_id:{}, tenant_id: {}"
                                    .format(request_user.id, tenant.id))
 
-        destinations = NotificationGroupModel.objects.filter(tenant=tenant)
+        # テナントは結合し、通知先とAWS環境はグループごとではなくまとめて取得する
+        groups = NotificationGroupModel.objects.filter(tenant=tenant).select_related("tenant").prefetch_related(
+            Prefetch("destinations", queryset=NotificationDestinationModel.all(),
+                     to_attr=NotificationGroupModel.ALIVE_DESTINATIONS),
+            "aws_environments"
+        )
 
         self.logger.info("END: fetch_groups")
-        return destinations
+        return groups
 
     @OperationLogModel.operation_log(executor_index=1, target_method=target_group_info, target_arg_index_list=[2])
     def save_group(self, request_user: UserModel, group: NotificationGroupModel):
@@ -135,17 +207,52 @@ class ControlNotificationUseCase:
 
         self.logger.info("END: verify_sns_notification")
 
+    def update_alarm_status(self, alarm_message: dict):
+        self.logger.info("START: update_alarm_status")
+
+        # 通知されたアラームの状態変化をアラーム状態索引に反映する
+        alarm = AlarmIndexModel.apply_alarm_message(alarm_message)
+        self.logger.info("Update Alarm Status: {}".format(alarm.alarm_name if alarm else None))
+
+        self.logger.info("END: update_alarm_status")
+
     def notify(self, message: NotificationDestinationModel.NotificationMessage):
         self.logger.info("START: notify")
 
-        # AWSアカウント->通知グループ->通知先
+        # AWSアカウントに紐づく通知先へまとめて通知する
         self.logger.info("Start Notification. Aws_env: {}".format(message.aws.id))
-        for group in message.aws.notification_groups.filter(deleted=0):
-            self.logger.info("Start Notification Group: {}".format(group.id))
-            for dest in group.destinations.filter(deleted=0):
-                self.logger.info("Start Notification Destination: {}".format(dest.id))
-                result_message = dest.notify(message)
+        destinations = NotificationDestinationModel.destinations_for(message.aws)
+        if NOTIFICATION_DIGEST_QUEUE.window_seconds > 0:
+            # 通知先ごとにためてまとめて通知する
+            NOTIFICATION_DIGEST_QUEUE.put(destinations, message, self.naruko_logger)
+            self.logger.info("Queue Notification. Destinations: {}".format([dest.id for dest in destinations]))
+        else:
+            results = NotificationDestinationModel.notify_all(destinations, message)
+            for dest, result_message in zip(destinations, results):
                 self.logger.info("End Notification Destination: {} Msg: {}".format(dest.id, result_message))
-            self.logger.info("End Notification Group: {}".format(group.id))
 
         self.logger.info("END: notify")
+
+    def notify_digest(self, pending: list):
+        """
+        通知先ごとにためた状態変化をまとめて通知する
+
+        :param pending: [(通知先, [通知メッセージ, ...]), ...]
+        """
+        self.logger.info("START: notify_digest")
+
+        # 同じ状態変化をためた通知先はまとめて送信する
+        groups = OrderedDict()
+        for dest, messages in pending:
+            groups.setdefault(tuple(id(message) for message in messages), (messages, []))[1].append(dest)
+
+        for messages, destinations in groups.values():
+            if len(messages) == 1:
+                results = NotificationDestinationModel.notify_all(destinations, messages[0])
+            else:
+                results = NotificationDestinationModel.notify_digest_all(destinations, messages)
+            for dest, result_message in zip(destinations, results):
+                self.logger.info("End Notification Destination: {} Count: {} Msg: {}".format(
+                    dest.id, len(messages), result_message))
+
+        self.logger.info("END: notify_digest")
@@ -1,6 +1,7 @@
 from django.core.exceptions import PermissionDenied
 from backend.models import UserModel, TenantModel, OperationLogModel
 from backend.logger import NarukoLogging
+from datetime import datetime
 
 
 class ControlOperationLog:
@@ -8,7 +9,19 @@ class ControlOperationLog:
     def __init__(self, naruko_logger: NarukoLogging):
         self.logger = naruko_logger.get_logger(__name__)
 
-    def fetch_logs(self, request_user: UserModel, tenant: TenantModel):
+    def fetch_logs(self, request_user: UserModel, tenant: TenantModel, executor_id: int = None,
+                   operation: str = None, since: datetime = None, until: datetime = None):
+        """
+        操作ログを作成日時・IDの降順で取得する
+
+        :param request_user: リクエストユーザー
+        :param tenant: テナント
+        :param executor_id: 実行者のID
+        :param operation: 操作内容の前方一致
+        :param since: 作成日時の開始 この日時を含む
+        :param until: 作成日時の終了 この日時を含まない
+        :return: 操作ログのクエリセット
+        """
         self.logger.info("START: fetch_logs")
         if not request_user.is_belong_to_tenant(tenant):
             raise PermissionDenied("request user can't fetch aws_environments. user_id:{} tenant_id: {}".
@@ -21,5 +34,17 @@ class ControlOperationLog:
             # そうでなければ自身のログを取得
             logs = OperationLogModel.objects.filter(tenant=tenant, executor=request_user)
 
+        if executor_id:
+            logs = logs.filter(executor_id=executor_id)
+        if operation:
+            logs = logs.filter(operation__startswith=operation)
+        if since:
+            logs = logs.filter(created_at__gte=since)
+        if until:
+            logs = logs.filter(created_at__lt=until)
+
+        # テナントと実行者は結合して取得する
+        logs = logs.select_related("tenant", "executor").order_by("-created_at", "-id")
+
         self.logger.info("END: fetch_logs")
         return logs
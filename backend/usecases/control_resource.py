@@ -1,15 +1,29 @@
+from django.conf import settings
+from django.db import connection
 from django.core.exceptions import PermissionDenied
-from backend.models import AwsEnvironmentModel, UserModel, Resource, OperationLogModel
+from django.utils import timezone
+from backend.models import AwsEnvironmentModel, UserModel, Resource, OperationLogModel, CommandJobModel
 from backend.models.resource.command import Command
+from backend.models.resource.ec2 import Ec2
 from backend.externals.cloudwatch import CloudWatch
 from backend.externals.ssm import Ssm
-
+from botocore.exceptions import ClientError
 from backend.externals.resource_group_tagging import ResourceGroupTagging
 from backend.logger import NarukoLogging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import timedelta
+import time
+
+# コマンドの実行状況をバックグラウンドで確認するスレッドプール
+# リクエストを処理するワーカーとは別のスレッドで実行の終了を待つ
+COMMAND_POLLER = ThreadPoolExecutor(max_workers=settings.SSM_COMMAND_POLL_MAX_WORKERS)
 
 
 class ControlResourceUseCase:
 
+    # 一括で実行できる操作
+    POWER_ACTIONS = ("start", "stop", "reboot")
+
     def __init__(self, naruko_logger: NarukoLogging):
         self.logger = naruko_logger.get_logger(__name__)
 
@@ -18,11 +32,19 @@ class ControlResourceUseCase:
         return "{}_{}_{}_{}_{}".format(aws_env.name, aws_env.aws_account_id, resource.region,
                                        resource.get_service_name(), resource.resource_id)
 
+    @staticmethod
+    def target_bulk_info(aws_env: AwsEnvironmentModel, action: str, resources: list):
+        return ["{}_{}_{}_{}_{}_{}".format(aws_env.name, aws_env.aws_account_id, action, resource.region,
+                                           resource.get_service_name(), resource.resource_id)
+                for resource in resources]
+
     @staticmethod
     def target_command_info(aws_env: AwsEnvironmentModel, command: Command):
         resource = command.target
         return "{}_{}_{}_{}_{}_{}".format(aws_env.name, aws_env.aws_account_id, resource.region,
-                                          resource.get_service_name(), resource.resource_id, command.document.name)
+                                          resource.get_service_name(),
+                                          ",".join(target.resource_id for target in command.targets),
+                                          command.document.name)
 
     def fetch_resources(self, request_user: UserModel, aws_environment: AwsEnvironmentModel, region: str) -> list:
         self.logger.info("START: fetch resources")
@@ -33,8 +55,91 @@ class ControlResourceUseCase:
         if not request_user.has_aws_env(aws_environment):
             raise PermissionDenied("request user doesn't have aws environments. id:{}".format(request_user.id))
 
+        resources = self._fetch_region_resources(aws_environment, region)
+
+        self.logger.info("END: fetch resources")
+        return resources
+
+    def fetch_resources_all_regions(self, request_user: UserModel, aws_environment: AwsEnvironmentModel,
+                                    regions: list = None):
+        """
+        複数リージョンのリソースを並列に取得する
+
+        リージョンごとの取得はスレッドプールで同時に実行し、結果をまとめて返す
+        タイムアウトや例外で取得できなかったリージョンはエラーとして返す
+
+        :param request_user: リクエストユーザー
+        :param aws_environment: AWS環境
+        :param regions: 対象のリージョン 指定がなければNARUKOで取り扱う全リージョン
+        :return: (リソースのリスト, 取得に失敗したリージョンのリスト)
+        """
+        self.logger.info("START: fetch resources all regions")
+        if not request_user.is_belong_to_tenant(aws_environment.tenant):
+            raise PermissionDenied("request user is not belong to tenant. user_id:{} tenant_id:{}"
+                                   .format(request_user.id, aws_environment.tenant.id))
+
+        if not request_user.has_aws_env(aws_environment):
+            raise PermissionDenied("request user doesn't have aws environments. id:{}".format(request_user.id))
+
+        regions = regions if regions else Resource.get_all_regions()
+        max_workers = max(1, settings.RESOURCE_FETCH_MAX_WORKERS)
+        timeout = settings.RESOURCE_FETCH_REGION_TIMEOUT
+
+        # タイムアウトしたリージョンのスレッドが残っても後続のリージョンを開始できるよう、
+        # スレッドはリージョン数まで用意し、同時実行数はここで制御する
+        executor = ThreadPoolExecutor(max_workers=len(regions))
+        waiting = list(regions)
+        # 実行中のリージョン {future: (リージョン, 期限)}
+        running = {}
+        results = {}
+        while waiting or running:
+            while waiting and len(running) < max_workers:
+                region = waiting.pop(0)
+                future = executor.submit(self._fetch_region_resources_in_thread, aws_environment, region)
+                # タイムアウトはリージョンごとに開始した時点から数える
+                running[future] = (region, time.monotonic() + timeout)
+
+            next_deadline = min(deadline for _, deadline in running.values())
+            done, _ = wait(list(running), timeout=max(0, next_deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future, (region, deadline) in list(running.items()):
+                if future in done:
+                    results[region] = future
+                elif deadline <= now:
+                    # 実行中のものは結果を破棄する
+                    results[region] = None
+                else:
+                    continue
+                del running[future]
+        executor.shutdown(wait=False)
+
+        resources = []
+        errors = []
+        for region in regions:
+            future = results[region]
+            if future is None:
+                self.logger.warning("fetch resources timeout. region: {}".format(region))
+                errors.append(dict(region=region, message="timeout"))
+            elif future.exception():
+                self.logger.warning("fetch resources failed. region: {} error: {}".format(region, future.exception()))
+                errors.append(dict(region=region, message=str(future.exception())))
+            else:
+                resources.extend(future.result())
+
+        self.logger.info("END: fetch resources all regions")
+        return resources, errors
+
+    def _fetch_region_resources_in_thread(self, aws_environment: AwsEnvironmentModel, region: str) -> list:
+        try:
+            return self._fetch_region_resources(aws_environment, region)
+        finally:
+            # アラーム状態索引の参照でワーカースレッドに作成されたDB接続を閉じる
+            connection.close()
+
+    def _fetch_region_resources(self, aws_environment: AwsEnvironmentModel, region: str) -> list:
         tagging = ResourceGroupTagging(aws_environment=aws_environment, region=region)
-        self.logger.info("ResourceGroupTagging Client Created.")
+        self.logger.info("ResourceGroupTagging Client Created. region: {}".format(region))
 
         resources = []
 
@@ -51,9 +156,24 @@ class ControlResourceUseCase:
                     get(get_resource.resource_id, "UNSET")
                 resources.append(get_resource)
 
-        self.logger.info("END: fetch resources")
+        self._set_ssm_agent(aws_environment, region, resources)
         return resources
 
+    def _set_ssm_agent(self, aws_environment: AwsEnvironmentModel, region: str, resources: list):
+        # EC2インスタンスにSSMエージェントの有無を設定する 取得できなければ不明のままにする
+        instances = [resource for resource in resources if resource.get_service_name() == Ec2.get_service_name()]
+        if not instances:
+            return
+
+        try:
+            instance_ids = Ssm(aws_environment=aws_environment, region=region).get_managed_instance_ids()
+        except ClientError as e:
+            self.logger.warning("fetch ssm managed instances failed. region: {} error: {}".format(region, e))
+            return
+
+        for instance in instances:
+            instance.has_ssm_agent = instance.resource_id in instance_ids
+
     @OperationLogModel.operation_log(executor_index=1, target_method=target_info, target_arg_index_list=[2, 3])
     def start_resource(self, request_user: UserModel, aws_environment: AwsEnvironmentModel, resource: Resource):
         self.logger.info("START: start_resource")
@@ -96,6 +216,90 @@ class ControlResourceUseCase:
         resource.stop(aws_environment)
         self.logger.info("END: stop_resource")
 
+    @OperationLogModel.operation_log(executor_index=1, target_method=target_bulk_info,
+                                     target_arg_index_list=[2, 3, 4])
+    def power_resources(self, request_user: UserModel, aws_environment: AwsEnvironmentModel, action: str,
+                        resources: list) -> list:
+        """
+        複数のリソースをまとめて起動・停止・再起動する
+
+        リソースをリージョン・サービスごとにまとめ、EC2は1回のAPI呼び出しで、
+        それ以外のサービスはリソースごとに並列に実行する
+
+        :param request_user: リクエストユーザー
+        :param aws_environment: AWS環境
+        :param action: start/stop/reboot
+        :param resources: リソースのリスト
+        :return: リソースごとの結果のリスト
+        """
+        self.logger.info("START: power_resources")
+        tenant = aws_environment.tenant
+        if not request_user.is_belong_to_tenant(tenant):
+            raise PermissionDenied("request user is not belong to tenant. user_id:{} tenant_id:{}"
+                                   .format(request_user.id, tenant.id))
+
+        if not request_user.has_aws_env(aws_environment):
+            raise PermissionDenied("request user doesn't have aws environments. id:{}".format(request_user.id))
+
+        if action not in self.POWER_ACTIONS:
+            raise ValueError("invalid action: {}".format(action))
+
+        groups = dict()
+        for i, resource in enumerate(resources):
+            groups.setdefault((resource.region, resource.get_service_name()), []).append(i)
+
+        errors = [None] * len(resources)
+        executor = ThreadPoolExecutor(max_workers=settings.RESOURCE_POWER_MAX_WORKERS)
+        futures = []
+        for (region, service), indexes in groups.items():
+            if service == Ec2.get_service_name():
+                for i, error in zip(indexes, self._power_instances(aws_environment, region, action,
+                                                                   [resources[i] for i in indexes])):
+                    errors[i] = error
+            else:
+                futures.extend((i, executor.submit(self._power_resource, aws_environment, action, resources[i]))
+                               for i in indexes)
+
+        for i, future in futures:
+            errors[i] = future.exception()
+        executor.shutdown()
+
+        results = [dict(
+            region=resource.region,
+            service=resource.get_service_name(),
+            resource_id=resource.resource_id,
+            result="failed" if error else "succeeded",
+            message=str(error) if error else None
+        ) for resource, error in zip(resources, errors)]
+        self.logger.info("END: power_resources")
+        return results
+
+    def _power_instances(self, aws_environment: AwsEnvironmentModel, region: str, action: str,
+                         resources: list) -> list:
+        try:
+            Ec2.power_instances(aws_environment, region, action, [resource.resource_id for resource in resources])
+            return [None] * len(resources)
+        except Exception as e:
+            self.logger.warning("power instances failed. region: {} error: {}".format(region, e))
+            if len(resources) == 1:
+                return [e]
+
+        # まとめて実行できなかった場合は失敗したインスタンスを特定するため1台ずつ実行する
+        errors = []
+        for resource in resources:
+            try:
+                self._power_resource(aws_environment, action, resource)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    @staticmethod
+    def _power_resource(aws_environment: AwsEnvironmentModel, action: str, resource: Resource):
+        if not hasattr(resource, action):
+            raise ValueError("{} doesn't support {}.".format(resource.get_service_name(), action))
+        getattr(resource, action)(aws_environment)
+
     def describe_resource(self, request_user: UserModel, aws_environment: AwsEnvironmentModel, resource: Resource):
         self.logger.info("START: describe_resource")
         tenant = aws_environment.tenant
@@ -153,12 +357,89 @@ class ControlResourceUseCase:
         if not request_user.has_aws_env(aws_environment):
             raise PermissionDenied("request user doesn't have aws environments. id:{}".format(request_user.id))
 
+        # コマンドを送信して実行ジョブを作成し、実行状況の確認はバックグラウンドで行う
         command.run(aws_environment)
+        job = CommandJobModel.create_job(aws_environment, command)
+        COMMAND_POLLER.submit(self._poll_command_job, aws_environment, job.id)
 
         self.logger.info("END: run_command")
         return command
 
-    def fetch_documents(self, request_user: UserModel, aws_environment: AwsEnvironmentModel, region: str):
+    def _poll_command_job(self, aws_environment: AwsEnvironmentModel, job_id: int):
+        """
+        コマンドの実行が終了するまで実行状況を確認する
+        確認する間隔は確認のたびに倍にし、設定された時間を超えたら確認をやめる
+        確認をやめたジョブは実行状況の取得時に確認する
+        """
+        interval = settings.SSM_COMMAND_POLL_INITIAL_SECONDS
+        deadline = time.time() + settings.SSM_COMMAND_POLL_TIMEOUT_SECONDS
+        try:
+            while True:
+                time.sleep(interval)
+                job = CommandJobModel.objects.get(id=job_id)
+                try:
+                    self._refresh_command_job(aws_environment, job)
+                except Exception as e:
+                    self.logger.warning("poll command failed. command_id: {} error: {}".format(job.command_id, e))
+
+                if job.is_finished() or time.time() >= deadline:
+                    return
+                interval = min(interval * 2, settings.SSM_COMMAND_POLL_MAX_SECONDS)
+        finally:
+            # ワーカースレッドに作成されたDB接続を閉じる
+            connection.close()
+
+    @staticmethod
+    def _refresh_command_job(aws_environment: AwsEnvironmentModel, job: CommandJobModel):
+        invocations = Ssm(aws_environment=aws_environment, region=job.region).list_command_invocations(job.command_id)
+        job.update_invocations(invocations)
+
+    def fetch_command_job(self, request_user: UserModel, aws_environment: AwsEnvironmentModel,
+                          region: str, command_id: str):
+        """
+        コマンドの実行状況を取得する
+
+        バックグラウンドでの確認が止まっている場合はここで確認する
+
+        :param request_user: リクエストユーザー
+        :param aws_environment: AWS環境
+        :param region: リージョン
+        :param command_id: コマンドID
+        :return: CommandJobModel
+        """
+        self.logger.info("START: fetch_command_job")
+        tenant = aws_environment.tenant
+        if not request_user.is_belong_to_tenant(tenant):
+            raise PermissionDenied("request user is not belong to tenant. user_id:{} tenant_id:{}"
+                                   .format(request_user.id, tenant.id))
+
+        if not request_user.has_aws_env(aws_environment):
+            raise PermissionDenied("request user doesn't have aws environments. id:{}".format(request_user.id))
+
+        job = CommandJobModel.objects.get(aws_environment=aws_environment, region=region, command_id=command_id)
+
+        # 確認間隔の上限の2倍を過ぎても確認されていなければ止まっているとみなす
+        checked_at = job.polled_at or job.created_at
+        if not job.is_finished() and \
+                timezone.now() - checked_at > timedelta(seconds=settings.SSM_COMMAND_POLL_MAX_SECONDS * 2):
+            self._refresh_command_job(aws_environment, job)
+
+        self.logger.info("END: fetch_command_job")
+        return job
+
+    def fetch_documents(self, request_user: UserModel, aws_environment: AwsEnvironmentModel, region: str,
+                        owner: str = None, name_prefix: str = None, platform: str = None):
+        """
+        ドキュメントの一覧を取得する
+
+        :param request_user:
+        :param aws_environment:
+        :param region:
+        :param owner: 所有者 Selfの場合はAWS環境のアカウントが所有するもの
+        :param name_prefix: ドキュメント名の前方一致
+        :param platform: 対応するプラットフォーム Windows/Linux/MacOS
+        :return: Documentのリスト
+        """
         self.logger.info("START: fetch_documents")
         tenant = aws_environment.tenant
         if not request_user.is_belong_to_tenant(tenant):
@@ -169,9 +450,15 @@ class ControlResourceUseCase:
             raise PermissionDenied("request user doesn't have aws environments. id:{}".format(request_user.id))
 
         ssm = Ssm(aws_environment=aws_environment, region=region)
-        documents = []
-        for generator in ssm.list_documents():
-            documents.extend(generator)
+        documents = ssm.get_document_catalog()
+
+        if owner:
+            owner = aws_environment.aws_account_id if owner == "Self" else owner
+            documents = [document for document in documents if document.owner == owner]
+        if name_prefix:
+            documents = [document for document in documents if document.name.startswith(name_prefix)]
+        if platform:
+            documents = [document for document in documents if platform in document.platform_types]
 
         self.logger.info("END: fetch_documents")
         return documents
@@ -20,7 +20,8 @@ class ControlTenantUseCase:
         if not request_user.can_control_tenant():
             raise InvalidRoleException("request user can't create tenant. id:{}".format(request_user.id))
 
-        response = [tenant_model for tenant_model in TenantModel.objects.all()]
+        # AWS環境はテナントごとではなくまとめて取得する
+        response = [tenant_model for tenant_model in TenantModel.objects.prefetch_related("aws_environments")]
         self.logger.info("END: fetch_tenants")
         return response
 
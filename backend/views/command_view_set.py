@@ -0,0 +1,19 @@
+from rest_framework.viewsets import ViewSet
+from rest_framework.response import Response
+from rest_framework import status
+from backend.models.aws_environment import AwsEnvironmentModel
+from backend.usecases.control_resource import ControlResourceUseCase
+from backend.logger import NarukoLogging
+
+
+class CommandViewSet(ViewSet):
+
+    def retrieve(self, request, tenant_pk=None, aws_env_pk=None, region_pk=None, pk=None):
+        log = NarukoLogging(request)
+        logger = log.get_logger(__name__)
+        logger.info("START: retrieve")
+        aws_environment = AwsEnvironmentModel.objects.get(id=aws_env_pk, tenant_id=tenant_pk)
+        job = ControlResourceUseCase(log).fetch_command_job(request.user, aws_environment, region_pk, pk)
+        logger.info("END: retrieve")
+        return Response(data=job.serialize(),
+                        status=status.HTTP_200_OK)
@@ -1,6 +1,7 @@
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.pagination import LimitOffsetPagination
 from backend.models.aws_environment import AwsEnvironmentModel
 from backend.usecases.control_resource import ControlResourceUseCase
 from backend.logger import NarukoLogging
@@ -13,7 +14,22 @@ class DocumentViewSet(ViewSet):
         logger = log.get_logger(__name__)
         logger.info("START: list")
         aws_environment = AwsEnvironmentModel.objects.get(id=aws_env_pk, tenant_id=tenant_pk)
-        documents = ControlResourceUseCase(log).fetch_documents(request.user, aws_environment, region_pk)
+        documents = ControlResourceUseCase(log).fetch_documents(
+            request.user,
+            aws_environment,
+            region_pk,
+            owner=request.GET.get("owner"),
+            name_prefix=request.GET.get("name_prefix"),
+            platform=request.GET.get("platform")
+        )
+
+        # limitが指定された場合のみページングする
+        if request.GET.get("limit"):
+            paginator = LimitOffsetPagination()
+            page = paginator.paginate_queryset(documents, request, view=self)
+            logger.info("END: list")
+            return paginator.get_paginated_response([doc.serialize() for doc in page])
+
         logger.info("END: list")
         return Response(data=[doc.serialize() for doc in documents],
                         status=status.HTTP_200_OK)
@@ -45,3 +45,74 @@ class MonitorViewSet(ViewSet):
         monitor_graph = ControlMonitorUseCase(log).graph(request.user, resource, aws_environment, monitor_graph)
         logger.info("END: graph")
         return Response(data=monitor_graph.serialize(), status=status.HTTP_200_OK)
+
+
+class ServiceMonitorViewSet(ViewSet):
+
+    def list(self, request, tenant_pk=None, aws_env_pk=None, region_pk=None, service_pk=None):
+        log = NarukoLogging(request)
+        logger = log.get_logger(__name__)
+        logger.info("START: list")
+        aws = AwsEnvironmentModel.objects.get(id=aws_env_pk, tenant_id=tenant_pk)
+        resources = [Resource.get_service_resource(region_pk, service_pk, resource_id)
+                     for resource_id in request.GET["resource_ids"].split(",")]
+        monitors = ControlMonitorUseCase(log).fetch_resources_monitors(request.user, aws, region_pk, resources)
+        logger.info("END: list")
+        return Response(data=[{
+            "resource_id": resource.resource_id,
+            "monitors": [monitor.serialize()
+                         for monitor in monitors[(resource.get_service_name(), resource.resource_id)]]
+        } for resource in resources], status=status.HTTP_200_OK)
+
+    @action(methods=['post'], detail=False)
+    def graph(self, request, tenant_pk=None, aws_env_pk=None, region_pk=None, service_pk=None):
+        log = NarukoLogging(request)
+        logger = log.get_logger(__name__)
+        logger.info("START: graph")
+        aws = AwsEnvironmentModel.objects.get(id=aws_env_pk, tenant_id=tenant_pk)
+        params = dict(request.data)
+        resource_ids = params.pop("resource_ids")
+        metric_names = params.pop("metric_names", None)
+        monitor_graphs = []
+        for resource_id in resource_ids:
+            resource = Resource.get_service_resource(region_pk, service_pk, resource_id)
+            # メトリクスの指定がなければサービスの全メトリクスを取得する
+            for metric_name in metric_names or resource.get_metrics():
+                monitor_graphs.append((resource, MonitorGraph(metric_name=metric_name, **params)))
+        ControlMonitorUseCase(log).graphs(request.user, aws, region_pk, monitor_graphs)
+        logger.info("END: graph")
+        return Response(data=[dict(
+            resource_id=resource.resource_id,
+            metric_name=monitor_graph.metric_name,
+            **monitor_graph.serialize()
+        ) for resource, monitor_graph in monitor_graphs], status=status.HTTP_200_OK)
+
+
+class BulkMonitorViewSet(ViewSet):
+
+    def create(self, request, tenant_pk=None, aws_env_pk=None):
+        log = NarukoLogging(request)
+        logger = log.get_logger(__name__)
+        logger.info("START: create")
+        aws_environment = AwsEnvironmentModel.objects.get(id=aws_env_pk, tenant_id=tenant_pk)
+        monitors = []
+        for data in request.data["monitors"]:
+            data = dict(data)
+            resource = Resource.get_service_resource(data.pop("region"), data.pop("service"), data.pop("resource_id"))
+            monitors.append((resource, Monitor(**data)))
+        results = ControlMonitorUseCase(log).save_monitors(request.user, aws_environment, monitors)
+        logger.info("END: create")
+        return Response(data=results, status=status.HTTP_200_OK)
+
+    @action(methods=['post'], detail=False, url_path='delete')
+    def delete_monitors(self, request, tenant_pk=None, aws_env_pk=None):
+        log = NarukoLogging(request)
+        logger = log.get_logger(__name__)
+        logger.info("START: delete_monitors")
+        aws_environment = AwsEnvironmentModel.objects.get(id=aws_env_pk, tenant_id=tenant_pk)
+        monitors = [(Resource.get_service_resource(data["region"], data["service"], data["resource_id"]),
+                     data["metric_name"])
+                    for data in request.data["monitors"]]
+        results = ControlMonitorUseCase(log).delete_monitors(request.user, aws_environment, monitors)
+        logger.info("END: delete_monitors")
+        return Response(data=results, status=status.HTTP_200_OK)
@@ -27,6 +27,7 @@ def notify(request: Request):
     if sns_type == "Notification":
         # 通知：アラームの内容に従って通知処理を実施する
         alarm_message = json.loads(body_data["Message"])
+        use_case.update_alarm_status(alarm_message)
         use_case.notify(NotificationDestinationModel.NotificationMessage(alarm_message))
     elif sns_type == "SubscriptionConfirmation":
 
@@ -1,19 +1,104 @@
 from rest_framework.viewsets import ViewSet
-from backend.models import TenantModel
+from rest_framework.decorators import action
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from backend.models import TenantModel, OperationLogModel
 from backend.serializers.operation_log_model_serializer import OperationLogModelSerializerDetail
 from backend.usecases.control_operation_log import ControlOperationLog
 from rest_framework.response import Response
 from backend.logger import NarukoLogging
+import csv
+import json
 
 
 class OperationLogModelViewSet(ViewSet):
 
+    # エクスポートする項目
+    EXPORT_FIELDS = ("id", "created_at", "executor_id", "executor__name", "executor__email", "operation", "result")
+
     def list(self, request, tenant_pk=None):
         log = NarukoLogging(request)
         logger = log.get_logger(__name__)
         logger.info("START: list")
-        tenant = TenantModel.objects.get(id=tenant_pk)
-        logs = ControlOperationLog(log).fetch_logs(request.user, tenant)
+        logs = self._fetch_logs(request, log, tenant_pk)
+
+        # 全件を返さないよう、limitの指定がなければPAGE_SIZE件ずつページングする
+        page, next_cursor = OperationLogModel.page(logs, request.GET.get("cursor"), request.GET.get("limit"))
         logger.info("END: list")
-        return Response(data=[OperationLogModelSerializerDetail(operation_log).data for operation_log in logs])
+        return Response(data=dict(
+            next=next_cursor,
+            results=OperationLogModelSerializerDetail(page, many=True).data
+        ))
+
+    @action(methods=['get'], detail=False)
+    def export(self, request, tenant_pk=None):
+        log = NarukoLogging(request)
+        logger = log.get_logger(__name__)
+        logger.info("START: export")
+        # formatはDRFがレンダラーの選択に使うためtypeで指定する
+        export_type = request.GET.get("type", "csv")
+        if export_type not in ("csv", "ndjson"):
+            raise ValueError("invalid export type: {}".format(export_type))
+
+        logs = self._fetch_logs(request, log, tenant_pk).values(*self.EXPORT_FIELDS)
+        rows = OperationLogModel.iterate(logs, settings.OPERATION_LOG_EXPORT_CHUNK_SIZE)
+
+        if export_type == "csv":
+            response = StreamingHttpResponse(self._csv_lines(rows), content_type="text/csv; charset=utf-8")
+        else:
+            response = StreamingHttpResponse(self._ndjson_lines(rows), content_type="application/x-ndjson")
+        response["Content-Disposition"] = 'attachment; filename="operation_logs.{}"'.format(export_type)
+        logger.info("END: export")
+        return response
+
+    def _fetch_logs(self, request, log: NarukoLogging, tenant_pk):
+        tenant = TenantModel.objects.get(id=tenant_pk)
+        return ControlOperationLog(log).fetch_logs(
+            request.user,
+            tenant,
+            executor_id=request.GET.get("executor"),
+            operation=request.GET.get("operation"),
+            since=self._parse_datetime(request.GET.get("since")),
+            until=self._parse_datetime(request.GET.get("until"))
+        )
+
+    @staticmethod
+    def _parse_datetime(value):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError("invalid datetime: {}".format(value))
+        return parsed
+
+    @classmethod
+    def _export_row(cls, row: dict):
+        row = dict(row)
+        row["created_at"] = timezone.localtime(row["created_at"]).isoformat()
+        return row
+
+    @classmethod
+    def _csv_lines(cls, rows):
+        # 1行ずつ書き出した文字列を返す Excelで開けるようにBOMを付ける
+        buffer = _LineBuffer()
+        writer = csv.writer(buffer)
+        yield "\ufeff" + writer.writerow(cls.EXPORT_FIELDS)
+        for row in rows:
+            row = cls._export_row(row)
+            yield writer.writerow([row[field] for field in cls.EXPORT_FIELDS])
+
+    @classmethod
+    def _ndjson_lines(cls, rows):
+        for row in rows:
+            yield json.dumps(cls._export_row(row), ensure_ascii=False) + "\n"
+
+
+class _LineBuffer:
+    """
+    csv.writerが書き込んだ文字列をそのまま返す
+    """
 
+    def write(self, value):
+        return value
@@ -17,6 +17,21 @@ class ResourceViewSet(ViewSet):
         logger.info("START: list")
         region = request.GET.get("region")
         aws_environment = AwsEnvironmentModel.objects.get(id=aws_env_pk, tenant_id=tenant_pk)
+
+        # リージョン指定がなければ全リージョンをまとめて取得する
+        if not region:
+            regions = request.GET.get("regions")
+            resources, errors = ControlResourceUseCase(log).fetch_resources_all_regions(
+                request.user,
+                aws_environment,
+                regions.split(",") if regions else None
+            )
+            logger.info("END: list")
+            return Response(data={
+                "resources": [resource.serialize(aws_environment) for resource in resources],
+                "errors": errors
+            }, status=status.HTTP_200_OK)
+
         resources = ControlResourceUseCase(log).fetch_resources(
             request.user,
             aws_environment,
@@ -62,6 +77,22 @@ class ResourceViewSet(ViewSet):
         logger.info("END: stop")
         return Response(status=status.HTTP_200_OK)
 
+    @action(methods=['post'], detail=False)
+    def power(self, request, tenant_pk=None, aws_env_pk=None, region_pk=None, service_pk=None):
+        """
+        複数のリソースをまとめて起動・停止・再起動する
+        """
+        log = NarukoLogging(request)
+        logger = log.get_logger(__name__)
+        logger.info("START: power")
+        aws_environment = AwsEnvironmentModel.objects.get(id=aws_env_pk, tenant_id=tenant_pk)
+        resources = [Resource.get_service_resource(data["region"], data["service"], data["resource_id"])
+                     for data in request.data["resources"]]
+        results = ControlResourceUseCase(log).power_resources(
+            request.user, aws_environment, request.data["action"], resources)
+        logger.info("END: power")
+        return Response(data=results, status=status.HTTP_200_OK)
+
     def retrieve(self, request, tenant_pk=None, aws_env_pk=None,
                  region_pk=None, service_pk=None, pk=None):
         log = NarukoLogging(request)
@@ -91,7 +122,8 @@ class ResourceViewSet(ViewSet):
             resource)
         command = ControlResourceUseCase(log).run_command(request.user, aws_environment, command)
         logger.info("END: run_command")
-        return Response(status=status.HTTP_200_OK, data=command.serialize())
+        # 実行の終了は待たずにコマンドIDを返す
+        return Response(status=status.HTTP_202_ACCEPTED, data=command.serialize())
 
 
 class RegionViewSet(ViewSet):
@@ -99,5 +131,24 @@ class RegionViewSet(ViewSet):
 
 
 class ServiceViewSet(ViewSet):
-    pass
+
+    @action(methods=['post'], detail=True)
+    def run_command(self, request, tenant_pk=None, aws_env_pk=None, region_pk=None, pk=None):
+        """
+        複数のリソースに対してまとめてコマンドを実行する
+        """
+        log = NarukoLogging(request)
+        logger = log.get_logger(__name__)
+        logger.info("START: run_command")
+        aws_environment = AwsEnvironmentModel.objects.get(id=aws_env_pk, tenant_id=tenant_pk)
+        resources = [Resource.get_service_resource(region_pk, pk, resource_id)
+                     for resource_id in request.data["resource_ids"]]
+        command = Command(
+            Document(
+                request.data["name"],
+                [Parameter(**param) for param in request.data["parameters"]]),
+            resources)
+        command = ControlResourceUseCase(log).run_command(request.user, aws_environment, command)
+        logger.info("END: run_command")
+        return Response(status=status.HTTP_202_ACCEPTED, data=command.serialize())
 
@@ -17,6 +17,85 @@ NARUKO_REGION = "ap-northeast-1"
 # boto3で考慮すべき時差
 TIME_DIFFERENCE = 9
 
+# 全リージョンのリソース一覧取得の同時実行数
+RESOURCE_FETCH_MAX_WORKERS = 8
+# 全リージョンのリソース一覧取得における1リージョンあたりのタイムアウト（秒）
+RESOURCE_FETCH_REGION_TIMEOUT = 20
+
+# リソースの一括起動・停止・再起動の同時実行数
+RESOURCE_POWER_MAX_WORKERS = 10
+
+# スケジュールの実行をまとめるために待つ秒数 この間に起動したスケジュールをまとめて実行する
+# 0の場合はまとめずにSNSへ応答する前に実行する
+# ためたスケジュールはプロセス内にだけ保持するため、待っている間にプロセスが再起動すると実行されない
+SCHEDULE_COALESCE_SECONDS = 0
+# 保存したルールの状態をCloudWatchEventsのルールと突き合わせ直す間隔（秒）
+SCHEDULE_RULE_SYNC_SECONDS = 3600
+
+# 通知先へ同時に通知する最大数
+NOTIFICATION_MAX_WORKERS = 10
+# 通知方法ごとの1秒あたりの送信数の上限
+NOTIFICATION_RATE_LIMITS = {
+    "email": 14,
+    "telephone": 1,
+}
+# アラームの状態変化を通知先ごとにまとめて通知するために待つ秒数 0の場合はまとめずにすぐ通知する
+# ためた状態変化はプロセス内にだけ保持するため、待っている間にプロセスが再起動すると通知されない
+# また複数のプロセスで動かす場合はプロセスごとにまとめられる
+NOTIFICATION_DIGEST_SECONDS = 0
+# 危険レベルの状態変化を受け付けた場合は待たずにすぐ通知する
+NOTIFICATION_DIGEST_ESCALATE_DANGER = True
+
+# 操作ログをまとめて書き込む最大件数
+OPERATION_LOG_BUFFER_SIZE = 100
+# 操作ログを書き込むまで待つ秒数
+OPERATION_LOG_FLUSH_SECONDS = 1
+# 操作ログのエクスポートで1回に読み込む件数
+OPERATION_LOG_EXPORT_CHUNK_SIZE = 1000
+
+# 論理削除で1回にUPDATEする件数
+SOFT_DELETE_BATCH_SIZE = 1000
+
+# アラーム状態索引をCloudWatchのアラームと洗い替える間隔（秒）
+ALARM_INDEX_RECONCILE_SECONDS = 900
+
+# 監視設定の一括登録・削除の同時実行数
+MONITOR_BULK_MAX_WORKERS = 10
+# CloudWatchからスロットリングされた場合の再実行回数
+CLOUDWATCH_THROTTLING_MAX_RETRIES = 5
+# CloudWatchからスロットリングされた場合の再実行間隔の基準値（秒） 再実行のたびに倍にする
+CLOUDWATCH_THROTTLING_BACKOFF_SECONDS = 0.5
+
+# メトリクスの時系列キャッシュ：参照されなくなった系列を保持する秒数
+METRIC_SERIES_CACHE_TTL = 3600
+# メトリクスの時系列キャッシュ：まだ値が変わりうる直近のデータを使用する秒数
+METRIC_SERIES_CACHE_LATEST_TTL = 60
+# メトリクスの時系列キャッシュ：現在時刻から何秒前までのデータを確定済みとみなすか
+METRIC_SERIES_CACHE_SETTLE_SECONDS = 600
+# メトリクスの時系列キャッシュ：保持する系列の最大数
+METRIC_SERIES_CACHE_MAX_SERIES = 1000
+
+# SSMドキュメント一覧のキャッシュ期間（秒）
+SSM_DOCUMENT_CATALOG_TTL = 600
+# SSMドキュメント詳細のキャッシュ期間（秒） 詳細はバージョンごとにキャッシュする
+SSM_DOCUMENT_TTL = 86400
+# SSMエージェントが登録されているインスタンス一覧のキャッシュ期間（秒）
+SSM_MANAGED_INSTANCES_TTL = 300
+
+# SNSの署名用証明書の公開鍵のキャッシュ期間（秒）
+SNS_SIGNING_CERT_TTL = 86400
+# SNSの署名用証明書の取得のタイムアウト（秒）
+SNS_SIGNING_CERT_TIMEOUT = 5
+
+# SSMコマンドの実行状況を確認する間隔の初期値（秒） 確認するたびに倍にする
+SSM_COMMAND_POLL_INITIAL_SECONDS = 1
+# SSMコマンドの実行状況を確認する間隔の上限（秒）
+SSM_COMMAND_POLL_MAX_SECONDS = 30
+# SSMコマンドの実行状況をバックグラウンドで確認し続ける最大の秒数
+SSM_COMMAND_POLL_TIMEOUT_SECONDS = 3600
+# SSMコマンドの実行状況を確認するスレッドの最大数
+SSM_COMMAND_POLL_MAX_WORKERS = 10
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -106,7 +185,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_jwt.authentication.JSONWebTokenAuthentication',
+        'backend.authentication.NarukoJSONWebTokenAuthentication',
     ),
 }
 
@@ -115,6 +194,16 @@ JWT_AUTH = {
     'JWT_ALLOW_REFRESH': True
 }
 
+# =========================
+# cache 設定
+# =========================
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'naruko',
+    }
+}
+
 # =========================
 # log 設定 共通
 # =========================
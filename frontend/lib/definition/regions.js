@@ -1,64 +0,0 @@
-import Enum from '@/lib/definition/enum'
-
-export default new Enum({
-  usEast1: {
-    id: 'us-east-1',
-    name: '米国東部（バージニア北部）'
-  },
-  usEast2: {
-    id: 'us-east-2',
-    name: '米国東部 (オハイオ)'
-  },
-  usWest1: {
-    id: 'us-west-1',
-    name: '米国西部 (北カリフォルニア)'
-  },
-  usWest2: {
-    id: 'us-west-2',
-    name: '米国西部 (オレゴン)'
-  },
-  apSouth1: {
-    id: 'ap-south-1',
-    name: 'アジアパシフィック (ムンバイ)'
-  },
-  apNortheast2: {
-    id: 'ap-northeast-2',
-    name: 'アジアパシフィック (ソウル)'
-  },
-  apSoutheast1: {
-    id: 'ap-southeast-1',
-    name: 'アジアパシフィック (シンガポール)'
-  },
-  apSoutheast2: {
-    id: 'ap-southeast-2',
-    name: 'アジアパシフィック (シドニー)'
-  },
-  apNortheast1: {
-    id: 'ap-northeast-1',
-    name: 'アジアパシフィック (東京)'
-  },
-  caCentral1: {
-    id: 'ca-central-1',
-    name: 'カナダ (中部)'
-  },
-  euCentral1: {
-    id: 'eu-central-1',
-    name: '欧州 (フランクフルト)'
-  },
-  euWest1: {
-    id: 'eu-west-1',
-    name: '欧州 (アイルランド)'
-  },
-  euWest2: {
-    id: 'eu-west-2',
-    name: '欧州 (ロンドン)'
-  },
-  euWest3: {
-    id: 'eu-west-3',
-    name: 'EU (パリ)'
-  },
-  saEast1: {
-    id: 'sa-east-1',
-    name: '南米 (サンパウロ)'
-  }
-})
\ No newline at end of file
@@ -32,6 +32,11 @@ export default function (client) {
         cancelToken: cancelToken
       })
     },
+    getAllRegionResources(cancelToken, tenantId, aws_environments) {
+      return client.get(`/api/tenants/${tenantId}/aws-environments/${aws_environments}/resources/`, {
+        cancelToken: cancelToken
+      })
+    },
     getResourceDetail(tenantId, aws_environments, region, service, resourceId) {
       return client.get(`/api/tenants/${tenantId}/aws-environments/${aws_environments}/regions/${region}/services/${service}/resources/${resourceId}/`)
     },
@@ -104,8 +109,8 @@ export default function (client) {
     deleteSchedule(tenantId, aws_environments, region, service, resourceId, scheduleId) {
       return client.delete(`/api/tenants/${tenantId}/aws-environments/${aws_environments}/regions/${region}/services/${service}/resources/${resourceId}/schedules/${scheduleId}/`)
     },
-    getOperationLog(tenantId) {
-      return client.get(`/api/tenants/${tenantId}/logs/`)
+    getOperationLog(tenantId, limit, cursor) {
+      return client.get(`/api/tenants/${tenantId}/logs/`, {params: {limit: limit, cursor: cursor}})
     },
     getDocuments(tenantId, aws_environments, region) {
       return client.get(`/api/tenants/${tenantId}/aws-environments/${aws_environments}/regions/${region}/documents/`)
@@ -115,6 +120,9 @@ export default function (client) {
     },
     runCommand(tenantId, aws_environments, region, service, resourceId, data) {
       return client.post(`/api/tenants/${tenantId}/aws-environments/${aws_environments}/regions/${region}/services/${service}/resources/${resourceId}/run_command/`, data)
+    },
+    getCommand(tenantId, aws_environments, region, commandId) {
+      return client.get(`/api/tenants/${tenantId}/aws-environments/${aws_environments}/regions/${region}/commands/${commandId}/`)
     }
   }
 }
\ No newline at end of file
@@ -1,32 +1,59 @@
 import httpClient from '@/lib/httpClient'
 import moment from 'moment-timezone'
 
+// 1回に取得する操作ログの件数
+const PAGE_SIZE = 100
+
 // state
 const state = {
-  operationLogs: []
+  operationLogs: [],
+  next: null
 }
 
 // getters
 const getters = {
-  operationLogs: state => state.operationLogs
+  operationLogs: state => state.operationLogs,
+  hasNext: state => state.next != null
 }
 
 // mutations
 const mutations = {
   operationLogs(state, data) {
     state.operationLogs = data
+  },
+  next(state, data) {
+    state.next = data
   }
 }
 
+function fetchPage(rootGetters, cursor) {
+  return httpClient.tenant.getOperationLog(rootGetters['user/userData'].tenant.id, PAGE_SIZE, cursor).then((res) => {
+    for (const log of res.data.results) {
+      log.created_at = moment(new Date(log.created_at)).format("YYYY/MM/DD HH:mm:ss")
+      log.executor = log.executor == null ? {name: '-'} : log.executor
+    }
+    return Promise.resolve(res)
+  })
+}
+
 // actions
 const actions = {
   fetchOperationLogs({commit, rootGetters, dispatch}) {
-    return httpClient.tenant.getOperationLog(rootGetters['user/userData'].tenant.id).then((res) => {
-      for (const log of res.data) {
-        log.created_at = moment(new Date(log.created_at)).format("YYYY/MM/DD HH:mm:ss")
-        log.executor = log.executor == null ? {name: '-'} : log.executor
-      }
-      commit('operationLogs', res.data)
+    // 先頭のページを取得する
+    return fetchPage(rootGetters).then((res) => {
+      commit('operationLogs', res.data.results)
+      commit('next', res.data.next)
+      return Promise.resolve(res)
+    }).catch((res) => {
+      dispatch('alert/pushErrorAlert', '操作ログの取得に失敗しました。', {root: true})
+      return Promise.reject(res)
+    })
+  },
+  fetchNextOperationLogs({state, commit, rootGetters, dispatch}) {
+    // 取得済みの操作ログに次のページを追加する
+    return fetchPage(rootGetters, state.next).then((res) => {
+      commit('operationLogs', state.operationLogs.concat(res.data.results))
+      commit('next', res.data.next)
       return Promise.resolve(res)
     }).catch((res) => {
       dispatch('alert/pushErrorAlert', '操作ログの取得に失敗しました。', {root: true})
@@ -5,6 +5,20 @@ import RESOURCES from '@/lib/definition/resources'
 import moment from 'moment-timezone'
 import Cron from '@/lib/cron'
 
+// コマンドの終了ステータス
+const COMMAND_FINISHED_STATUSES = ['Success', 'Cancelled', 'TimedOut', 'Failed', 'Undeliverable', 'Terminated']
+// コマンド状況のポーリング間隔(ミリ秒)
+const COMMAND_POLL_INTERVAL = 1000
+const COMMAND_POLL_MAX_INTERVAL = 10000
+
+// コマンドジョブにインスタンスごとの実行結果をまとめた表示用の出力を付与する
+function withOutPut(command) {
+  const outPut = (command.invocations || []).map((invocation) => {
+    return `[${invocation.instance_id}] ${invocation.status}\n${invocation.output || ''}`
+  }).join('\n\n')
+  return Object.assign({}, command, {out_put: outPut || command.status})
+}
+
 // state
 const state = {
   resource: {},
@@ -378,12 +392,46 @@ const actions = {
       state.resource.service,
       state.resource.id,
       data).then((res) => {
-        commit('command', res.data)
+        commit('command', withOutPut(res.data))
         return Promise.resolve(res)
     }).catch((res) => {
       commit('command', {out_put: `コマンドの実行に失敗しました。`})
       return Promise.reject(res)
     })
+  },
+  pollCommand({state, commit, rootGetters, dispatch}, interval = COMMAND_POLL_INTERVAL) {
+    // コマンドが終了するまで間隔を延ばしながら実行状況を取得する
+    const commandId = state.command.command_id
+    if (!commandId || COMMAND_FINISHED_STATUSES.includes(state.command.status)) {
+      return Promise.resolve(state.command)
+    }
+    return new Promise((resolve) => {
+      setTimeout(resolve, interval)
+    }).then(() => {
+      if (state.command.command_id !== commandId) {
+        // 別のコマンドが実行されたかクリアされた場合は終了する
+        return Promise.resolve(state.command)
+      }
+      return httpClient.tenant.getCommand(
+        rootGetters['user/userData'].tenant.id,
+        state.resource.aws_environment,
+        state.resource.region,
+        commandId).then((res) => {
+          if (state.command.command_id !== commandId) {
+            return Promise.resolve(state.command)
+          }
+          commit('command', withOutPut(res.data))
+          return dispatch('pollCommand', Math.min(interval * 2, COMMAND_POLL_MAX_INTERVAL))
+      })
+    }).catch((res) => {
+      if (state.command.command_id === commandId) {
+        commit('command', {out_put: `コマンドの実行状況の取得に失敗しました。`})
+      }
+      return Promise.reject(res)
+    })
+  },
+  clearCommand({commit}) {
+    commit('command', {})
   }
 }
 
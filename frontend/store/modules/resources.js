@@ -1,6 +1,5 @@
 import httpClient from '@/lib/httpClient'
 import STATUS from '@/lib/definition/monitorStatus'
-import REGIONS from '@/lib/definition/regions'
 import axios from 'axios'
 
 // state
@@ -42,28 +41,31 @@ const actions = {
     const requestArray = []
     const tenantId = rootGetters['user/userData'].tenant.id
     for (const awsEnv of rootGetters['user/userData'].aws_environments) {
-      REGIONS.forEach((region) => {
-        const request = httpClient.tenant.getResources(source.token, tenantId, awsEnv.id, region.id).then((resp) => {
-          for (const instance of resp.data) {
-            // ステータスの設定
-            if (instance.status === STATUS.OK.id) {
-              instance.status = STATUS.OK
-            } else if (instance.status === STATUS.CAUTION.id) {
-              instance.status = STATUS.CAUTION
-            } else if (instance.status === STATUS.DANGER.id) {
-              instance.status = STATUS.DANGER
-            } else {
-              instance.status = STATUS.UNSET
-            }
-            instance.aws_environment = awsEnv
-            commit('pushResources', instance)
+      // 対象リージョンはサーバー側で決め、AWS環境ごとに全リージョンをまとめて取得する
+      const request = httpClient.tenant.getAllRegionResources(source.token, tenantId, awsEnv.id).then((resp) => {
+        for (const instance of resp.data.resources) {
+          // ステータスの設定
+          if (instance.status === STATUS.OK.id) {
+            instance.status = STATUS.OK
+          } else if (instance.status === STATUS.CAUTION.id) {
+            instance.status = STATUS.CAUTION
+          } else if (instance.status === STATUS.DANGER.id) {
+            instance.status = STATUS.DANGER
+          } else {
+            instance.status = STATUS.UNSET
           }
-          return Promise.resolve(resp)
-        }).catch((error) => {
-          return Promise.reject({error, data: {awsEnv: awsEnv, region: region}})
-        })
-        requestArray.push(request)
+          instance.aws_environment = awsEnv
+          commit('pushResources', instance)
+        }
+        // 取得できなかったリージョンを通知する
+        for (const error of resp.data.errors) {
+          dispatch('alert/pushErrorAlert', `${awsEnv.name}: ${error.region}のインスタンス一覧の取得に失敗しました。`, {root: true})
+        }
+        return Promise.resolve(resp)
+      }).catch((error) => {
+        return Promise.reject({error, data: {awsEnv: awsEnv}})
       })
+      requestArray.push(request)
     }
 
     const toResultObject = (promise) => {
@@ -73,7 +75,7 @@ const actions = {
           }).catch((res) => {
             const isCancel = axios.isCancel(res.error)
             if (!isCancel) {
-              dispatch('alert/pushErrorAlert', `${res.data.awsEnv.name}: ${res.data.region.name}のインスタンス一覧の取得に失敗しました。`, {root: true})
+              dispatch('alert/pushErrorAlert', `${res.data.awsEnv.name}のインスタンス一覧の取得に失敗しました。`, {root: true})
             }
             return {success: false, data: res.data, isCancel: isCancel}
           })
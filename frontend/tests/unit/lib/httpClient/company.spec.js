@@ -107,6 +107,23 @@ describe('lib/httpClient/tenant', () => {
     done()
   })
 
+  it('getAllRegionResources', (done) => {
+    const tenant = require('@/lib/httpClient/tenant').default
+
+    const tenantId = 1
+    const aws_environments = 1
+    const cancelToken = 'cancelToken'
+
+    const axiosMock = {
+      get: jest.fn()
+    }
+
+    tenant(axiosMock).getAllRegionResources(cancelToken, tenantId, aws_environments)
+
+    expect(axiosMock.get).toHaveBeenCalledWith(`/api/tenants/${tenantId}/aws-environments/${aws_environments}/resources/`, {cancelToken: cancelToken})
+    done()
+  })
+
   it('getTenants', (done) => {
     const tenant = require('@/lib/httpClient/tenant').default
 
@@ -34,9 +34,11 @@ describe('store/modules/operationLogs', () => {
     }]
 
     const httpClient = require('@/lib/httpClient').default
-    httpClient.tenant.getOperationLog = jest.fn().mockImplementation((c) => {
+    httpClient.tenant.getOperationLog = jest.fn().mockImplementation((c, limit, cursor) => {
       expect(c).toBe(tenantId)
-      return Promise.resolve({data: data})
+      expect(limit).toBe(100)
+      expect(cursor).toBeUndefined()
+      return Promise.resolve({data: {results: data, next: 'next cursor'}})
     })
 
     const commit = jest.fn();
@@ -50,6 +52,42 @@ describe('store/modules/operationLogs', () => {
 
     operationLogs.actions.fetchOperationLogs({commit, rootGetters}).then(() => {
       expect(commit).toHaveBeenCalledWith('operationLogs', data)
+      expect(commit).toHaveBeenCalledWith('next', 'next cursor')
+      done()
+    })
+  })
+
+  it('actions.fetchNextOperationLogs', (done) => {
+    const operationLogs = require('@/store/modules/operationLogs').default
+    const tenantId = 'test tenant id'
+    const data = [{
+      id: 'id2',
+      operation: 'operation_id2'
+    }]
+
+    const httpClient = require('@/lib/httpClient').default
+    httpClient.tenant.getOperationLog = jest.fn().mockImplementation((c, limit, cursor) => {
+      expect(c).toBe(tenantId)
+      expect(cursor).toBe('next cursor')
+      return Promise.resolve({data: {results: data, next: null}})
+    })
+
+    const state = {
+      operationLogs: [{id: 'id1', operation: 'operation_id1'}],
+      next: 'next cursor'
+    }
+    const commit = jest.fn();
+    const rootGetters = {
+      'user/userData': {
+        tenant: {
+          id: tenantId
+        }
+      }
+    }
+
+    operationLogs.actions.fetchNextOperationLogs({state, commit, rootGetters}).then(() => {
+      expect(commit).toHaveBeenCalledWith('operationLogs', [{id: 'id1', operation: 'operation_id1'}].concat(data))
+      expect(commit).toHaveBeenCalledWith('next', null)
       done()
     })
   })
@@ -907,8 +907,7 @@ describe('store/modules/resourceDetail', () => {
     const data = {
 
     }
-    const responseData = [{name: "AWS-RunShellScript", parameters: [
-      {key: "commands", value: null, description: "test"}]}]
+    const responseData = {command_id: 'test command', status: 'Pending', invocations: []}
 
     const httpClient = require('@/lib/httpClient').default
     httpClient.tenant.runCommand = jest.fn().mockImplementation((cid, a, r, s, rid, d) => {
@@ -934,6 +933,60 @@ describe('store/modules/resourceDetail', () => {
     }, data).then((res) => {
       expect(res.data).toEqual(responseData)
       expect(httpClient.tenant.runCommand).toHaveBeenCalledWith(userData.tenant.id, resource.aws_environment, resource.region, resource.service, resource.id, data)
+      expect(commit).toHaveBeenCalledWith('command', {command_id: 'test command', status: 'Pending', invocations: [], out_put: 'Pending'})
+      done()
+    })
+  })
+
+  it('actions.pollCommand', (done) => {
+    const resourceDetail = require('@/store/modules/resourceDetail').default
+
+    const userData = {
+      tenant: {
+        id: 1,
+        name: 'test_tenant'
+      }
+    }
+    const resource = {
+      aws_environment: 'test aws account',
+      region: 'test region',
+      service: 'EC2',
+      id: 'test id',
+      name: 'test name'
+    }
+    const responseData = {
+      command_id: 'test command',
+      status: 'Success',
+      invocations: [{instance_id: 'test id', status: 'Success', output: 'test output'}]
+    }
+
+    const httpClient = require('@/lib/httpClient').default
+    httpClient.tenant.getCommand = jest.fn().mockImplementation((cid, a, r, commandId) => {
+      expect(cid).toBe(userData.tenant.id)
+      expect(a).toBe(resource.aws_environment)
+      expect(r).toBe(resource.region)
+      expect(commandId).toBe(responseData.command_id)
+      return Promise.resolve({data: responseData})
+    })
+
+    const state = {
+      resource: resource,
+      command: {command_id: 'test command', status: 'Pending'}
+    }
+    const commit = jest.fn().mockImplementation((type, data) => {
+      state.command = data
+    })
+    const rootGetters = {
+      'user/userData': userData
+    }
+    const dispatch = jest.fn().mockImplementation((type, interval) => {
+      return resourceDetail.actions.pollCommand({state, commit, rootGetters, dispatch}, interval)
+    })
+    resourceDetail.actions.pollCommand({
+      state, commit, rootGetters, dispatch
+    }, 0).then(() => {
+      expect(httpClient.tenant.getCommand).toHaveBeenCalledTimes(1)
+      expect(state.command.out_put).toBe('[test id] Success\ntest output')
       done()
     })
   })
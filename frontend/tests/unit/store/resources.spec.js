@@ -27,15 +27,6 @@ describe('store/modules/resources', () => {
   })
 
   it('actions.fetch', (done) => {
-    const Enum = require('@/lib/definition/enum').default
-    const regions = require('@/lib/definition/regions')
-    regions.default = new Enum({
-      'ap-northeast-1': {
-        id: 'ap-northeast-1',
-        name: 'アジアパシフィック (東京)'
-      }
-    })
-
     const axios = require('axios').default
     axios.CancelToken = {
       cancel: jest.fn(),
@@ -60,7 +51,6 @@ describe('store/modules/resources', () => {
         }
       ]
     }
-    const region = 'ap-northeast-1'
     const data = [
       {
         id: 'id1',
@@ -160,20 +150,22 @@ describe('store/modules/resources', () => {
     ]
 
     const httpClient = require('@/lib/httpClient').default
-    httpClient.tenant.getResources = jest.fn().mockImplementation((t, c, a, r) => {
+    httpClient.tenant.getAllRegionResources = jest.fn().mockImplementation((t, c, a) => {
       expect(t).toBe(token)
       expect(c).toBe(tenantId)
       expect(a).toBe(awsEnv)
-      expect(r).toBe(region)
-      return Promise.resolve({data: data})
+      return Promise.resolve({data: {resources: data, errors: [{region: 'us-east-1', message: 'timeout'}]}})
     })
 
     const commit = jest.fn();
+    const dispatch = jest.fn();
     const rootGetters = {
       'user/userData': userData
     }
     const state = {}
-    resources.actions.fetch({commit, state, rootGetters}).then(() => {
+    resources.actions.fetch({commit, state, rootGetters, dispatch}).then(() => {
+      expect(httpClient.tenant.getAllRegionResources).toHaveBeenCalledTimes(1)
+      expect(dispatch).toHaveBeenCalledWith('alert/pushErrorAlert', 'testaws: us-east-1のインスタンス一覧の取得に失敗しました。', {root: true})
       expect(commit).toHaveBeenCalledWith('cancelToken', {token: 'token'})
       expect(commit).toHaveBeenCalledWith('resources', [])
       expect(commit).toHaveBeenCalledWith('pushResources', expectData[0])